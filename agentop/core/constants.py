@@ -54,6 +54,8 @@ CLAUDE_CONFIG_DIR_ENV = "CLAUDE_CONFIG_DIR"
 CLAUDE_PROJECTS_DIRNAME = "projects"
 _XDG_CONFIG_HOME = os.environ.get("XDG_CONFIG_HOME", "~/.config")
 DEFAULT_CLAUDE_CONFIG_DIRS = [f"{_XDG_CONFIG_HOME}/claude", "~/.claude"]
+PARSE_WORKERS_ENV = "AGENTOP_PARSE_WORKERS"
+JSON_BACKEND_ENV = "AGENTOP_JSON_BACKEND"
 DEFAULT_CLAUDE_LOGS_DIR = "~/.claude-code/sessions/"
 DEFAULT_CODEX_STATS_FILES = [
     "~/.codex/stats.json",
@@ -2,7 +2,8 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List
+from types import MappingProxyType
+from typing import Optional, List, Mapping
 from enum import Enum
 
 
@@ -100,6 +101,82 @@ class RateLimitWindow:
         return max(0.0, 100.0 - self.used_percent)
 
 
+@dataclass
+class BillingBlock:
+    """Usage within one local 5-hour billing block."""
+
+    start: datetime
+    end: datetime
+    tokens: TokenUsage = field(default_factory=TokenUsage)
+    cost: float = 0.0
+    entry_count: int = 0
+    last_entry_at: Optional[datetime] = None
+
+    @property
+    def active_minutes(self) -> float:
+        """Minutes from the block start to its latest entry (at least one)."""
+        if not self.last_entry_at:
+            return 1.0
+        return max(1.0, (self.last_entry_at - self.start).total_seconds() / 60)
+
+    @property
+    def tokens_per_minute(self) -> float:
+        """Token burn rate over the active part of the block."""
+        return self.tokens.total_tokens / self.active_minutes
+
+    @property
+    def cost_per_hour(self) -> float:
+        """Cost burn rate in USD/hour over the active part of the block."""
+        return self.cost / (self.active_minutes / 60)
+
+
+@dataclass(frozen=True)
+class RequestEvent:
+    """One assistant response seen in a live session log."""
+
+    timestamp: datetime
+    session_id: Optional[str] = None
+    project: Optional[str] = None
+    model: Optional[str] = None
+    tokens: TokenUsage = field(default_factory=TokenUsage)
+    cost: float = 0.0
+    # Seconds since the previous response in the same session, if known
+    latency_seconds: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class UsageSnapshot:
+    """
+    Usage figures for one refresh, all computed from the same parser sync.
+
+    Monitors read every number from one snapshot so today, month and
+    last-updated values always agree with each other. A ``partial`` snapshot
+    only has today's figures; the rest follow on a later refresh.
+
+    Parsers hand the same snapshot to every caller until their next sync, so
+    it is read-only: the breakdowns are wrapped in read-only mappings, and the
+    ``TokenUsage`` values it holds must not be modified either.
+    """
+
+    taken_at: datetime
+    tokens_today: TokenUsage = field(default_factory=TokenUsage)
+    tokens_this_month: TokenUsage = field(default_factory=TokenUsage)
+    cost_today: Optional[CostEstimate] = None
+    cost_this_month: Optional[CostEstimate] = None
+    sessions_today: int = 0
+    sessions_this_month: int = 0
+    last_updated: Optional[datetime] = None
+    source: Optional[str] = None
+    billing_block: Optional[BillingBlock] = None
+    by_model: Mapping[str, TokenUsage] = field(default_factory=dict)
+    by_project: Mapping[str, TokenUsage] = field(default_factory=dict)
+    partial: bool = False
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "by_model", MappingProxyType(dict(self.by_model)))
+        object.__setattr__(self, "by_project", MappingProxyType(dict(self.by_project)))
+
+
 @dataclass
 class CreditsSnapshot:
     """Credits snapshot."""
@@ -163,6 +240,10 @@ class ClaudeCodeMetrics(AgentMetrics):
     cost_today: CostEstimate = field(default_factory=lambda: CostEstimate(0.0))
     cost_this_month: CostEstimate = field(default_factory=lambda: CostEstimate(0.0))
 
+    # Month breakdowns (model/project -> TokenUsage)
+    by_model: dict = field(default_factory=dict)
+    by_project: dict = field(default_factory=dict)
+
     # Stats metadata
     stats_last_updated: Optional[datetime] = None
 
@@ -171,6 +252,12 @@ class ClaudeCodeMetrics(AgentMetrics):
     rate_limits_source: Optional[str] = None
     rate_limits_error: Optional[str] = None
 
+    # Local 5-hour billing block (available offline)
+    billing_block: Optional[BillingBlock] = None
+
+    # Latest responses from running sessions (newest first)
+    recent_requests: List[RequestEvent] = field(default_factory=list)
+
 
 @dataclass
 class CodexMetrics(AgentMetrics):
@@ -1,9 +1,10 @@
 """Claude Code specific monitoring."""
 
 from datetime import datetime
-from typing import Optional
-from ..core.models import ClaudeCodeMetrics, CostEstimate, TokenUsage
+from typing import List, Optional
+from ..core.models import ClaudeCodeMetrics, RequestEvent, TokenUsage
 from ..core.constants import AgentType
+from ..parsers.claude_live import LiveRequestFeed
 from ..parsers.stats_parser import ClaudeStatsParser
 from ..parsers.claude_rate_limits import ClaudeRateLimitClient
 from .process import ProcessMonitor
@@ -21,6 +22,7 @@ class ClaudeCodeMonitor:
         """
         self.process_monitor = ProcessMonitor()
         self.stats_parser = ClaudeStatsParser(stats_file)
+        self.request_feed = LiveRequestFeed(self.stats_parser)
         self.rate_limit_client = ClaudeRateLimitClient(cache_ttl_seconds=60)
         self.agent_type = AgentType.CLAUDE_CODE
 
@@ -35,10 +37,8 @@ class ClaudeCodeMonitor:
         processes = self.process_monitor.find_agent_processes(self.agent_type)
         is_active = len(processes) > 0
 
-        # Get usage data from stats
-        today_usage = self.stats_parser.get_today_usage()
-        month_usage = self.stats_parser.get_month_usage()
-        stats_last_updated = self.stats_parser.get_stats_last_updated()
+        # One snapshot per refresh keeps every figure from the same sync
+        usage = self.stats_parser.get_snapshot()
 
         # Determine active sessions based on running processes
         # If Claude Code is running, assume at least 1 active session
@@ -60,21 +60,41 @@ class ClaudeCodeMonitor:
             last_active=datetime.now() if is_active else None,
             # Session info (use process-based detection for active sessions)
             active_sessions=active_sessions,
-            total_sessions_today=today_usage["total_sessions"],
+            total_sessions_today=usage.sessions_today,
             # Token usage
-            tokens_today=today_usage["tokens"],
-            tokens_this_month=month_usage["tokens"],
+            tokens_today=usage.tokens_today,
+            tokens_this_month=usage.tokens_this_month,
             # Costs
-            cost_today=CostEstimate(today_usage["cost"]),
-            cost_this_month=CostEstimate(month_usage["cost"]),
-            stats_last_updated=stats_last_updated,
+            cost_today=usage.cost_today,
+            cost_this_month=usage.cost_this_month,
+            by_model=usage.by_model,
+            by_project=usage.by_project,
+            stats_last_updated=usage.last_updated,
             rate_limits=rate_limits,
             rate_limits_source=rate_limits_source,
             rate_limits_error=rate_limits_error,
+            billing_block=usage.billing_block,
+            recent_requests=self.request_feed.recent(),
         )
 
         return metrics
 
+    def poll_requests(self, discover: bool = True) -> List[RequestEvent]:
+        """
+        Read responses appended to running sessions since the last poll.
+
+        Cheap enough to call several times a second, between full refreshes.
+        ``get_metrics`` does not poll, so this is the feed's only reader.
+
+        Args:
+            discover: Also re-list the session logs when due; False when the
+                caller runs ``request_feed.discover`` in the background
+
+        Returns:
+            New events in log order
+        """
+        return self.request_feed.poll(discover=discover)
+
     def get_process_summary(self) -> str:
         """
         Get a human-readable summary of processes.
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional
 
 from ..core.constants import AgentType
-from ..core.models import CodexMetrics, TokenUsage
+from ..core.models import CodexMetrics
 from ..parsers.codex_rate_limits import CodexRateLimitClient
 from ..parsers.codex_stats import CodexStatsParser
 from .process import ProcessMonitor
@@ -39,29 +39,20 @@ class CodexMonitor:
         processes = self.process_monitor.find_agent_processes(self.agent_type)
         is_active = len(processes) > 0
 
-        today_usage = self.stats_parser.get_today_usage()
-        month_usage = self.stats_parser.get_month_usage()
-        rate_limits = self.rate_limit_client.get_rate_limits()
+        # One snapshot per refresh keeps today and month from the same scan
+        usage = self.stats_parser.get_snapshot()
 
-        tokens_today = today_usage["tokens"] if today_usage else TokenUsage()
-        tokens_this_month = month_usage["tokens"] if month_usage else TokenUsage()
-        # Cost is intentionally not shown for Codex local logs.
-        cost_today = None
-        cost_this_month = None
-        total_sessions_today = today_usage["total_sessions"] if today_usage else 0
-
-        usage_source = None
-        if today_usage and today_usage.get("source"):
-            usage_source = today_usage["source"]
-        elif month_usage and month_usage.get("source"):
-            usage_source = month_usage["source"]
-
-        rate_limits_source = None
+        # Quota logged by Codex itself needs no network round trip; the
+        # /usage API is only asked when no rollout records one.
+        rate_limits = self.stats_parser.get_rate_limits()
+        rate_limits_source = "local" if rate_limits else None
         rate_limits_error = None
-        if rate_limits:
-            rate_limits_source = "api"
-        else:
-            rate_limits_error = self.rate_limit_client.last_error
+        if not rate_limits:
+            rate_limits = self.rate_limit_client.get_rate_limits()
+            if rate_limits:
+                rate_limits_source = "api"
+            else:
+                rate_limits_error = self.rate_limit_client.last_error
 
         # Determine active sessions based on running processes
         active_sessions = len(processes) if is_active else 0
@@ -72,12 +63,13 @@ class CodexMonitor:
             is_active=is_active,
             last_active=datetime.now() if is_active else None,
             active_sessions=active_sessions,
-            total_sessions_today=total_sessions_today,
-            tokens_today=tokens_today,
-            tokens_this_month=tokens_this_month,
-            cost_today=cost_today,
-            cost_this_month=cost_this_month,
-            usage_source=usage_source,
+            total_sessions_today=usage.sessions_today,
+            tokens_today=usage.tokens_today,
+            tokens_this_month=usage.tokens_this_month,
+            # Cost is intentionally not shown for Codex local logs.
+            cost_today=None,
+            cost_this_month=None,
+            usage_source=usage.source,
             rate_limits=rate_limits,
             rate_limits_source=rate_limits_source,
             rate_limits_error=rate_limits_error,
@@ -0,0 +1,106 @@
+"""Rolling 5-hour billing blocks reconstructed from local usage entries."""
+
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from ..core.models import BillingBlock, TokenUsage
+
+BLOCK_HOURS = 5
+
+
+@dataclass(order=True)
+class BlockEntry:
+    """One usage entry as seen by the block engine."""
+
+    timestamp: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_write_tokens: int = 0
+    cache_read_tokens: int = 0
+    cost: float = 0.0
+
+
+class BillingBlockTracker:
+    """
+    Group usage entries into billing blocks anchored at their first request.
+
+    A block starts at the first entry after the previous block ended and covers
+    the next ``block_hours``. Only the entries of the current block are kept, in
+    a time-ordered ring, and its totals are updated as entries arrive, so
+    feeding a tick's new entries costs O(new entries). Entries older than the
+    current block are ignored.
+    """
+
+    def __init__(self, block_hours: int = BLOCK_HOURS):
+        """
+        Initialize tracker.
+
+        Args:
+            block_hours: Length of a billing block in hours
+        """
+        self.block_seconds = block_hours * 3600
+        self._ring: List[BlockEntry] = []
+        self._block_start: Optional[float] = None
+        self._tokens = TokenUsage()
+        self._cost = 0.0
+
+    def add(self, entries: Iterable[BlockEntry]) -> None:
+        """Feed new entries; they may arrive in any order."""
+        for entry in sorted(entries):
+            self._add(entry)
+
+    def reset(self) -> None:
+        """Forget every entry (e.g. before re-seeding from a rebuilt index)."""
+        self._ring.clear()
+        self._block_start = None
+        self._tokens = TokenUsage()
+        self._cost = 0.0
+
+    def active_block(self, now: Optional[datetime] = None) -> Optional[BillingBlock]:
+        """
+        Return the block containing ``now`` (default: the current time).
+
+        Returns:
+            The active block, or None if no block is running
+        """
+        if self._block_start is None:
+            return None
+        now_ts = (now or datetime.now()).timestamp()
+        end = self._block_start + self.block_seconds
+        if not self._block_start <= now_ts < end:
+            return None
+        return BillingBlock(
+            start=datetime.fromtimestamp(self._block_start),
+            end=datetime.fromtimestamp(end),
+            tokens=TokenUsage(
+                input_tokens=self._tokens.input_tokens,
+                output_tokens=self._tokens.output_tokens,
+                cache_write_tokens=self._tokens.cache_write_tokens,
+                cache_read_tokens=self._tokens.cache_read_tokens,
+            ),
+            cost=self._cost,
+            entry_count=len(self._ring),
+            last_entry_at=datetime.fromtimestamp(self._ring[-1].timestamp),
+        )
+
+    def _add(self, entry: BlockEntry) -> None:
+        start = self._block_start
+        if start is not None and entry.timestamp < start:
+            return
+        if start is None or entry.timestamp >= start + self.block_seconds:
+            self.reset()
+            self._block_start = entry.timestamp
+
+        if self._ring and entry.timestamp < self._ring[-1].timestamp:
+            bisect.insort(self._ring, entry)
+        else:
+            self._ring.append(entry)
+        self._tokens.input_tokens += entry.input_tokens
+        self._tokens.output_tokens += entry.output_tokens
+        self._tokens.cache_write_tokens += entry.cache_write_tokens
+        self._tokens.cache_read_tokens += entry.cache_read_tokens
+        self._cost += entry.cost
@@ -0,0 +1,528 @@
+"""Persistent SQLite index of parsed Claude Code usage."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..core.models import TokenUsage
+from .file_cursor import FileCursor
+
+# Bump whenever the table layout changes; older indexes are rebuilt from the logs.
+SCHEMA_VERSION = 6
+
+# How long to wait for another agentop instance to release the database lock
+# before giving up until the next refresh.
+BUSY_TIMEOUT_SECONDS = 1.0
+
+_BUSY_ERROR_CODES = {
+    getattr(sqlite3, "SQLITE_BUSY", 5),
+    getattr(sqlite3, "SQLITE_LOCKED", 6),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    fingerprint INTEGER NOT NULL DEFAULT 0,
+    fingerprint_offset INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    chain INTEGER PRIMARY KEY,
+    path_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_path ON fingerprints(path_id);
+CREATE TABLE IF NOT EXISTS prefix_sources (
+    path_id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS prefix_sources_source ON prefix_sources(source_id);
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    UNIQUE (kind, value)
+);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY,
+    dedup_key INTEGER UNIQUE,
+    path_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    session_ref INTEGER,
+    model_id INTEGER,
+    project_id INTEGER,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_write_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    cost_usd REAL
+);
+CREATE INDEX IF NOT EXISTS usage_day ON usage(day);
+CREATE INDEX IF NOT EXISTS usage_path ON usage(path_id);
+CREATE TABLE IF NOT EXISTS archives (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_usage (
+    id INTEGER PRIMARY KEY,
+    dedup_key INTEGER,
+    path_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    session_ref INTEGER,
+    model_id INTEGER,
+    project_id INTEGER,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_write_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    cost_usd REAL
+);
+CREATE INDEX IF NOT EXISTS archive_usage_path ON archive_usage(path_id);
+"""
+
+
+@dataclass
+class UsageRow:
+    """A single parsed usage record as stored in the index."""
+
+    dedup_key: Optional[int]
+    path: str
+    day: date
+    timestamp: float
+    session_id: Optional[str]
+    model: Optional[str]
+    input_tokens: int
+    output_tokens: int
+    cache_write_tokens: int
+    cache_read_tokens: int
+    cost_usd: Optional[float]
+    project: Optional[str] = None
+
+
+# Breakdown dimensions and the dictionary-encoded usage column backing each.
+DIMENSIONS = {"model": "model_id", "project": "project_id", "session": "session_ref"}
+
+_ROW_COLUMNS = (
+    "dedup_key, path_id, day, timestamp, session_ref, model_id, input_tokens, "
+    "output_tokens, cache_write_tokens, cache_read_tokens, cost_usd, project_id"
+)
+_AGGREGATES = (
+    "COALESCE(SUM(input_tokens), 0), COALESCE(SUM(output_tokens), 0), "
+    "COALESCE(SUM(cache_write_tokens), 0), COALESCE(SUM(cache_read_tokens), 0), "
+    "COALESCE(SUM(cost_usd), 0.0), COUNT(cost_usd), COUNT(DISTINCT session_ref)"
+)
+
+
+def is_busy_error(exc: sqlite3.Error) -> bool:
+    """Whether an SQLite error means the database is locked by another connection."""
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None:
+        # Extended result codes keep the primary code in the low byte.
+        return code & 0xFF in _BUSY_ERROR_CODES
+    message = str(exc).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+class ClaudeUsageIndex:
+    """
+    SQLite-backed store of Claude usage rows and per-file scan cursors.
+
+    Paths, session ids, models and projects are dictionary-encoded: each
+    distinct string is stored once in ``names`` and rows refer to it by id.
+    Compressed archives also keep every parsed row in ``archive_usage``, which
+    survives ``clear``, so a rebuild never decompresses an unchanged archive.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        """
+        Initialize index.
+
+        Args:
+            cache_path: Path to database file (default: ~/.cache/agentop/claude-usage.sqlite)
+        """
+        if cache_path:
+            self.cache_path = cache_path
+        else:
+            self.cache_path = Path.home() / ".cache/agentop/claude-usage.sqlite"
+
+        self.in_memory = False
+        self._conn = self._connect()
+        # (kind, value) -> id, loaded on first use and dropped on rollback.
+        self._name_ids: Optional[Dict[Tuple[str, str], int]] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the on-disk database, falling back to memory if it is unusable."""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.cache_path), isolation_level=None, timeout=BUSY_TIMEOUT_SECONDS
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._ensure_schema(conn)
+            return conn
+        except (OSError, sqlite3.Error):
+            return self._connect_memory()
+
+    def _connect_memory(self) -> sqlite3.Connection:
+        self.in_memory = True
+        conn = sqlite3.connect(":memory:", isolation_level=None)
+        self._ensure_schema(conn)
+        return conn
+
+    def reset(self, in_memory: bool = False) -> None:
+        """
+        Replace the database with an empty one, for when it cannot be used any more.
+
+        Args:
+            in_memory: Keep the new index in memory instead of recreating the file
+        """
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+        self._name_ids = None
+        if in_memory:
+            self._conn = self._connect_memory()
+            return
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(f"{self.cache_path}{suffix}")
+            except OSError:
+                pass
+        self._conn = self._connect()
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS files")
+            conn.execute("DROP TABLE IF EXISTS usage")
+            conn.execute("DROP TABLE IF EXISTS names")
+            conn.execute("DROP TABLE IF EXISTS archives")
+            conn.execute("DROP TABLE IF EXISTS archive_usage")
+            conn.execute("DROP TABLE IF EXISTS fingerprints")
+            conn.execute("DROP TABLE IF EXISTS prefix_sources")
+        conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run a block of reads and writes atomically."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            self._name_ids = None
+            raise
+        self._conn.execute("COMMIT")
+
+    def load_cursors(self) -> Dict[str, FileCursor]:
+        """Return the stored scan cursor for every indexed file."""
+        rows = self._conn.execute(
+            "SELECT path, device, inode, size, mtime_ns, offset, fingerprint, "
+            "fingerprint_offset FROM files"
+        )
+        return {
+            row[0]: FileCursor(
+                device=row[1],
+                inode=row[2],
+                size=row[3],
+                mtime_ns=row[4],
+                offset=row[5],
+                fingerprint=row[6],
+                fingerprint_offset=row[7],
+            )
+            for row in rows
+        }
+
+    def is_empty(self) -> bool:
+        """Whether no file has been indexed yet."""
+        return self._conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def save_cursor(self, path: str, cursor: FileCursor) -> None:
+        """Persist the scan cursor for a file."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, device, inode, size, mtime_ns, offset, "
+            "fingerprint, fingerprint_offset) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                cursor.device,
+                cursor.inode,
+                cursor.size,
+                cursor.mtime_ns,
+                cursor.offset,
+                cursor.fingerprint,
+                cursor.fingerprint_offset,
+            ),
+        )
+
+    def add_fingerprints(self, path: str, chains: Iterable[int]) -> None:
+        """Record block fingerprints of content ingested from ``path``."""
+        path_id = self._name_id("path", path)
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO fingerprints (chain, path_id) VALUES (?, ?)",
+            ((chain, path_id) for chain in chains),
+        )
+
+    def has_fingerprint(self, chain: int) -> bool:
+        """Whether a block fingerprint was recorded from any ingested file."""
+        row = self._conn.execute(
+            "SELECT 1 FROM fingerprints WHERE chain = ?", (chain,)
+        ).fetchone()
+        return row is not None
+
+    def fingerprint_owner(self, chain: int) -> Optional[str]:
+        """Return the file a block fingerprint was first recorded from."""
+        row = self._conn.execute(
+            "SELECT names.value FROM fingerprints JOIN names ON names.id = fingerprints.path_id "
+            "WHERE chain = ?",
+            (chain,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_prefix_source(self, path: str, source: str) -> None:
+        """Record that ``path`` skipped a prefix already ingested from ``source``."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO prefix_sources (path_id, source_id) VALUES (?, ?)",
+            (self._name_id("path", path), self._name_id("path", source)),
+        )
+
+    def forget_file(self, path: str) -> List[str]:
+        """
+        Drop a file's rows, cursor and fingerprints, e.g. after it was removed or rewritten.
+
+        Returns:
+            Files whose skipped prefix was copied from ``path``; their copies of
+            its history were never stored, so they must be forgotten and read again
+        """
+        path_id = self._name_id("path", path)
+        dependents = [
+            value
+            for (value,) in self._conn.execute(
+                "SELECT names.value FROM prefix_sources "
+                "JOIN names ON names.id = prefix_sources.path_id WHERE source_id = ?",
+                (path_id,),
+            )
+        ]
+        self._conn.execute("DELETE FROM usage WHERE path_id = ?", (path_id,))
+        self._conn.execute("DELETE FROM fingerprints WHERE path_id = ?", (path_id,))
+        self._conn.execute(
+            "DELETE FROM prefix_sources WHERE path_id = ? OR source_id = ?", (path_id, path_id)
+        )
+        self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        return dependents
+
+    def add_rows(self, rows: Iterable[UsageRow]) -> None:
+        """Insert usage rows, ignoring rows whose dedup key is already indexed."""
+        self._insert_rows("INSERT OR IGNORE INTO usage", rows)
+
+    def archive_rows(self, path: str, size: int, mtime_ns: int) -> Optional[List[UsageRow]]:
+        """
+        Return the stored rows of an archive parsed earlier.
+
+        Returns:
+            Rows in file order, or None if the archive is new or has changed
+        """
+        row = self._conn.execute(
+            "SELECT size, mtime_ns FROM archives WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+        path_id = self._name_id("path", path)
+        return list(
+            self._decode_rows(
+                self._conn.execute(
+                    f"SELECT {_ROW_COLUMNS} FROM archive_usage WHERE path_id = ? ORDER BY id",
+                    (path_id,),
+                ).fetchall()
+            )
+        )
+
+    def store_archive(self, path: str, size: int, mtime_ns: int, rows: List[UsageRow]) -> None:
+        """Keep every parsed row of an archive, before cross-file deduplication."""
+        self._conn.execute(
+            "DELETE FROM archive_usage WHERE path_id = ?", (self._name_id("path", path),)
+        )
+        self._insert_rows("INSERT INTO archive_usage", rows)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO archives (path, size, mtime_ns) VALUES (?, ?, ?)",
+            (path, size, mtime_ns),
+        )
+
+    def retain_archives(self, paths: Set[str]) -> None:
+        """Drop stored rows of archives that no longer exist."""
+        stale = [
+            path
+            for (path,) in self._conn.execute("SELECT path FROM archives").fetchall()
+            if path not in paths
+        ]
+        for path in stale:
+            self._conn.execute(
+                "DELETE FROM archive_usage WHERE path_id = ?", (self._name_id("path", path),)
+            )
+            self._conn.execute("DELETE FROM archives WHERE path = ?", (path,))
+
+    def _insert_rows(self, statement: str, rows: Iterable[UsageRow]) -> None:
+        name_id = self._name_id
+        self._conn.executemany(
+            f"{statement} ({_ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    row.dedup_key,
+                    name_id("path", row.path),
+                    row.day.isoformat(),
+                    row.timestamp,
+                    name_id("session", row.session_id),
+                    name_id("model", row.model),
+                    row.input_tokens,
+                    row.output_tokens,
+                    row.cache_write_tokens,
+                    row.cache_read_tokens,
+                    row.cost_usd,
+                    name_id("project", row.project),
+                )
+                for row in rows
+            ),
+        )
+
+    def _name_id(self, kind: str, value: Optional[str]) -> Optional[int]:
+        """Return the dictionary id for a string, assigning one if it is new."""
+        if value is None:
+            return None
+        if self._name_ids is None:
+            self._name_ids = {
+                (row_kind, row_value): name_id
+                for name_id, row_kind, row_value in self._conn.execute(
+                    "SELECT id, kind, value FROM names"
+                )
+            }
+        name_id = self._name_ids.get((kind, value))
+        if name_id is None:
+            name_id = self._conn.execute(
+                "INSERT INTO names (kind, value) VALUES (?, ?)", (kind, value)
+            ).lastrowid
+            self._name_ids[(kind, value)] = name_id
+        return name_id
+
+    def _names_by_id(self) -> Dict[int, str]:
+        return {
+            name_id: value
+            for name_id, value in self._conn.execute("SELECT id, value FROM names")
+        }
+
+    def dedup_keys_since(self, start: date) -> Iterator[Tuple[int, date]]:
+        """Yield (dedup key, day) for every keyed row on or after ``start``."""
+        rows = self._conn.execute(
+            "SELECT dedup_key, day FROM usage WHERE day >= ? AND dedup_key IS NOT NULL",
+            (start.isoformat(),),
+        )
+        for key, day in rows:
+            yield key, date.fromisoformat(day)
+
+    def entries_since(self, timestamp: float) -> Iterator[UsageRow]:
+        """Yield rows with an entry timestamp at or after ``timestamp``, oldest first."""
+        start_day = datetime.fromtimestamp(timestamp).date() - timedelta(days=1)
+        rows = self._conn.execute(
+            f"SELECT {_ROW_COLUMNS} FROM usage "
+            "WHERE day >= ? AND timestamp >= ? ORDER BY timestamp",
+            (start_day.isoformat(), timestamp),
+        ).fetchall()
+        return self._decode_rows(rows)
+
+    def _decode_rows(self, rows: List[Tuple[Any, ...]]) -> Iterator[UsageRow]:
+        names = self._names_by_id() if rows else {}
+        for row in rows:
+            yield UsageRow(
+                dedup_key=row[0],
+                path=names.get(row[1], ""),
+                day=date.fromisoformat(row[2]),
+                timestamp=row[3],
+                session_id=names.get(row[4]),
+                model=names.get(row[5]),
+                input_tokens=row[6],
+                output_tokens=row[7],
+                cache_write_tokens=row[8],
+                cache_read_tokens=row[9],
+                cost_usd=row[10],
+                project=names.get(row[11]),
+            )
+
+    def clear(self) -> None:
+        """Drop all indexed rows and cursors (force full re-scan); archive rows are kept."""
+        self._conn.execute("DELETE FROM usage")
+        self._conn.execute("DELETE FROM files")
+        self._conn.execute("DELETE FROM fingerprints")
+        self._conn.execute("DELETE FROM prefix_sources")
+
+    def usage_between(self, start: date, end: date) -> Dict[str, Any]:
+        """
+        Aggregate usage for days in [start, end).
+
+        Returns:
+            Dictionary with tokens, cost, cost_seen and distinct session count
+        """
+        row = self._conn.execute(
+            f"SELECT {_AGGREGATES} FROM usage WHERE day >= ? AND day < ?",
+            (start.isoformat(), end.isoformat()),
+        ).fetchone()
+        return _bucket(row)
+
+    def usage_by(self, dimension: str, start: date, end: date) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate usage for days in [start, end), grouped by one dimension.
+
+        Args:
+            dimension: One of ``DIMENSIONS`` ("model", "project" or "session")
+            start: First day included
+            end: First day excluded
+
+        Returns:
+            Buckets shaped like ``usage_between`` keyed by name; rows without a
+            value for the dimension are grouped under "unknown"
+        """
+        column = DIMENSIONS[dimension]
+        rows = self._conn.execute(
+            f"SELECT {column}, {_AGGREGATES} FROM usage "
+            f"WHERE day >= ? AND day < ? GROUP BY {column}",
+            (start.isoformat(), end.isoformat()),
+        ).fetchall()
+        names = self._names_by_id() if rows else {}
+        return {names.get(row[0], "unknown"): _bucket(row[1:]) for row in rows}
+
+    def last_updated(self) -> Optional[datetime]:
+        """Return the newest modification time among indexed files."""
+        row = self._conn.execute("SELECT MAX(mtime_ns) FROM files").fetchone()
+        if not row or row[0] is None:
+            return None
+        return datetime.fromtimestamp(row[0] / 1_000_000_000)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+def _bucket(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    return {
+        "tokens": TokenUsage(
+            input_tokens=row[0],
+            output_tokens=row[1],
+            cache_write_tokens=row[2],
+            cache_read_tokens=row[3],
+        ),
+        "cost": row[4],
+        "cost_seen": row[5] > 0,
+        "sessions": row[6],
+    }
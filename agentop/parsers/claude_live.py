@@ -0,0 +1,207 @@
+"""Live per-request feed tailed from the logs of running Claude Code sessions."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ..core.models import RequestEvent, TokenUsage
+from .compressed_logs import is_archive
+from .dedup_index import DedupIndex
+from .jsonl_scanner import JsonlScanner
+from .stats_parser import _USAGE_MARKER, ClaudeStatsParser, _project_of
+
+# A session whose log changed this recently is considered running.
+DEFAULT_ACTIVE_SECONDS = 10 * 60
+
+# How often the log directories are re-listed to pick up new or revived sessions.
+DEFAULT_DISCOVER_SECONDS = 5.0
+
+DEFAULT_HISTORY = 50
+
+
+@dataclass
+class _Tail:
+    """Read position and last response time of one followed log."""
+
+    offset: int
+    session_id: Optional[str]
+    project: Optional[str]
+    last_timestamp: Optional[float] = None
+
+
+class LiveRequestFeed:
+    """
+    Follow the logs of running sessions and turn appended responses into events.
+
+    Files are discovered by listing the usage directories every
+    ``discover_seconds``, either from :meth:`poll` or by calling
+    :meth:`discover` on another thread; only files modified in the last
+    ``active_seconds`` are followed. Files present at the first listing are
+    followed from their end, since their history is already in the aggregates;
+    later files from the size they had when last listed (0 for new files).
+    Between discoveries a poll only stats the followed files and reads the bytes appended since the last
+    poll, so its cost is proportional to new output rather than history.
+    """
+
+    def __init__(
+        self,
+        parser: ClaudeStatsParser,
+        active_seconds: float = DEFAULT_ACTIVE_SECONDS,
+        discover_seconds: float = DEFAULT_DISCOVER_SECONDS,
+        history: int = DEFAULT_HISTORY,
+    ):
+        """
+        Initialize feed.
+
+        Args:
+            parser: Parser whose usage directories and line decoding are reused
+            active_seconds: Follow logs modified within this many seconds
+            discover_seconds: Re-list the usage directories this often
+            history: Number of recent events kept for display
+        """
+        self.parser = parser
+        self.active_seconds = active_seconds
+        self.discover_seconds = discover_seconds
+        self._tails: Dict[str, _Tail] = {}
+        self._recent: Deque[RequestEvent] = deque(maxlen=history)
+        self._seen = DedupIndex()
+        self._buffer = bytearray()
+        self._last_discover: Optional[float] = None
+        # Size of every listed file at the last discovery (None before the first).
+        self._listed: Optional[Dict[str, int]] = None
+        # (path, size, mtime) of each log from a discovery the next poll has not applied.
+        self._pending: Optional[List[Tuple[str, int, float]]] = None
+        self._lock = threading.Lock()
+
+    def poll(self, discover: bool = True) -> List[RequestEvent]:
+        """
+        Read responses appended since the last poll.
+
+        Args:
+            discover: Re-list the usage directories here when due; pass False
+                when :meth:`discover` is scheduled elsewhere, e.g. on a worker thread
+
+        Returns:
+            New events in log order
+        """
+        if discover:
+            now = time.monotonic()
+            if self._last_discover is None or now - self._last_discover >= self.discover_seconds:
+                self.discover()
+                self._last_discover = now
+        self._apply_listing()
+
+        events: List[RequestEvent] = []
+        for path_key, tail in list(self._tails.items()):
+            try:
+                size = os.stat(path_key).st_size
+            except OSError:
+                del self._tails[path_key]
+                continue
+            if size < tail.offset:
+                # Rewritten in place: follow from the new end.
+                tail.offset = size
+            elif size > tail.offset:
+                events.extend(self._read(Path(path_key), tail, size))
+
+        self._recent.extend(events)
+        return events
+
+    def recent(self) -> List[RequestEvent]:
+        """Most recent events, newest first."""
+        return list(reversed(self._recent))
+
+    def discover(self) -> None:
+        """
+        List the usage directories and stat every log.
+
+        Only hands the listing over to the next poll, so it may run on a
+        thread other than the one polling.
+        """
+        listing = [
+            (str(file_path), stat_result.st_size, stat_result.st_mtime)
+            for file_path, stat_result in self.parser._stat_usage_files()
+            if not is_archive(file_path)
+        ]
+        with self._lock:
+            self._pending = listing
+
+    def _apply_listing(self) -> None:
+        with self._lock:
+            listing, self._pending = self._pending, None
+        if listing is None:
+            return
+
+        cutoff = time.time() - self.active_seconds
+        previous = self._listed
+        listed: Dict[str, int] = {}
+        active = set()
+        for path_key, size, mtime in listing:
+            listed[path_key] = size
+            if mtime < cutoff:
+                continue
+            active.add(path_key)
+            if path_key not in self._tails:
+                if previous is None:
+                    offset = size
+                else:
+                    offset = min(previous.get(path_key, 0), size)
+                file_path = Path(path_key)
+                self._tails[path_key] = _Tail(
+                    offset=offset,
+                    session_id=self.parser._extract_session_id(file_path),
+                    project=_project_of(file_path),
+                )
+        self._listed = listed
+        # Followed logs only append current responses; older keys cannot recur.
+        self._seen.expire_before(date.today() - timedelta(days=1))
+        for path_key in [key for key in self._tails if key not in active]:
+            del self._tails[path_key]
+
+    def _read(self, file_path: Path, tail: _Tail, size: int) -> List[RequestEvent]:
+        events: List[RequestEvent] = []
+        scanner = JsonlScanner(
+            file_path, tail.offset, size, marker=_USAGE_MARKER, buffer=self._buffer
+        )
+        try:
+            # Only whole lines are consumed; a half-written line waits for the next poll.
+            for raw, _, terminated in scanner:
+                if not terminated:
+                    break
+                line = raw.strip()
+                if not line:
+                    continue
+                entry = self.parser._parse_line(line, self._seen, tail.session_id)
+                if not entry:
+                    continue
+                latency = None
+                if tail.last_timestamp is not None:
+                    latency = max(0.0, entry.timestamp - tail.last_timestamp)
+                tail.last_timestamp = entry.timestamp
+                events.append(
+                    RequestEvent(
+                        timestamp=datetime.fromtimestamp(entry.timestamp),
+                        session_id=entry.session_id,
+                        project=tail.project,
+                        model=entry.model,
+                        tokens=TokenUsage(
+                            input_tokens=entry.input_tokens,
+                            output_tokens=entry.output_tokens,
+                            cache_write_tokens=entry.cache_write_tokens,
+                            cache_read_tokens=entry.cache_read_tokens,
+                        ),
+                        cost=entry.cost_usd or 0.0,
+                        latency_seconds=latency,
+                    )
+                )
+        except OSError:
+            pass
+        tail.offset = scanner.offset
+        return events
@@ -1,28 +1,76 @@
 """Parser for Claude Code session logs (JSONL format)."""
 
-import json
 import os
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, date
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from ..core.models import SessionData, TokenUsage, CostEstimate
 from ..core.constants import CLAUDE_PRICING, DEFAULT_CLAUDE_LOGS_DIR
+from .json_backend import get_decoder
+
+# Parsed sessions kept in memory; a session is reparsed only once it changes.
+DEFAULT_SESSION_CACHE_SIZE = 512
 
 
 class ClaudeLogParser:
     """Parse Claude Code JSONL session logs."""
 
-    def __init__(self, logs_dir: Optional[str] = None):
+    def __init__(
+        self, logs_dir: Optional[str] = None, cache_size: int = DEFAULT_SESSION_CACHE_SIZE
+    ):
         """
         Initialize parser.
 
         Args:
             logs_dir: Directory containing session logs (default: ~/.claude-code/sessions/)
+            cache_size: Maximum number of parsed sessions kept in memory
         """
         if logs_dir:
             self.logs_dir = Path(logs_dir).expanduser()
         else:
             self.logs_dir = Path(DEFAULT_CLAUDE_LOGS_DIR).expanduser()
+        self._decoder = get_decoder()
+        self.cache_size = cache_size
+        # LRU of parsed sessions by path; each entry remembers the (size, mtime)
+        # it was parsed at.
+        self._sessions: "OrderedDict[str, Tuple[int, int, SessionData]]" = OrderedDict()
+
+    def _scan_sessions(
+        self, target_date: Optional[date] = None
+    ) -> List[Tuple[Path, os.stat_result]]:
+        """
+        List session files with their stat results in one directory pass.
+
+        Args:
+            target_date: Keep only files last modified on this date
+
+        Returns:
+            (path, stat result) pairs, newest first
+        """
+        found = []
+        try:
+            with os.scandir(self.logs_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".jsonl"):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat_result = entry.stat()
+                    except OSError:
+                        continue
+                    if target_date:
+                        mtime = datetime.fromtimestamp(stat_result.st_mtime)
+                        if mtime.date() != target_date:
+                            continue
+                    found.append((Path(entry.path), stat_result))
+        except OSError:
+            return []
+
+        # Sort by modification time (newest first)
+        found.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        return found
 
     def list_session_files(self, target_date: Optional[date] = None) -> List[Path]:
         """
@@ -34,35 +82,44 @@ class ClaudeLogParser:
         Returns:
             List of Path objects for session files
         """
-        if not self.logs_dir.exists():
-            return []
-
-        session_files = []
-        for file_path in self.logs_dir.glob("*.jsonl"):
-            if target_date:
-                # Filter by file modification date
-                mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                if mtime.date() != target_date:
-                    continue
-            session_files.append(file_path)
-
-        # Sort by modification time (newest first)
-        session_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-        return session_files
+        return [file_path for file_path, _ in self._scan_sessions(target_date)]
 
-    def parse_session_file(self, file_path: Path) -> SessionData:
+    def parse_session_file(
+        self, file_path: Path, stat_result: Optional[os.stat_result] = None
+    ) -> SessionData:
         """
         Parse a single session JSONL file.
 
+        Results are cached by path and reused while the file keeps its size
+        and mtime, so the returned object is shared and must not be modified.
+
         Args:
             file_path: Path to the session file
+            stat_result: The file's stat result, if already known
 
         Returns:
             SessionData object with aggregated metrics
         """
+        if stat_result is None:
+            stat_result = file_path.stat()
+        key = str(file_path)
+        cached = self._sessions.get(key)
+        if cached is not None and cached[:2] == (stat_result.st_size, stat_result.st_mtime_ns):
+            self._sessions.move_to_end(key)
+            return cached[2]
+
+        session = self._parse_session(file_path, stat_result)
+        self._sessions[key] = (stat_result.st_size, stat_result.st_mtime_ns, session)
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.cache_size:
+            self._sessions.popitem(last=False)
+        return session
+
+    def _parse_session(self, file_path: Path, stat_result: os.stat_result) -> SessionData:
+        """Parse a session file without consulting the cache."""
         session_id = file_path.stem
-        start_time = datetime.fromtimestamp(file_path.stat().st_ctime)
-        end_time = datetime.fromtimestamp(file_path.stat().st_mtime)
+        start_time = datetime.fromtimestamp(stat_result.st_ctime)
+        end_time = datetime.fromtimestamp(stat_result.st_mtime)
 
         tokens = TokenUsage()
         cost = CostEstimate(0.0)
@@ -70,24 +127,18 @@ class ClaudeLogParser:
         model = None
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
+            with open(file_path, "rb") as f:
+                lines = (line.strip() for line in f)
+                for entry in self._decoder.iter_loads(line for line in lines if line):
+                    if not isinstance(entry, dict):
                         continue
+                    self._process_entry(entry, tokens, cost)
 
-                    try:
-                        entry = json.loads(line)
-                        self._process_entry(entry, tokens, cost)
-
-                        # Track model and message count
-                        if "model" in entry and not model:
-                            model = entry["model"]
-                        if entry.get("type") in ["request", "response"]:
-                            message_count += 1
-
-                    except json.JSONDecodeError:
-                        continue
+                    # Track model and message count
+                    if "model" in entry and not model:
+                        model = entry["model"]
+                    if entry.get("type") in ["request", "response"]:
+                        message_count += 1
 
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
@@ -168,15 +219,15 @@ class ClaudeLogParser:
             Dictionary with total tokens, cost, and session count
         """
         today = date.today()
-        session_files = self.list_session_files(target_date=today)
+        session_files = self._scan_sessions(target_date=today)
 
         total_tokens = TokenUsage()
         total_cost = 0.0
         session_count = len(session_files)
         active_sessions = 0
 
-        for file_path in session_files:
-            session = self.parse_session_file(file_path)
+        for file_path, stat_result in session_files:
+            session = self.parse_session_file(file_path, stat_result)
             total_tokens.input_tokens += session.tokens.input_tokens
             total_tokens.output_tokens += session.tokens.output_tokens
             total_cost += session.cost.amount
@@ -202,18 +253,18 @@ class ClaudeLogParser:
             Dictionary with total tokens and cost
         """
         today = date.today()
-        all_files = self.list_session_files()
+        all_files = self._scan_sessions()
 
         total_tokens = TokenUsage()
         total_cost = 0.0
 
-        for file_path in all_files:
+        for file_path, stat_result in all_files:
             # Check if file is from this month
-            mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
+            mtime = datetime.fromtimestamp(stat_result.st_mtime)
             if mtime.year != today.year or mtime.month != today.month:
                 continue
 
-            session = self.parse_session_file(file_path)
+            session = self.parse_session_file(file_path, stat_result)
             total_tokens.input_tokens += session.tokens.input_tokens
             total_tokens.output_tokens += session.tokens.output_tokens
             total_cost += session.cost.amount
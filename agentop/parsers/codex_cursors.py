@@ -0,0 +1,201 @@
+"""Persisted per-rollout ingestion state for incremental Codex log parsing."""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from ..core.models import TokenUsage
+from .file_cursor import FileCursor
+from .hyperloglog import HyperLogLog
+from .sidecar_journal import SidecarJournal
+
+# How a rollout reports usage, decided by the first usage-bearing line seen.
+MODE_TOKEN_COUNT = "token_count"
+MODE_GENERIC = "generic"
+
+
+def bucket_to_state(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a JSON-serializable copy of a day bucket."""
+    tokens = bucket["tokens"]
+    return {
+        "tokens": [
+            tokens.input_tokens,
+            tokens.output_tokens,
+            tokens.cache_write_tokens,
+            tokens.cache_read_tokens,
+        ],
+        "cost": bucket["cost"],
+        "cost_seen": bucket["cost_seen"],
+        "sessions": bucket["sessions"].to_state(),
+    }
+
+
+def bucket_from_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild a day bucket saved with ``bucket_to_state``."""
+    input_tokens, output_tokens, cache_write_tokens, cache_read_tokens = state["tokens"]
+    return {
+        "tokens": TokenUsage(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cache_write_tokens=cache_write_tokens,
+            cache_read_tokens=cache_read_tokens,
+        ),
+        "cost": state["cost"],
+        "cost_seen": state["cost_seen"],
+        "sessions": HyperLogLog.from_state(state["sessions"]),
+    }
+
+
+def _usage_to_state(usage: Optional[TokenUsage]) -> Optional[list]:
+    if usage is None:
+        return None
+    return [
+        usage.input_tokens,
+        usage.output_tokens,
+        usage.cache_write_tokens,
+        usage.cache_read_tokens,
+    ]
+
+
+def _usage_from_state(state: Optional[list]) -> Optional[TokenUsage]:
+    if state is None:
+        return None
+    input_tokens, output_tokens, cache_write_tokens, cache_read_tokens = state
+    return TokenUsage(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cache_write_tokens=cache_write_tokens,
+        cache_read_tokens=cache_read_tokens,
+    )
+
+
+@dataclass
+class CodexFileState:
+    """
+    Everything needed to continue parsing a rollout where the last scan stopped.
+
+    ``last_total`` is the most recent cumulative ``total_token_usage``, so the
+    next ``token_count`` event can be differenced without replaying the file;
+    ``buckets`` holds the file's usage so far, by day.
+    """
+
+    cursor: FileCursor
+    mode: Optional[str] = None
+    last_total: Optional[TokenUsage] = None
+    buckets: Dict[date, Dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def fresh(cls, stat_result: os.stat_result) -> "CodexFileState":
+        """State for a file that has not been read yet."""
+        return cls(cursor=FileCursor.from_stat(stat_result))
+
+    def reset(self, stat_result: os.stat_result) -> None:
+        """Start over from the beginning of a replaced or rewritten file."""
+        self.cursor = FileCursor.from_stat(stat_result)
+        self.mode = None
+        self.last_total = None
+        self.buckets = {}
+
+    def to_state(self) -> Dict[str, Any]:
+        """Return a JSON-serializable copy of the state."""
+        cursor = self.cursor
+        return {
+            "cursor": [cursor.device, cursor.inode, cursor.size, cursor.mtime_ns, cursor.offset],
+            "mode": self.mode,
+            "last_total": _usage_to_state(self.last_total),
+            "buckets": {
+                usage_date.isoformat(): bucket_to_state(bucket)
+                for usage_date, bucket in self.buckets.items()
+            },
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "CodexFileState":
+        """Rebuild a state saved with ``to_state``."""
+        device, inode, size, mtime_ns, offset = state["cursor"]
+        return cls(
+            cursor=FileCursor(device, inode, size, mtime_ns, offset),
+            mode=state.get("mode"),
+            last_total=_usage_from_state(state.get("last_total")),
+            buckets={
+                date.fromisoformat(day): bucket_from_state(bucket)
+                for day, bucket in state.get("buckets", {}).items()
+            },
+        )
+
+
+class CodexCursorStore:
+    """
+    Sidecar store of ``CodexFileState`` by rollout path.
+
+    States are decoded on first use of each path, and only the states that
+    changed are written back (see ``SidecarJournal``).
+    """
+
+    def __init__(self, store_path: Path):
+        """
+        Initialize store.
+
+        Args:
+            store_path: Path to the sidecar journal file
+        """
+        self.store_path = store_path
+        self._journal = SidecarJournal(store_path)
+        self._raw: Optional[Dict[str, Any]] = None
+        self._states: Dict[str, CodexFileState] = {}
+        self._changes: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """Saved states by path, loaded on first use."""
+        if self._raw is None:
+            self._raw = self._load()
+        return self._raw
+
+    def _load(self) -> Dict[str, Any]:
+        return self._journal.load()
+
+    def get(self, path: str) -> Optional[CodexFileState]:
+        """Return the state of a rollout, or None if it was never read."""
+        state = self._states.get(path)
+        if state is not None:
+            return state
+        saved = self.raw.get(path)
+        if not isinstance(saved, dict):
+            return None
+        try:
+            state = CodexFileState.from_state(saved)
+        except (KeyError, TypeError, ValueError):
+            return None
+        self._states[path] = state
+        return state
+
+    def put(self, path: str, state: CodexFileState) -> None:
+        """Record a rollout's state after a successful read."""
+        self._states[path] = state
+        saved = state.to_state()
+        self.raw[path] = saved
+        self._changes[path] = saved
+
+    def discard(self, path: str) -> None:
+        """Forget a rollout so it is read again from the start."""
+        self._states.pop(path, None)
+        if self.raw.pop(path, None) is not None:
+            self._changes[path] = None
+
+    def retain(self, paths: Set[str]) -> None:
+        """Forget rollouts that no longer exist."""
+        stale = [path for path in self.raw if path not in paths]
+        for path in stale:
+            self.discard(path)
+
+    def save(self) -> None:
+        """Write changed states to disk."""
+        if self._raw is None:
+            return
+        if self._journal.save(self._raw, self._changes):
+            self._changes = {}
@@ -4,7 +4,7 @@ import base64
 import json
 import os
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
@@ -13,6 +13,93 @@ import httpx
 from ..core.models import CreditsSnapshot, RateLimitSnapshot, RateLimitWindow
 
 
+def parse_log_rate_limits(
+    rate_limits: Any, observed_at: datetime, now: Optional[datetime] = None
+) -> Optional[RateLimitSnapshot]:
+    """
+    Build a snapshot from the ``rate_limits`` object of a rollout's token_count event.
+
+    Both the nested layout (``primary``/``secondary`` windows with
+    ``used_percent``, ``window_minutes`` and ``resets_at`` or
+    ``resets_in_seconds``) and the older flat ``primary_used_percent`` layout
+    are understood. Relative reset times count from ``observed_at``.
+
+    The event may be much older than ``now``. A window whose reset time has
+    passed is reported as unused. A window logged without a reset time tells
+    nothing once a whole window has passed, so such an event gives no snapshot.
+
+    Args:
+        rate_limits: ``payload.rate_limits`` of a token_count event
+        observed_at: When the event was logged
+        now: Time to report the quota at (default: now)
+
+    Returns:
+        Snapshot with ``captured_at`` set to ``observed_at``, or None if no
+        window could be read or the event is too old to trust
+    """
+    if not isinstance(rate_limits, dict):
+        return None
+    now = now or datetime.now()
+
+    windows = []
+    for name in ("primary", "secondary"):
+        window = rate_limits.get(name)
+        if not isinstance(window, dict):
+            window = {
+                key[len(name) + 1 :]: value
+                for key, value in rate_limits.items()
+                if key.startswith(name + "_")
+            }
+        parsed = _parse_log_window(window, observed_at)
+        if parsed is not None and parsed.resets_at is None:
+            if parsed.window_minutes is not None and (
+                observed_at + timedelta(minutes=parsed.window_minutes) <= now
+            ):
+                return None
+        elif parsed is not None and parsed.resets_at <= now:
+            # The window has rolled over since the event was logged.
+            parsed = RateLimitWindow(used_percent=0.0, window_minutes=parsed.window_minutes)
+        windows.append(parsed)
+
+    primary, secondary = windows
+    if primary is None and secondary is None:
+        return None
+    plan_type = rate_limits.get("plan_type")
+    return RateLimitSnapshot(
+        primary=primary,
+        secondary=secondary,
+        plan_type=plan_type if isinstance(plan_type, str) else None,
+        captured_at=observed_at,
+    )
+
+
+def _parse_log_window(window: Dict[str, Any], observed_at: datetime) -> Optional[RateLimitWindow]:
+    used_percent = window.get("used_percent")
+    if not isinstance(used_percent, (int, float)):
+        return None
+
+    window_minutes = window.get("window_minutes")
+    if not isinstance(window_minutes, (int, float)):
+        window_minutes = None
+
+    resets_at = None
+    reset_epoch = window.get("resets_at")
+    reset_after = window.get("resets_in_seconds", window.get("reset_after_seconds"))
+    try:
+        if isinstance(reset_epoch, (int, float)) and reset_epoch > 0:
+            resets_at = datetime.fromtimestamp(int(reset_epoch))
+        elif isinstance(reset_after, (int, float)):
+            resets_at = observed_at + timedelta(seconds=reset_after)
+    except (OverflowError, OSError, ValueError):
+        resets_at = None
+
+    return RateLimitWindow(
+        used_percent=float(used_percent),
+        window_minutes=int(window_minutes) if window_minutes is not None else None,
+        resets_at=resets_at,
+    )
+
+
 class CodexRateLimitClient:
     """Fetch Codex rate-limit usage from the backend /usage endpoint."""
 
@@ -1,13 +1,40 @@
 """Parser for OpenAI Codex usage stats and logs."""
 
-import json
+import hashlib
 import os
-from datetime import date, datetime
+import time
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from ..core.constants import DEFAULT_CODEX_LOGS_DIRS, DEFAULT_CODEX_STATS_FILES
-from ..core.models import CostEstimate, TokenUsage
+from ..core.models import CostEstimate, RateLimitSnapshot, TokenUsage, UsageSnapshot
+from .codex_cursors import (
+    MODE_GENERIC,
+    MODE_TOKEN_COUNT,
+    CodexCursorStore,
+    CodexFileState,
+    bucket_from_state,
+    bucket_to_state,
+)
+from .codex_rate_limits import parse_log_rate_limits
+from .date_partitions import ColdPartitions, PartitionFilter
+from .compressed_logs import ArchiveCache, archive_suffixes, is_archive, log_stem
+from .dir_listing import WalkStats, get_listing_cache
+from .file_cursor import CURSOR_RESET, CURSOR_UNCHANGED
+from .json_backend import get_decoder
+from .hyperloglog import HyperLogLog
+from .jsonl_scanner import JsonlScanner, ReverseJsonlScanner
+from .scan_planner import FileSpanIndex, PlanStats, ScanPlanner, TimeRange, TimeSpan
+from .timestamps import parse_iso_epoch
+
+_TOKEN_COUNT_MARKER = b'"token_count"'
+_RATE_LIMITS_MARKER = b'"rate_limits"'
+
+
+def _is_hidden_dir(path: Path) -> bool:
+    """Dot-directories (VCS metadata, caches) never hold rollouts."""
+    return path.name.startswith(".")
 
 
 class CodexStatsParser:
@@ -42,6 +69,57 @@ class CodexStatsParser:
         self._usage_cache: Optional[Dict[str, Any]] = None
         self._last_scan: Optional[datetime] = None
         self.cache_ttl_seconds = 5
+        self._decoder = get_decoder()
+        self._scan_buffer = bytearray()
+        self._planner = ScanPlanner(FileSpanIndex(self._sidecar_path("logs.spans")))
+        self._cached_range: Optional[TimeRange] = None
+        self._archives = ArchiveCache(self._sidecar_path("archives"))
+        self._cursors = CodexCursorStore(self._sidecar_path("cursors"))
+        self._cold_partitions = ColdPartitions(get_listing_cache())
+        self._newest_mtime_ns: Optional[int] = None
+        self._snapshot: Optional[UsageSnapshot] = None
+        self._snapshot_usage: Optional[Dict[str, Any]] = None
+        self.last_walk_stats = WalkStats()
+        # Newest plain rollout seen by the last walk, for the local quota source.
+        self._newest_log: Optional[Tuple[Path, os.stat_result]] = None
+        self._rate_limits_key: Optional[Tuple[str, int, int]] = None
+        self._rate_limits_event: Optional[Tuple[Dict[str, Any], datetime]] = None
+
+    def get_snapshot(self) -> UsageSnapshot:
+        """
+        Get today's and this month's usage from a single scan.
+
+        The snapshot is rebuilt only when a rescan produced new buckets, so
+        repeated calls within the cache TTL return the same object.
+
+        Returns:
+            Immutable snapshot of today and month figures (empty if no data)
+        """
+        usage = self._collect_usage(self._default_range())
+        if usage is None:
+            return UsageSnapshot(taken_at=datetime.now())
+        if self._snapshot is None or self._snapshot_usage is not usage:
+            today = date.today()
+            month_start = today.replace(day=1)
+            next_month = (month_start + timedelta(days=32)).replace(day=1)
+            today_usage = self._format_bucket(usage["buckets"].get(today), usage["source"])
+            month_usage = self._sum_buckets(usage, month_start, next_month)
+            last_updated = None
+            if self._newest_mtime_ns is not None:
+                last_updated = datetime.fromtimestamp(self._newest_mtime_ns / 1_000_000_000)
+            self._snapshot = UsageSnapshot(
+                taken_at=datetime.now(),
+                tokens_today=today_usage["tokens"],
+                tokens_this_month=month_usage["tokens"],
+                cost_today=today_usage["cost"],
+                cost_this_month=month_usage["cost"],
+                sessions_today=today_usage["total_sessions"],
+                sessions_this_month=month_usage["total_sessions"],
+                last_updated=last_updated,
+                source=usage["source"],
+            )
+            self._snapshot_usage = usage
+        return self._snapshot
 
     def get_today_usage(self) -> Optional[Dict[str, Any]]:
         """
@@ -50,11 +128,11 @@ class CodexStatsParser:
         Returns:
             Dictionary with tokens, cost, session count, and source, or None if no data
         """
-        usage = self._collect_usage()
+        today = date.today()
+        usage = self._collect_usage(self._default_range())
         if usage is None:
             return None
 
-        today = date.today()
         bucket = usage["buckets"].get(today)
         return self._format_bucket(bucket, usage["source"])
 
@@ -65,24 +143,44 @@ class CodexStatsParser:
         Returns:
             Dictionary with tokens, cost, and source, or None if no data
         """
-        usage = self._collect_usage()
+        month_start = date.today().replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        return self.get_usage_between(month_start, next_month)
+
+    def get_usage_between(
+        self, start: date, end: Optional[date] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get usage for an arbitrary window of days.
+
+        Args:
+            start: First day to include
+            end: Day after the last one to include (default: no upper bound)
+
+        Returns:
+            Dictionary with tokens, cost, session count, and source, or None if no data
+        """
+        usage = self._collect_usage(self._scan_range(start, end))
         if usage is None:
             return None
+        return self._sum_buckets(usage, start, end)
 
-        today = date.today()
+    def _sum_buckets(
+        self, usage: Dict[str, Any], start: date, end: Optional[date]
+    ) -> Dict[str, Any]:
         total_tokens = TokenUsage()
         total_cost = 0.0
         cost_seen = False
-        total_sessions = 0
+        sessions = HyperLogLog()
 
         for usage_date, bucket in usage["buckets"].items():
-            if usage_date.year != today.year or usage_date.month != today.month:
+            if usage_date < start or (end is not None and usage_date >= end):
                 continue
             total_tokens.input_tokens += bucket["tokens"].input_tokens
             total_tokens.output_tokens += bucket["tokens"].output_tokens
             total_tokens.cache_write_tokens += bucket["tokens"].cache_write_tokens
             total_tokens.cache_read_tokens += bucket["tokens"].cache_read_tokens
-            total_sessions += len(bucket["sessions"])
+            sessions.merge(bucket["sessions"])
             if bucket["cost_seen"]:
                 total_cost += bucket["cost"]
                 cost_seen = True
@@ -90,12 +188,89 @@ class CodexStatsParser:
         return {
             "tokens": total_tokens,
             "cost": CostEstimate(total_cost) if cost_seen else None,
-            "total_sessions": total_sessions,
+            "total_sessions": len(sessions),
             "source": usage["source"],
         }
 
-    def _collect_usage(self) -> Optional[Dict[str, Any]]:
-        if self._usage_cache is not None and self._last_scan:
+    def get_rate_limits(self, now: Optional[datetime] = None) -> Optional[RateLimitSnapshot]:
+        """
+        Get the newest quota snapshot recorded in the local rollouts.
+
+        Codex logs a ``rate_limits`` object alongside its token_count events.
+        The most recently modified rollout is read backwards to its last one,
+        which is reused until that file changes, so this needs no network
+        access. The logged windows are checked against ``now`` on every call,
+        so a window that resets while Codex sits idle is reported as reset.
+
+        Args:
+            now: Time to report the quota at (default: now)
+
+        Returns:
+            Snapshot as of the logged event, or None if no rollout records one
+            that can still be trusted
+        """
+        self._collect_usage(self._default_range())
+        if self._newest_log is None:
+            return None
+        file_path, stat_result = self._newest_log
+        key = (str(file_path), stat_result.st_size, stat_result.st_mtime_ns)
+        if key != self._rate_limits_key:
+            self._rate_limits_event = self._read_rate_limits(file_path, stat_result)
+            self._rate_limits_key = key
+        if self._rate_limits_event is None:
+            return None
+        rate_limits, observed_at = self._rate_limits_event
+        return parse_log_rate_limits(rate_limits, observed_at, now)
+
+    def _read_rate_limits(
+        self, file_path: Path, stat_result: os.stat_result
+    ) -> Optional[Tuple[Dict[str, Any], datetime]]:
+        """Find the last token_count event of a rollout with readable rate limits."""
+        try:
+            for raw, _ in ReverseJsonlScanner(
+                file_path, end=stat_result.st_size, marker=_RATE_LIMITS_MARKER
+            ):
+                try:
+                    entry = self._decoder.loads(raw.strip())
+                except ValueError:
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                payload = entry.get("payload")
+                if not isinstance(payload, dict) or payload.get("type") != "token_count":
+                    continue
+                rate_limits = payload.get("rate_limits")
+                epoch = None
+                timestamp = entry.get("timestamp")
+                if isinstance(timestamp, str):
+                    epoch = parse_iso_epoch(timestamp)
+                observed_at = datetime.fromtimestamp(
+                    epoch if epoch is not None else stat_result.st_mtime
+                )
+                if parse_log_rate_limits(rate_limits, observed_at, observed_at) is not None:
+                    return rate_limits, observed_at
+        except OSError:
+            return None
+        return None
+
+    @property
+    def last_plan_stats(self) -> PlanStats:
+        """Files and bytes the most recent scan skipped as outside its time range."""
+        return self._planner.last_plan_stats
+
+    def _default_range(self) -> TimeRange:
+        # Today and this month are both answered from one scan of the month.
+        month_start = date.today().replace(day=1)
+        return self._scan_range(month_start, (month_start + timedelta(days=32)).replace(day=1))
+
+    def _scan_range(self, start: date, end: Optional[date]) -> TimeRange:
+        # Entry dates are taken from UTC timestamps while file times are local, so
+        # pad the window by a day on each side to keep boundary files.
+        return TimeRange.days(start - timedelta(days=1), end + timedelta(days=1) if end else None)
+
+    def _collect_usage(self, time_range: TimeRange) -> Optional[Dict[str, Any]]:
+        cache_fits = self._cached_range is None or self._cached_range.covers(time_range)
+        if self._usage_cache is not None and self._last_scan and cache_fits:
             age = (datetime.now() - self._last_scan).total_seconds()
             if age < self.cache_ttl_seconds:
                 return self._usage_cache
@@ -112,7 +287,7 @@ class CodexStatsParser:
                 source = str(self.resolved_stats_file)
 
         if not buckets and self.resolved_logs_dir:
-            self._parse_logs_dir(self.resolved_logs_dir, buckets)
+            self._parse_logs_dir(self.resolved_logs_dir, buckets, time_range)
             if buckets:
                 source = str(self.resolved_logs_dir)
 
@@ -120,6 +295,7 @@ class CodexStatsParser:
             return None
 
         self._usage_cache = {"buckets": buckets, "source": source}
+        self._cached_range = time_range
         self._last_scan = datetime.now()
         return self._usage_cache
 
@@ -141,6 +317,13 @@ class CodexStatsParser:
             "source": source,
         }
 
+    def _sidecar_path(self, name: str) -> Path:
+        # Separate sidecars per logs directory: each parser forgets files missing
+        # from its own tree, which must not evict another tree's entries.
+        source = str(self.resolved_logs_dir or "")
+        digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+        return Path.home() / f".cache/agentop/codex-{name}-{digest}.jsonl"
+
     def _resolve_stats_file(self) -> Optional[Path]:
         if self.stats_file and self.stats_file.exists():
             return self.stats_file
@@ -167,85 +350,406 @@ class CodexStatsParser:
             return
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = self._decoder.load_file(file_path)
         except Exception:
             return
 
         self._extract_stats_entries(data, buckets, session_id=file_path.stem)
 
-    def _parse_logs_dir(self, logs_dir: Path, buckets: Dict[date, Dict[str, Any]]) -> None:
-        patterns = ("*.jsonl", "*.log", "*.json")
-        for pattern in patterns:
-            for file_path in logs_dir.rglob(pattern):
-                if file_path.is_dir():
-                    continue
-                if file_path.suffix.lower() == ".json":
-                    self._parse_stats_file(file_path, buckets)
-                else:
-                    self._parse_log_file(file_path, buckets)
-
-    def _parse_log_file(self, file_path: Path, buckets: Dict[date, Dict[str, Any]]) -> None:
-        fallback_date = datetime.fromtimestamp(file_path.stat().st_mtime).date()
-        default_session = file_path.stem
-        generic_rows: list[Tuple[date, TokenUsage, Optional[float], str]] = []
-        has_token_count = False
-        prev_total: Optional[TokenUsage] = None
+    def _parse_logs_dir(
+        self,
+        logs_dir: Path,
+        buckets: Dict[date, Dict[str, Any]],
+        time_range: Optional[TimeRange] = None,
+    ) -> None:
+        partitions = PartitionFilter(logs_dir, time_range or TimeRange.all(), self._cold_partitions)
+        files = self._list_log_files(logs_dir, partitions)
+        if files:
+            self._newest_mtime_ns = max(st.st_mtime_ns for _, st in files)
+        rollouts = [
+            (file_path, st)
+            for file_path, st in files
+            if file_path.suffix == ".jsonl" and not is_archive(file_path)
+        ]
+        self._newest_log = max(rollouts, key=lambda item: item[1].st_mtime_ns, default=None)
+        spans = self._planner.spans
+        paths = {str(file_path) for file_path, _ in files}
+        # Files hidden by partition pruning were not listed, but still exist.
+        spans.retain(paths | partitions.excluded(spans.data))
+        self._archives.retain(
+            {path for path in paths if is_archive(Path(path))}
+            | partitions.excluded(self._archives.data)
+        )
+        self._cursors.retain(paths | partitions.excluded(self._cursors.raw))
+        scanned = set()
+        for file_path, stat_result in self._planner.plan(files, time_range or TimeRange.all()):
+            scanned.add(str(file_path))
+            if file_path.suffix.lower() == ".json":
+                self._parse_stats_file(file_path, buckets)
+                continue
+            span = TimeSpan()
+            if is_archive(file_path):
+                parsed = self._parse_archive(file_path, stat_result, buckets, span)
+            else:
+                parsed = self._update_log_file(file_path, stat_result, buckets, span)
+            if parsed:
+                spans.record(str(file_path), stat_result.st_size, stat_result.st_mtime_ns, span)
+        partitions.record_cold(files, scanned)
+        spans.save()
+        self._archives.save()
+        self._cursors.save()
+
+    def _list_log_files(
+        self, logs_dir: Path, partitions: Optional[PartitionFilter] = None
+    ) -> List[Tuple[Path, os.stat_result]]:
+        """
+        List log files under ``logs_dir`` in one walk, classified by suffix.
+
+        Unchanged directories are not listed again (see ``DirectoryListingCache``).
+        With ``partitions``, ``YYYY/MM/DD`` directories and timestamped rollouts
+        started after the queried range are skipped by name, without being listed
+        or stat()ed. Earlier ones may have been resumed since, so they are
+        stat()ed and left to the planner's mtime check, except day partitions
+        still trusted by ``ColdPartitions``: those cost one directory stat and
+        their files come back with the stat results of their last check. Other
+        files are stat()ed each time: appends do not change directory mtimes,
+        and on POSIX a ``DirEntry`` stat is a syscall anyway.
+        Tree size and walk time are kept in ``last_walk_stats``.
+        """
+        suffixes = (".jsonl", ".log", ".json") + archive_suffixes()
+
+        def prune(directory: Path) -> bool:
+            if _is_hidden_dir(directory):
+                return True
+            return partitions is not None and partitions.prune_dir(directory)
+
+        stats = WalkStats()
+        started = time.perf_counter()
+        files = []
+        for file_path in get_listing_cache().walk_files(logs_dir, prune, stats):
+            if not file_path.name.endswith(suffixes):
+                continue
+            if partitions is not None and partitions.skip_file(file_path):
+                continue
+            try:
+                files.append((file_path, file_path.stat()))
+            except OSError:
+                continue
+        if partitions is not None:
+            files.extend(partitions.cold_files)
+        stats.seconds = time.perf_counter() - started
+        self.last_walk_stats = stats
+        return files
+
+    def _update_log_file(
+        self,
+        file_path: Path,
+        stat_result: os.stat_result,
+        buckets: Dict[date, Dict[str, Any]],
+        span: TimeSpan,
+    ) -> bool:
+        """
+        Add a rollout's usage to ``buckets``, reading only bytes appended since the last scan.
+
+        Returns:
+            False if new bytes could not be read; the file is then re-read from
+            the start next time
+        """
+        key = str(file_path)
+        state = self._cursors.get(key)
+        if state is None:
+            state = CodexFileState.fresh(stat_result)
+        elif state.cursor.classify(stat_result) == CURSOR_UNCHANGED:
+            self._merge_buckets(buckets, state.buckets)
+            return True
+
+        if not self._ingest_log_file(file_path, stat_result, state, span):
+            self._cursors.discard(key)
+            return False
+        self._cursors.put(key, state)
+        self._merge_buckets(buckets, state.buckets)
+        return True
+
+    def _merge_buckets(
+        self, buckets: Dict[date, Dict[str, Any]], source: Dict[date, Dict[str, Any]]
+    ) -> None:
+        for usage_date, bucket in source.items():
+            self._add_usage(
+                buckets,
+                usage_date,
+                bucket["tokens"],
+                cost=bucket["cost"] if bucket["cost_seen"] else None,
+                session_id=None,
+            )
+            buckets[usage_date]["sessions"].merge(bucket["sessions"])
+
+    def _parse_archive(
+        self,
+        file_path: Path,
+        stat_result: os.stat_result,
+        buckets: Dict[date, Dict[str, Any]],
+        span: TimeSpan,
+    ) -> bool:
+        """
+        Add a compressed archive's usage to ``buckets``, decompressing it at most once.
+
+        Returns:
+            False if the archive could not be read completely
+        """
+        key = str(file_path)
+        cached = self._archives.lookup(key, stat_result)
+        if cached is None:
+            archive_buckets: Dict[date, Dict[str, Any]] = {}
+            if not self._parse_log_file(file_path, archive_buckets):
+                return False
+            cached = {
+                usage_date.isoformat(): bucket_to_state(bucket)
+                for usage_date, bucket in archive_buckets.items()
+            }
+            self._archives.store(key, stat_result, cached)
+
+        archive_buckets = {
+            date.fromisoformat(day): bucket_from_state(saved) for day, saved in cached.items()
+        }
+        for usage_date in archive_buckets:
+            span.observe_day(usage_date)
+        self._merge_buckets(buckets, archive_buckets)
+        return True
+
+    def _parse_log_file(
+        self,
+        file_path: Path,
+        buckets: Dict[date, Dict[str, Any]],
+        span: Optional[TimeSpan] = None,
+    ) -> bool:
+        """
+        Add a whole log file's usage to ``buckets``.
 
+        Returns:
+            False if the file could not be read completely
+        """
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        entry = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
+            stat_result = file_path.stat()
+        except OSError:
+            return False
+        state = CodexFileState.fresh(stat_result)
+        if not self._ingest_log_file(file_path, stat_result, state, span):
+            return False
+        self._merge_buckets(buckets, state.buckets)
+        return True
+
+    def _ingest_log_file(
+        self,
+        file_path: Path,
+        stat_result: os.stat_result,
+        state: CodexFileState,
+        span: Optional[TimeSpan] = None,
+    ) -> bool:
+        """
+        Advance ``state`` over the bytes appended after its cursor.
 
-                    # Codex session logs expose token usage under:
-                    # event_msg.payload.info.total_token_usage
-                    total_usage = self._extract_token_count_totals(entry)
-                    if total_usage is not None:
-                        has_token_count = True
-                        generic_rows.clear()
-                        entry_date = self._extract_date(entry) or fallback_date
-                        delta_usage = (
-                            total_usage
-                            if prev_total is None
-                            else self._subtract_usage(total_usage, prev_total)
-                        )
-                        prev_total = total_usage
-                        if delta_usage.total_tokens > 0:
-                            session_id = self._extract_session_id(entry) or default_session
-                            self._add_usage(
-                                buckets,
-                                entry_date,
-                                delta_usage,
-                                cost=None,
-                                session_id=session_id,
-                            )
-                        continue
+        Codex session logs expose token usage as cumulative totals in
+        ``event_msg.payload.info.total_token_usage``; each one is differenced
+        against ``state.last_total``, so appended events are counted correctly
+        without replaying the file. Files without ``token_count`` events fall
+        back to generic usage extraction; if one later appears, the file is
+        re-read from the start in token_count mode so nothing is counted twice.
 
-                    if has_token_count:
-                        # Once token_count is present in the file, ignore generic usage
-                        # extraction to avoid double counting.
-                        continue
+        Args:
+            file_path: Log file to read
+            stat_result: Fresh stat of ``file_path``
+            state: State to advance in place
+            span: Optional span to widen with the dates of new entries
+
+        Returns:
+            False if the file could not be read
+        """
+        if state.cursor.classify(stat_result) == CURSOR_RESET:
+            state.reset(stat_result)
+        if (
+            state.cursor.offset == 0
+            and state.mode is None
+            and not is_archive(file_path)
+            and self._ingest_single_day(file_path, stat_result, state, span)
+        ):
+            return True
+        start, end = state.cursor.offset, stat_result.st_size
+        fallback_date = datetime.fromtimestamp(stat_result.st_mtime).date()
+        default_session = log_stem(file_path)
 
+        try:
+            # Only lines mentioning token_count can carry cumulative totals, so the
+            # rest of the rollout (prompts, tool output) is skipped without decoding.
+            entries, stop = self._scan_entries(file_path, start, end, _TOKEN_COUNT_MARKER)
+            totals = []
+            for entry in entries:
+                total_usage = self._extract_token_count_totals(entry)
+                if total_usage is not None:
+                    totals.append((entry, total_usage))
+
+            if totals and state.mode == MODE_GENERIC:
+                # token_count supersedes generic usage for the whole file.
+                state.reset(stat_result)
+                return self._ingest_log_file(file_path, stat_result, state, span)
+
+            generic_rows: List[Tuple[date, TokenUsage, Optional[float], str]] = []
+            if not totals and state.mode != MODE_TOKEN_COUNT:
+                entries, generic_stop = self._scan_entries(file_path, start, end, None)
+                stop = max(stop, generic_stop)
+                for entry in entries:
                     usage = self._extract_usage(entry)
                     if not usage:
                         continue
-
                     entry_date = self._extract_date(entry) or fallback_date
                     cost = self._extract_cost(entry)
                     session_id = self._extract_session_id(entry) or default_session
                     generic_rows.append((entry_date, usage, cost, session_id))
         except Exception:
-            return
+            return False
+
+        for entry, total_usage in totals:
+            state.mode = MODE_TOKEN_COUNT
+            entry_date = self._extract_date(entry) or fallback_date
+            if span is not None:
+                span.observe_day(entry_date)
+            delta_usage = (
+                total_usage
+                if state.last_total is None
+                else self._subtract_usage(total_usage, state.last_total)
+            )
+            state.last_total = total_usage
+            if delta_usage.total_tokens > 0:
+                session_id = self._extract_session_id(entry) or default_session
+                self._add_usage(state.buckets, entry_date, delta_usage, None, session_id)
+
+        for entry_date, usage, cost, session_id in generic_rows:
+            state.mode = MODE_GENERIC
+            if span is not None:
+                span.observe_day(entry_date)
+            self._add_usage(state.buckets, entry_date, usage, cost, session_id)
+
+        state.cursor.advance(stat_result, stop)
+        return True
+
+    def _ingest_single_day(
+        self,
+        file_path: Path,
+        stat_result: os.stat_result,
+        state: CodexFileState,
+        span: Optional[TimeSpan] = None,
+    ) -> bool:
+        """
+        Count an unread rollout from its first and last token_count events alone.
+
+        Totals are cumulative, so when the first and last events fall on the
+        same day and session, the deltas in between sum to the last total. The
+        head is read forwards to the first event and the tail backwards to the
+        last one; the lines in between are never decoded.
+
+        Returns:
+            True if ``state`` was filled in, False if the file needs the full
+            delta walk (no token_count events, or events on several days)
+        """
+        end = stat_result.st_size
+        fallback_date = datetime.fromtimestamp(stat_result.st_mtime).date()
+        default_session = log_stem(file_path)
+        try:
+            last = None
+            for raw, line_start in ReverseJsonlScanner(
+                file_path, end=end, marker=_TOKEN_COUNT_MARKER
+            ):
+                last = self._token_count_event(raw)
+                if last is not None:
+                    # A half-written final line does not decode and is skipped.
+                    stop = min(line_start + len(raw) + 1, end)
+                    break
+            if last is None:
+                return False
+
+            first = None
+            for raw, _, _ in JsonlScanner(
+                file_path, 0, stop, marker=_TOKEN_COUNT_MARKER, buffer=self._scan_buffer
+            ):
+                first = self._token_count_event(raw)
+                if first is not None:
+                    break
+        except OSError:
+            return False
+        if first is None:
+            return False
+
+        (first_entry, _), (last_entry, last_total) = first, last
+        day = self._extract_date(last_entry) or fallback_date
+        session_id = self._extract_session_id(last_entry) or default_session
+        if (self._extract_date(first_entry) or fallback_date) != day:
+            return False
+        if (self._extract_session_id(first_entry) or default_session) != session_id:
+            return False
+
+        if span is not None:
+            span.observe_day(day)
+        if last_total.total_tokens > 0:
+            self._add_usage(state.buckets, day, last_total, None, session_id)
+        state.mode = MODE_TOKEN_COUNT
+        state.last_total = last_total
+        state.cursor.advance(stat_result, stop)
+        return True
+
+    def _token_count_event(self, raw: bytes) -> Optional[Tuple[Dict[str, Any], TokenUsage]]:
+        """Decode a line into (entry, cumulative totals) if it is a token_count event."""
+        try:
+            entry = self._decoder.loads(raw.strip())
+        except ValueError:
+            return None
+        if not isinstance(entry, dict):
+            return None
+        totals = self._extract_token_count_totals(entry)
+        if totals is None:
+            return None
+        return entry, totals
+
+    def _scan_entries(
+        self,
+        file_path: Path,
+        start: int,
+        end: int,
+        marker: Optional[bytes],
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Decode the JSON objects in ``[start, end)`` of a log, optionally only marked lines.
 
-        if not has_token_count:
-            for entry_date, usage, cost, session_id in generic_rows:
-                self._add_usage(buckets, entry_date, usage, cost, session_id)
+        Returns:
+            (entries, offset just past the last line consumed); an unterminated
+            last line is consumed only if it decodes, otherwise it is left for
+            the next scan
+        """
+        scanner = JsonlScanner(file_path, start, end, marker=marker, buffer=self._scan_buffer)
+        tail: List[bytes] = []
+
+        def lines() -> Iterator[bytes]:
+            for raw, _, terminated in scanner:
+                line = raw.strip()
+                if not line:
+                    continue
+                if not terminated:
+                    tail.append(line)
+                    continue
+                yield line
+
+        entries = [
+            entry for entry in self._decoder.iter_loads(lines()) if isinstance(entry, dict)
+        ]
+        stop = scanner.offset
+        if tail:
+            try:
+                entry = self._decoder.loads(tail[0])
+            except ValueError:
+                entry = None
+            if entry is not None:
+                if isinstance(entry, dict):
+                    entries.append(entry)
+                stop = end
+        return entries, stop
 
     def _extract_stats_entries(
         self,
@@ -532,7 +1036,7 @@ class CodexStatsParser:
                 "tokens": TokenUsage(),
                 "cost": 0.0,
                 "cost_seen": False,
-                "sessions": set(),
+                "sessions": HyperLogLog(),
             }
 
         bucket = buckets[usage_date]
@@ -0,0 +1,140 @@
+"""Streaming access to compressed (archived) JSONL session logs."""
+
+from __future__ import annotations
+
+import gzip
+import lzma
+import os
+import zlib
+from pathlib import Path
+from typing import IO, Any, Dict, Optional, Set, Tuple
+
+from .sidecar_journal import SidecarJournal
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+_JSONL = ".jsonl"
+_ARCHIVE_SUFFIXES = (".jsonl.gz", ".jsonl.xz", ".jsonl.zst")
+
+# Errors a corrupt or truncated archive can raise while being streamed.
+ARCHIVE_ERRORS: Tuple[type, ...] = (OSError, EOFError, lzma.LZMAError, zlib.error)
+if zstandard is not None:
+    ARCHIVE_ERRORS += (zstandard.ZstdError,)
+
+
+def archive_suffixes() -> Tuple[str, ...]:
+    """Compressed log suffixes readable in this environment."""
+    if zstandard is None:
+        return _ARCHIVE_SUFFIXES[:2]
+    return _ARCHIVE_SUFFIXES
+
+
+def is_archive(path: Path) -> bool:
+    """Whether ``path`` names a compressed JSONL log."""
+    return path.name.endswith(_ARCHIVE_SUFFIXES)
+
+
+def is_jsonl_log(path: Path) -> bool:
+    """Whether ``path`` names a plain or readable compressed JSONL log."""
+    name = path.name
+    return name.endswith(_JSONL) or name.endswith(archive_suffixes())
+
+
+def log_stem(path: Path) -> str:
+    """File name without its ``.jsonl`` and compression suffixes."""
+    name = path.name
+    for suffix in _ARCHIVE_SUFFIXES + (_JSONL,):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return path.stem
+
+
+def open_log(path: Path) -> IO[bytes]:
+    """
+    Open a log for binary reading, decompressing archives as a stream.
+
+    Raises:
+        OSError: If the file cannot be opened, or it is ``.zst`` and the
+            optional ``zstandard`` package is not installed
+    """
+    name = path.name
+    if name.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if name.endswith(".xz"):
+        return lzma.open(path, "rb")
+    if name.endswith(".zst"):
+        if zstandard is None:
+            raise OSError(f"zstandard is required to read {path}")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+class ArchiveCache:
+    """
+    Sidecar cache of per-archive parse results.
+
+    Archives are never appended to, so a result stays valid for as long as the
+    file keeps its size and mtime; after the first parse an archive is never
+    decompressed again. Only changed results are written back (see
+    ``SidecarJournal``).
+    """
+
+    def __init__(self, cache_path: Path):
+        """
+        Initialize cache.
+
+        Args:
+            cache_path: Path to the sidecar journal file
+        """
+        self.cache_path = cache_path
+        self._journal = SidecarJournal(cache_path)
+        self._data: Optional[Dict[str, Dict[str, Any]]] = None
+        self._changes: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    @property
+    def data(self) -> Dict[str, Dict[str, Any]]:
+        """Cached results by path, loaded on first use."""
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        return self._journal.load()
+
+    def lookup(self, path: str, stat_result: os.stat_result) -> Optional[Any]:
+        """Return the cached result for an unchanged archive, or None."""
+        entry = self.data.get(path)
+        if not isinstance(entry, dict):
+            return None
+        if entry.get("size") != stat_result.st_size:
+            return None
+        if entry.get("mtime_ns") != stat_result.st_mtime_ns:
+            return None
+        return entry.get("result")
+
+    def store(self, path: str, stat_result: os.stat_result, result: Any) -> None:
+        """Cache the parse result of an archive."""
+        entry = {
+            "size": stat_result.st_size,
+            "mtime_ns": stat_result.st_mtime_ns,
+            "result": result,
+        }
+        self.data[path] = entry
+        self._changes[path] = entry
+
+    def retain(self, paths: Set[str]) -> None:
+        """Forget archives that no longer exist."""
+        stale = [path for path in self.data if path not in paths]
+        for path in stale:
+            del self.data[path]
+            self._changes[path] = None
+
+    def save(self) -> None:
+        """Write changed results to disk."""
+        if self._data is None:
+            return
+        if self._journal.save(self._data, self._changes):
+            self._changes = {}
@@ -0,0 +1,222 @@
+"""Recognise date-partitioned log trees such as ``sessions/YYYY/MM/DD/rollout-<ts>.jsonl``."""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .dir_listing import DirectoryListingCache
+from .scan_planner import TimeRange
+
+_YEAR = re.compile(r"\d{4}")
+_MONTH_OR_DAY = re.compile(r"\d{2}")
+_ROLLOUT_NAME = re.compile(r"rollout-(\d{4})-(\d{2})-(\d{2})T")
+
+# How long a cold partition is trusted before its rollouts are stat()ed again.
+DEFAULT_COLD_RECHECK_SECONDS = 60.0
+
+_Listed = List[Tuple[Path, os.stat_result]]
+
+
+def partition_days(root: Path, directory: Path) -> Optional[Tuple[date, date]]:
+    """
+    Days covered by a ``YYYY``, ``YYYY/MM`` or ``YYYY/MM/DD`` directory below ``root``.
+
+    Returns:
+        Half-open [first, end) day range, or None if ``directory`` is not a
+        date partition
+    """
+    try:
+        parts = directory.relative_to(root).parts
+    except ValueError:
+        return None
+    if not 1 <= len(parts) <= 3 or not _YEAR.fullmatch(parts[0]):
+        return None
+    if not all(_MONTH_OR_DAY.fullmatch(part) for part in parts[1:]):
+        return None
+    try:
+        numbers = [int(part) for part in parts]
+        if len(numbers) == 1:
+            return date(numbers[0], 1, 1), date(numbers[0] + 1, 1, 1)
+        first = date(numbers[0], numbers[1], numbers[2] if len(numbers) == 3 else 1)
+    except ValueError:
+        return None
+    if len(numbers) == 3:
+        return first, first + timedelta(days=1)
+    return first, (first + timedelta(days=32)).replace(day=1)
+
+
+def rollout_day(file_path: Path) -> Optional[date]:
+    """Start day encoded in a ``rollout-YYYY-MM-DDTHH-MM-SS-<uuid>.jsonl`` name, if any."""
+    match = _ROLLOUT_NAME.match(file_path.name)
+    if match is None:
+        return None
+    try:
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return None
+
+
+class ColdPartitions:
+    """
+    Day partitions whose rollouts were all found unchanged and outside the range.
+
+    Resuming a session appends to its rollout without touching the partition
+    directory, so an unchanged listing alone does not show that the rollouts
+    are unchanged. A partition is trusted only for ``recheck_seconds`` after
+    a walk stat()ed every rollout in it and the planner skipped them all, and
+    only while its listing is unchanged. Until then it is not walked; its
+    files are reported with the stat results from that walk. Usage appended
+    to an old session is therefore counted within ``recheck_seconds``.
+    """
+
+    def __init__(
+        self,
+        listing: DirectoryListingCache,
+        recheck_seconds: float = DEFAULT_COLD_RECHECK_SECONDS,
+    ):
+        """
+        Initialize tracker.
+
+        Args:
+            listing: Listing cache the partitions are walked through
+            recheck_seconds: Trust a partition this long after its last full check
+        """
+        self.listing = listing
+        self.recheck_seconds = recheck_seconds
+        # directory -> (range checked against, monotonic check time, files with stats)
+        self._partitions: Dict[str, Tuple[TimeRange, float, _Listed]] = {}
+
+    def lookup(self, directory: Path, time_range: TimeRange) -> Optional[_Listed]:
+        """Files of ``directory`` if it is still trusted to hold nothing for ``time_range``."""
+        record = self._partitions.get(str(directory))
+        if record is None:
+            return None
+        checked_range, checked_at, files = record
+        if time.monotonic() - checked_at >= self.recheck_seconds:
+            return None
+        if not checked_range.covers(time_range) or not self.listing.is_current(directory):
+            return None
+        return files
+
+    def update(
+        self,
+        root: Path,
+        files: _Listed,
+        scanned: Set[str],
+        time_range: TimeRange,
+        trusted: Iterable[Path],
+    ) -> None:
+        """
+        Record which walked day partitions held nothing to read.
+
+        Args:
+            root: Root of the partitioned tree
+            files: Files of the walk, with their stats
+            scanned: Paths the planner chose to read
+            time_range: Range the walk was planned for
+            trusted: Partitions the walk skipped as cold; their records stand
+        """
+        kept = {str(directory) for directory in trusted}
+        walked: Dict[str, _Listed] = {}
+        nested: Set[str] = set()
+        for file_path, stat_result in files:
+            parent = file_path.parent
+            if str(parent) in kept:
+                continue
+            if _is_day(root, parent):
+                walked.setdefault(str(parent), []).append((file_path, stat_result))
+            # A partition with subdirectories is never skipped: their files would vanish.
+            for ancestor in parent.parents:
+                if ancestor == root:
+                    break
+                if _is_day(root, ancestor):
+                    nested.add(str(ancestor))
+
+        checked_at = time.monotonic()
+        self._partitions = {key: self._partitions[key] for key in kept if key in self._partitions}
+        for key, entries in walked.items():
+            if key not in nested and not any(str(path) in scanned for path, _ in entries):
+                self._partitions[key] = (time_range, checked_at, entries)
+
+
+class PartitionFilter:
+    """
+    Decide which partitions and rollouts need not be walked for a range.
+
+    Partitions and rollout names record the day a session started. A session
+    cannot log anything before it starts, so anything starting after the range
+    is skipped. A session can be resumed at any later time, though, so earlier
+    paths are never skipped by name: whether they were written in the range is
+    left to their mtime, or to ``ColdPartitions`` once a walk found them
+    unchanged. Paths that carry no date are never skipped.
+    """
+
+    def __init__(self, root: Path, time_range: TimeRange, cold: Optional[ColdPartitions] = None):
+        """
+        Initialize filter.
+
+        Args:
+            root: Root of the partitioned tree
+            time_range: Range being queried
+            cold: Optional record of partitions trusted to hold nothing new
+        """
+        self.root = root
+        self.time_range = time_range
+        self._cold = cold
+        self._end: Optional[date] = None
+        if time_range.end is not None:
+            end = datetime.fromtimestamp(time_range.end)
+            self._end = end.date() + timedelta(days=1 if end.time() else 0)
+        self.pruned: List[Path] = []
+        self.skipped: Set[str] = set()
+        # Cold partitions skipped by this walk, and their files as last stat()ed.
+        self.cold: List[Path] = []
+        self.cold_files: _Listed = []
+
+    def prune_dir(self, directory: Path) -> bool:
+        """Whether a directory is a date partition starting after the range, or a cold one."""
+        days = partition_days(self.root, directory)
+        if days is None:
+            return False
+        if self._after_range(days[0]):
+            self.pruned.append(directory)
+            return True
+        if self._cold is None:
+            return False
+        files = self._cold.lookup(directory, self.time_range)
+        if files is None:
+            return False
+        self.cold.append(directory)
+        self.cold_files.extend(files)
+        return True
+
+    def skip_file(self, file_path: Path) -> bool:
+        """Whether a rollout's name shows it started after the range."""
+        day = rollout_day(file_path)
+        if day is None or not self._after_range(day):
+            return False
+        self.skipped.add(str(file_path))
+        return True
+
+    def excluded(self, paths: Iterable[str]) -> Set[str]:
+        """The given paths that were skipped or lie in a pruned partition."""
+        prefixes = tuple(os.path.join(str(directory), "") for directory in self.pruned)
+        return {path for path in paths if path in self.skipped or path.startswith(prefixes)}
+
+    def record_cold(self, files: _Listed, scanned: Set[str]) -> None:
+        """Let the cold record learn from a walk's files and what the planner read."""
+        if self._cold is not None:
+            self._cold.update(self.root, files, scanned, self.time_range, self.cold)
+
+    def _after_range(self, first: date) -> bool:
+        return self._end is not None and first >= self._end
+
+
+def _is_day(root: Path, directory: Path) -> bool:
+    days = partition_days(root, directory)
+    return days is not None and days[1] - days[0] == timedelta(days=1)
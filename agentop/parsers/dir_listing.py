@@ -0,0 +1,154 @@
+"""Directory listings cached against each directory's mtime."""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# A directory modified this close to when it was listed may change again within
+# the same mtime tick (coarse on NFS and some filesystems), so its listing is
+# not trusted until it has been quiet for longer.
+_RACY_NS = 2_000_000_000
+
+
+@dataclass
+class WalkStats:
+    """Counters from one tree walk."""
+
+    dirs: int = 0
+    files: int = 0
+    dirs_listed: int = 0
+    dirs_pruned: int = 0
+    seconds: float = 0.0
+
+
+class DirectoryListingCache:
+    """
+    Remember each directory's children together with the directory's mtime.
+
+    Creating, removing or renaming an entry updates its parent directory's
+    mtime, so a listing stays valid for as long as the mtime is unchanged and
+    checking it costs one ``stat``. Only directories whose mtime moved are
+    listed again; the kind of each child comes from the ``scandir`` entry, so
+    listing never stats individual files. This works on any filesystem,
+    including network homes where change notifications are unavailable.
+
+    Appending to a file does not touch its directory, so callers that need
+    current sizes still stat the files themselves.
+    """
+
+    def __init__(self) -> None:
+        # directory -> (mtime_ns, listed_at_ns, [(child path, is directory)])
+        self._listings: Dict[str, Tuple[int, int, List[Tuple[Path, bool]]]] = {}
+        self.dirs_listed = 0
+        self.dirs_reused = 0
+
+    def children(self, directory: Path) -> List[Tuple[Path, bool]]:
+        """
+        List a directory's entries, re-reading it only if its mtime changed.
+
+        Args:
+            directory: Directory to list
+
+        Returns:
+            (path, is directory) for each entry; empty if ``directory`` is missing
+        """
+        key = str(directory)
+        try:
+            mtime_ns = os.stat(key).st_mtime_ns
+        except OSError:
+            self._listings.pop(key, None)
+            return []
+
+        cached = self._listings.get(key)
+        if cached is not None and cached[0] == mtime_ns and cached[1] - mtime_ns > _RACY_NS:
+            self.dirs_reused += 1
+            return cached[2]
+
+        listed_at = time.time_ns()
+        entries: List[Tuple[Path, bool]] = []
+        try:
+            with os.scandir(key) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if not is_dir and entry.is_dir():
+                            # Like rglob, symlinked directories are not followed.
+                            continue
+                    except OSError:
+                        continue
+                    entries.append((directory / entry.name, is_dir))
+        except OSError:
+            self._listings.pop(key, None)
+            return []
+        self.dirs_listed += 1
+
+        if cached is not None:
+            # Forget subdirectories that disappeared.
+            current = {str(path) for path, is_dir in entries if is_dir}
+            for path, is_dir in cached[2]:
+                if is_dir and str(path) not in current:
+                    self._listings.pop(str(path), None)
+        self._listings[key] = (mtime_ns, listed_at, entries)
+        return entries
+
+    def is_current(self, directory: Path) -> bool:
+        """Whether ``directory`` was listed before and has not changed since; one ``stat``."""
+        cached = self._listings.get(str(directory))
+        if cached is None:
+            return False
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return False
+        return cached[0] == mtime_ns and cached[1] - mtime_ns > _RACY_NS
+
+    def walk_files(
+        self,
+        root: Path,
+        prune: Optional[Callable[[Path], bool]] = None,
+        stats: Optional[WalkStats] = None,
+    ) -> Iterator[Path]:
+        """
+        Yield every file below ``root``, re-listing only changed directories.
+
+        Args:
+            root: Directory to walk
+            prune: Optional predicate; subdirectories it returns True for are
+                not entered
+            stats: Optional counters to update while walking
+
+        Yields:
+            Paths of non-directory entries, in no particular order
+        """
+        if stats is None:
+            stats = WalkStats()
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            listed = self.dirs_listed
+            children = self.children(directory)
+            stats.dirs += 1
+            stats.dirs_listed += self.dirs_listed - listed
+            for path, is_dir in children:
+                if not is_dir:
+                    stats.files += 1
+                    yield path
+                elif prune is not None and prune(path):
+                    stats.dirs_pruned += 1
+                else:
+                    pending.append(path)
+
+
+_default_cache: Optional[DirectoryListingCache] = None
+
+
+def get_listing_cache() -> DirectoryListingCache:
+    """Return the shared process-wide listing cache."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DirectoryListingCache()
+    return _default_cache
@@ -0,0 +1,67 @@
+"""Byte-offset cursors for tailing append-only JSONL logs."""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+CURSOR_UNCHANGED = "unchanged"
+CURSOR_APPENDED = "appended"
+CURSOR_RESET = "reset"
+
+
+@dataclass
+class FileCursor:
+    """
+    Scan position within a log file, keyed by (device, inode, size, mtime).
+
+    ``fingerprint`` is the chained block fingerprint of the file's bytes up to
+    ``fingerprint_offset``, the last block boundary read (see
+    ``prefix_fingerprints``).
+    """
+
+    device: int
+    inode: int
+    size: int
+    mtime_ns: int
+    offset: int = 0
+    fingerprint: int = 0
+    fingerprint_offset: int = 0
+
+    @classmethod
+    def from_stat(cls, stat_result: os.stat_result, offset: int = 0) -> "FileCursor":
+        """Create a cursor for a file that has been consumed up to ``offset``."""
+        return cls(
+            device=stat_result.st_dev,
+            inode=stat_result.st_ino,
+            size=stat_result.st_size,
+            mtime_ns=stat_result.st_mtime_ns,
+            offset=offset,
+        )
+
+    def classify(self, stat_result: os.stat_result) -> str:
+        """
+        Compare the cursor against a fresh stat of the same path.
+
+        Returns:
+            CURSOR_UNCHANGED if there is nothing new to read, CURSOR_APPENDED if
+            bytes were appended past the cursor, CURSOR_RESET if the file was
+            replaced or truncated and must be re-read from the start.
+        """
+        if stat_result.st_dev != self.device or stat_result.st_ino != self.inode:
+            return CURSOR_RESET
+        if stat_result.st_size < self.size or stat_result.st_size < self.offset:
+            return CURSOR_RESET
+        if stat_result.st_size == self.size and stat_result.st_mtime_ns == self.mtime_ns:
+            return CURSOR_UNCHANGED
+        if stat_result.st_size == self.offset:
+            return CURSOR_UNCHANGED
+        return CURSOR_APPENDED
+
+    def advance(self, stat_result: os.stat_result, offset: int) -> None:
+        """Record a completed read up to ``offset`` against the given stat."""
+        self.device = stat_result.st_dev
+        self.inode = stat_result.st_ino
+        self.size = stat_result.st_size
+        self.mtime_ns = stat_result.st_mtime_ns
+        self.offset = offset
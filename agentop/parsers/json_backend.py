@@ -0,0 +1,191 @@
+"""Pluggable JSON decoding backend (orjson, msgspec or stdlib json)."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from ..core.constants import JSON_BACKEND_ENV
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+JsonInput = Union[bytes, str]
+
+BACKEND_ORJSON = "orjson"
+BACKEND_MSGSPEC = "msgspec"
+BACKEND_JSON = "json"
+
+_DEFAULT_BATCH_SIZE = 512
+
+
+if msgspec is not None:
+
+    class _ClaudeMessage(msgspec.Struct):
+        id: Any = None
+        model: Any = None
+        usage: Any = None
+
+    class _ClaudeRecord(msgspec.Struct):
+        """Typed view of a Claude JSONL line; every other field is skipped unread."""
+
+        message: Union[_ClaudeMessage, str, List[Any], None] = None
+        requestId: Any = None
+        timestamp: Any = None
+        costUSD: Any = None
+        model: Any = None
+
+
+def available_backends() -> List[str]:
+    """Return the names of the JSON backends importable in this environment."""
+    backends = []
+    if orjson is not None:
+        backends.append(BACKEND_ORJSON)
+    if msgspec is not None:
+        backends.append(BACKEND_MSGSPEC)
+    backends.append(BACKEND_JSON)
+    return backends
+
+
+class JsonDecoder:
+    """Decode JSON with the fastest available backend, falling back to stdlib json."""
+
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Initialize decoder.
+
+        Args:
+            backend: Backend name (orjson, msgspec, json). Defaults to
+                AGENTOP_JSON_BACKEND, then the first available of orjson, msgspec, json.
+        """
+        requested = backend or os.environ.get(JSON_BACKEND_ENV, "").strip().lower()
+        available = available_backends()
+        self.name = requested if requested in available else available[0]
+
+        if self.name == BACKEND_ORJSON:
+            self._loads = orjson.loads
+        elif self.name == BACKEND_MSGSPEC:
+            self._loads = msgspec.json.Decoder().decode
+        else:
+            self._loads = json.loads
+
+        self._claude_decoder = None
+        if msgspec is not None and self.name != BACKEND_JSON:
+            self._claude_decoder = msgspec.json.Decoder(_ClaudeRecord)
+
+    @property
+    def has_typed_schemas(self) -> bool:
+        """Whether typed record decoding skips unneeded fields natively."""
+        return self._claude_decoder is not None
+
+    def loads(self, data: JsonInput) -> Any:
+        """
+        Decode a JSON document.
+
+        Raises:
+            ValueError: If the document is not valid JSON
+        """
+        try:
+            return self._loads(data)
+        except ValueError:
+            if self._loads is json.loads:
+                raise
+        # Fast backends reject a few inputs stdlib json accepts (NaN, huge ints).
+        return json.loads(data)
+
+    def loads_many(self, lines: List[JsonInput]) -> List[Any]:
+        """
+        Decode many JSON lines with a single backend call.
+
+        Returns:
+            Decoded values in input order; lines that fail to decode yield None
+        """
+        if not lines:
+            return []
+        if isinstance(lines[0], bytes):
+            joined: JsonInput = b"[" + b",".join(lines) + b"]"
+        else:
+            joined = "[" + ",".join(lines) + "]"
+        try:
+            values = self._loads(joined)
+            if isinstance(values, list) and len(values) == len(lines):
+                return values
+        except ValueError:
+            pass
+
+        decoded: List[Any] = []
+        for line in lines:
+            try:
+                decoded.append(self.loads(line))
+            except ValueError:
+                decoded.append(None)
+        return decoded
+
+    def iter_loads(
+        self, lines: Iterable[JsonInput], batch_size: int = _DEFAULT_BATCH_SIZE
+    ) -> Iterator[Any]:
+        """Decode a stream of non-empty lines in batches, yielding None for bad lines."""
+        batch: List[JsonInput] = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield from self.loads_many(batch)
+                batch = []
+        if batch:
+            yield from self.loads_many(batch)
+
+    def load_file(self, path: Path) -> Any:
+        """Read and decode a whole JSON file."""
+        with open(path, "rb") as f:
+            return self.loads(f.read())
+
+    def decode_claude_record(self, data: JsonInput) -> Any:
+        """
+        Decode a Claude JSONL line, keeping at least the usage-related fields.
+
+        With msgspec, fields other than message.{id,model,usage}, requestId,
+        timestamp, costUSD and model are skipped without being materialized.
+
+        Raises:
+            ValueError: If the line is not valid JSON
+        """
+        if self._claude_decoder is not None:
+            try:
+                record = self._claude_decoder.decode(data)
+            except ValueError:
+                return self.loads(data)
+            return _claude_record_to_dict(record)
+        return self.loads(data)
+
+
+def _claude_record_to_dict(record: Any) -> Dict[str, Any]:
+    message = record.message
+    if isinstance(message, _ClaudeMessage):
+        message = {"id": message.id, "model": message.model, "usage": message.usage}
+    return {
+        "message": message,
+        "requestId": record.requestId,
+        "timestamp": record.timestamp,
+        "costUSD": record.costUSD,
+        "model": record.model,
+    }
+
+
+_default_decoder: Optional[JsonDecoder] = None
+
+
+def get_decoder() -> JsonDecoder:
+    """Return the shared process-wide decoder."""
+    global _default_decoder
+    if _default_decoder is None:
+        _default_decoder = JsonDecoder()
+    return _default_decoder
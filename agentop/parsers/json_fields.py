@@ -0,0 +1,163 @@
+"""Targeted field extraction from large JSON lines."""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Mapping, Tuple, Union
+
+# A field spec maps object keys to True (decode the value) or to a nested spec
+# (walk into the object value and extract only its listed keys).
+FieldSpec = Mapping[str, Union[bool, "FieldSpec"]]
+
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_SCALAR_END = re.compile(rb"[,}\]\s]")
+_WHITESPACE = b" \t\r\n"
+_QUOTE = 0x22
+_BACKSLASH = 0x5C
+_COLON = 0x3A
+_COMMA = 0x2C
+_OPEN_BRACE = 0x7B
+_CLOSE_BRACE = 0x7D
+_OPEN_BRACKET = 0x5B
+
+
+class PartialDecodeError(ValueError):
+    """Raised when a line cannot be walked; callers fall back to a full decode."""
+
+
+def extract_fields(raw: bytes, spec: FieldSpec) -> Dict[str, Any]:
+    """
+    Decode only the fields named in ``spec`` from a JSON object.
+
+    Values that are not requested are skipped by scanning for their closing
+    delimiter, so the cost of a line is bounded by the size of the requested
+    values plus a byte scan, not by decoding every nested string.
+
+    Args:
+        raw: UTF-8 encoded JSON object
+        spec: Fields to extract
+
+    Returns:
+        Dictionary holding only the requested keys that were present
+
+    Raises:
+        PartialDecodeError: If the line is not a well-formed JSON object
+    """
+    pos = _skip_whitespace(raw, 0)
+    result, end = _walk_object(raw, pos, spec)
+    if _skip_whitespace(raw, end) != len(raw):
+        raise PartialDecodeError("trailing data after object")
+    return result
+
+
+def _walk_object(raw: bytes, pos: int, spec: FieldSpec) -> Tuple[Dict[str, Any], int]:
+    if pos >= len(raw) or raw[pos] != _OPEN_BRACE:
+        raise PartialDecodeError(f"expected object at {pos}")
+    result: Dict[str, Any] = {}
+    pos = _skip_whitespace(raw, pos + 1)
+    if pos < len(raw) and raw[pos] == _CLOSE_BRACE:
+        return result, pos + 1
+
+    while True:
+        if pos >= len(raw) or raw[pos] != _QUOTE:
+            raise PartialDecodeError(f"expected key at {pos}")
+        key_end = _string_end(raw, pos)
+        key = _decode_key(raw[pos:key_end])
+        pos = _skip_whitespace(raw, key_end)
+        if pos >= len(raw) or raw[pos] != _COLON:
+            raise PartialDecodeError(f"expected ':' at {pos}")
+        pos = _skip_whitespace(raw, pos + 1)
+
+        wanted = spec.get(key)
+        if isinstance(wanted, Mapping):
+            if pos < len(raw) and raw[pos] == _OPEN_BRACE:
+                result[key], pos = _walk_object(raw, pos, wanted)
+            else:
+                pos = _value_end(raw, pos)
+        elif wanted:
+            value_end = _value_end(raw, pos)
+            try:
+                result[key] = json.loads(raw[pos:value_end])
+            except ValueError as exc:
+                raise PartialDecodeError(str(exc)) from exc
+            pos = value_end
+        else:
+            pos = _value_end(raw, pos)
+
+        pos = _skip_whitespace(raw, pos)
+        if pos >= len(raw):
+            raise PartialDecodeError("unterminated object")
+        if raw[pos] == _CLOSE_BRACE:
+            return result, pos + 1
+        if raw[pos] != _COMMA:
+            raise PartialDecodeError(f"expected ',' at {pos}")
+        pos = _skip_whitespace(raw, pos + 1)
+
+
+def _decode_key(token: bytes) -> str:
+    if _BACKSLASH in token:
+        try:
+            return json.loads(token)
+        except ValueError as exc:
+            raise PartialDecodeError(str(exc)) from exc
+    try:
+        return token[1:-1].decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise PartialDecodeError(str(exc)) from exc
+
+
+def _skip_whitespace(raw: bytes, pos: int) -> int:
+    length = len(raw)
+    while pos < length and raw[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _string_end(raw: bytes, pos: int) -> int:
+    """Return the offset just past the string starting at ``pos``."""
+    search = pos
+    while True:
+        quote = raw.find(b'"', search + 1)
+        if quote < 0:
+            raise PartialDecodeError("unterminated string")
+        backslash = quote - 1
+        while raw[backslash] == _BACKSLASH:
+            backslash -= 1
+        if (quote - 1 - backslash) % 2 == 0:
+            return quote + 1
+        search = quote
+
+
+def _value_end(raw: bytes, pos: int) -> int:
+    """Return the offset just past the JSON value starting at ``pos``."""
+    if pos >= len(raw):
+        raise PartialDecodeError("missing value")
+    first = raw[pos]
+    if first == _QUOTE:
+        return _string_end(raw, pos)
+    if first != _OPEN_BRACE and first != _OPEN_BRACKET:
+        match = _SCALAR_END.search(raw, pos)
+        end = match.start() if match else len(raw)
+        if end == pos:
+            raise PartialDecodeError(f"empty value at {pos}")
+        return end
+
+    depth = 0
+    search = pos
+    while True:
+        match = _STRUCTURAL.search(raw, search)
+        if not match:
+            raise PartialDecodeError("unterminated container")
+        token_pos = match.start()
+        token = raw[token_pos]
+        if token == _QUOTE:
+            search = _string_end(raw, token_pos)
+            continue
+        if token == _OPEN_BRACE or token == _OPEN_BRACKET:
+            depth += 1
+        else:
+            depth -= 1
+        search = token_pos + 1
+        if depth == 0:
+            return search
@@ -0,0 +1,221 @@
+"""Chunked JSONL scanners that only materialize selected lines."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from .compressed_logs import open_log
+from .prefix_fingerprints import BlockFingerprinter
+
+_CHUNK_SIZE = 4 * 1024 * 1024
+_REVERSE_BLOCK_SIZE = 64 * 1024
+_NEWLINE = b"\n"
+
+
+class JsonlScanner:
+    """
+    Scan a byte range of a JSONL file into a reused buffer.
+
+    Line boundaries and marker matches are located with ``bytearray.find`` on
+    the buffer, so lines that do not contain ``marker`` are counted but never
+    copied out. The buffer is not memory-mapped: a log truncated by its writer
+    mid-scan must not be able to fault the process. Compressed archives are
+    decompressed as a stream; offsets then refer to the decompressed bytes.
+
+    Iterating yields tuples of (line without trailing newline, offset just
+    past the line, whether the line was newline-terminated). Only the last
+    line of the range can be unterminated; callers decide whether it is
+    complete. After (or during) iteration:
+
+    - ``offset`` is the offset just past the last terminated line scanned
+    - ``lines_scanned`` counts terminated lines scanned
+    - ``lines_skipped`` counts terminated lines rejected by ``marker``
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        start: int = 0,
+        end: int = -1,
+        marker: Optional[bytes] = None,
+        buffer: Optional[bytearray] = None,
+        fingerprinter: Optional[BlockFingerprinter] = None,
+    ):
+        """
+        Initialize scanner.
+
+        Args:
+            file_path: File to scan
+            start: Byte offset to start from (must be at a line boundary)
+            end: Stop at this byte offset (-1 scans to EOF)
+            marker: Only yield lines containing these bytes (None yields all lines)
+            buffer: Optional buffer to reuse across scans
+            fingerprinter: Optional fingerprinter fed every terminated line,
+                whether or not it matches ``marker``
+        """
+        self.file_path = file_path
+        self.start = start
+        self.end = end
+        self.marker = marker
+        self.offset = start
+        self.lines_scanned = 0
+        self.lines_skipped = 0
+        self._buffer = buffer if buffer is not None else bytearray(_CHUNK_SIZE)
+        self._fingerprinter = fingerprinter
+
+    def __iter__(self) -> Iterator[Tuple[bytes, int, bool]]:
+        with open_log(self.file_path) as f:
+            if self.start:
+                f.seek(self.start)
+            buf = self._buffer
+            base = self.start  # file offset of buf[0]
+            filled = 0
+            scan = 0  # start of the first unscanned line in buf
+            remaining = self.end - self.start if self.end >= 0 else -1
+            eof = remaining == 0
+
+            while True:
+                if not eof:
+                    if scan:
+                        # Keep only the partial line carried over from the last chunk.
+                        buf[: filled - scan] = buf[scan:filled]
+                        base += scan
+                        filled -= scan
+                        scan = 0
+                    if filled == len(buf):
+                        buf.extend(bytes(len(buf) or _CHUNK_SIZE))
+                    space = len(buf) - filled
+                    if remaining >= 0:
+                        space = min(space, remaining)
+                    with memoryview(buf) as view:
+                        read = f.readinto(view[filled : filled + space])
+                    filled += read
+                    if remaining >= 0:
+                        remaining -= read
+                    eof = read == 0 or remaining == 0
+
+                last_newline = buf.rfind(_NEWLINE, scan, filled)
+                if last_newline >= 0:
+                    if self._fingerprinter is not None:
+                        self._fingerprinter.feed(buf, scan, last_newline + 1, base)
+                    yield from self._scan_complete_lines(buf, base, scan, last_newline + 1)
+                    scan = last_newline + 1
+                    self.offset = base + scan
+
+                if eof:
+                    if scan < filled:
+                        tail = bytes(buf[scan:filled])
+                        if self.marker is None or self.marker in tail:
+                            yield tail, base + filled, False
+                    return
+
+    def _scan_complete_lines(
+        self, buf: bytearray, base: int, start: int, stop: int
+    ) -> Iterator[Tuple[bytes, int, bool]]:
+        """Yield selected lines from ``buf[start:stop]``, which ends with a newline."""
+        pos = start
+        marker = self.marker
+        while pos < stop:
+            if marker is None:
+                line_start = pos
+                line_end = buf.find(_NEWLINE, pos, stop)
+            else:
+                match = buf.find(marker, pos, stop)
+                if match < 0:
+                    skipped = buf.count(_NEWLINE, pos, stop)
+                    self.lines_scanned += skipped
+                    self.lines_skipped += skipped
+                    return
+                line_start = buf.rfind(_NEWLINE, pos, match) + 1 or pos
+                skipped = buf.count(_NEWLINE, pos, line_start)
+                self.lines_scanned += skipped
+                self.lines_skipped += skipped
+                line_end = buf.find(_NEWLINE, match, stop)
+
+            pos = line_end + 1
+            self.lines_scanned += 1
+            self.offset = base + pos
+            yield bytes(buf[line_start:line_end]), base + pos, True
+
+
+class ReverseJsonlScanner:
+    """
+    Scan a JSONL file backwards from EOF in fixed-size blocks.
+
+    Append-only logs keep their newest entries at the tail, so callers that
+    only need a recent window stop iterating once they see an older entry and
+    never read the rest of the file. Iterating yields tuples of (line without
+    trailing newline, offset of the line start), newest line first. A trailing
+    line without a newline is yielded too; it may be incomplete.
+
+    After (or during) iteration ``bytes_read``, ``lines_scanned`` and
+    ``lines_skipped`` report the work done so far.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        end: int = -1,
+        marker: Optional[bytes] = None,
+        block_size: int = _REVERSE_BLOCK_SIZE,
+    ):
+        """
+        Initialize scanner.
+
+        Args:
+            file_path: File to scan
+            end: Byte offset to scan back from (-1 starts at EOF)
+            marker: Only yield lines containing these bytes (None yields all lines)
+            block_size: Bytes read per backwards step
+        """
+        self.file_path = file_path
+        self.end = end
+        self.marker = marker
+        self.block_size = max(1, block_size)
+        self.bytes_read = 0
+        self.lines_scanned = 0
+        self.lines_skipped = 0
+
+    def __iter__(self) -> Iterator[Tuple[bytes, int]]:
+        with open(self.file_path, "rb") as f:
+            pos = self.end if self.end >= 0 else f.seek(0, 2)
+            carry = b""  # start of the line cut off at the previous block boundary
+            while pos > 0:
+                size = min(self.block_size, pos)
+                pos -= size
+                f.seek(pos)
+                block = f.read(size)
+                self.bytes_read += len(block)
+                block += carry
+
+                if pos > 0:
+                    first_newline = block.find(_NEWLINE)
+                    if first_newline < 0:
+                        carry = block
+                        continue
+                    carry = block[:first_newline]
+                    body_start = first_newline + 1
+                else:
+                    carry = b""
+                    body_start = 0
+
+                yield from self._scan_block_reverse(block, pos, body_start)
+
+    def _scan_block_reverse(
+        self, block: bytes, base: int, start: int
+    ) -> Iterator[Tuple[bytes, int]]:
+        """Yield selected lines from ``block[start:]``, last line first."""
+        line_end = len(block)
+        if line_end > start and block.endswith(_NEWLINE):
+            line_end -= 1
+        while line_end >= start:
+            line_start = block.rfind(_NEWLINE, start, line_end) + 1 or start
+            line = block[line_start:line_end]
+            if line:
+                self.lines_scanned += 1
+                if self.marker is None or self.marker in line:
+                    yield line, base + line_start
+                else:
+                    self.lines_skipped += 1
+            line_end = line_start - 1
@@ -10,6 +10,8 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 from urllib.request import Request, urlopen
 
+from .json_backend import get_decoder
+
 
 LITELLM_PRICING_URL = (
     "https://raw.githubusercontent.com/BerriAI/litellm/main/"
@@ -88,7 +90,7 @@ class LiteLLMPricingCache:
             with urlopen(req, timeout=10) as resp:
                 if resp.status != 200:
                     return None
-                data = json.loads(resp.read().decode("utf-8"))
+                data = get_decoder().loads(resp.read())
         except Exception:
             return None
 
@@ -127,8 +129,7 @@ class LiteLLMPricingCache:
         if not self.cache_path.exists():
             return None
         try:
-            with open(self.cache_path, "r", encoding="utf-8") as f:
-                payload = json.load(f)
+            payload = get_decoder().load_file(self.cache_path)
         except Exception:
             return None
         if not isinstance(payload, dict):
@@ -5,6 +5,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 from ..core.models import OpenCodeTokenUsage
+from .json_backend import get_decoder
 
 
 class OpenCodeIndexCache:
@@ -31,8 +32,7 @@ class OpenCodeIndexCache:
             return {}
 
         try:
-            with open(self.cache_path, "r") as f:
-                return json.load(f)
+            return get_decoder().load_file(self.cache_path)
         except Exception:
             return {}
 
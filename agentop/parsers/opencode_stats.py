@@ -1,10 +1,11 @@
 """Parser for OpenCode stats from local storage."""
 
-import json
 from datetime import date, datetime
 from pathlib import Path
 from typing import Dict, Optional, List
 from ..core.models import OpenCodeTokenUsage, OpenCodeMessage, OpenCodeSession
+from .dir_listing import get_listing_cache
+from .json_backend import get_decoder
 from .opencode_cache import OpenCodeIndexCache
 
 
@@ -23,6 +24,7 @@ class OpenCodeStatsParser:
         else:
             self.storage_path = Path("~/.local/share/opencode/storage").expanduser()
         self.cache = OpenCodeIndexCache()
+        self._decoder = get_decoder()
 
     def _parse_timestamp(self, value: Optional[int]) -> datetime:
         if not value:
@@ -44,8 +46,7 @@ class OpenCodeStatsParser:
             return None
 
         try:
-            with open(message_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = self._decoder.load_file(message_file)
         except Exception:
             return None
 
@@ -91,8 +92,7 @@ class OpenCodeStatsParser:
             return None
 
         try:
-            with open(session_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = self._decoder.load_file(session_file)
         except Exception:
             return None
 
@@ -144,11 +144,14 @@ class OpenCodeStatsParser:
 
         last_scan = self.cache.get_last_scan()
 
-        for session_dir in message_dir.iterdir():
-            if not session_dir.is_dir():
+        listings = get_listing_cache()
+        for session_dir, is_dir in listings.children(message_dir):
+            if not is_dir:
                 continue
 
-            for message_file in session_dir.glob("*.json"):
+            for message_file, is_subdir in listings.children(session_dir):
+                if is_subdir or message_file.suffix != ".json":
+                    continue
                 message = self.parse_message(message_file)
                 if message and self._matches_time_range(message, time_range):
                     messages.append(message)
@@ -175,7 +178,9 @@ class OpenCodeStatsParser:
         if not session_dir.exists():
             return sessions
 
-        for session_file in session_dir.glob("*.json"):
+        for session_file, is_dir in get_listing_cache().children(session_dir):
+            if is_dir or session_file.suffix != ".json":
+                continue
             session = self.parse_session(session_file)
             if session:
                 sessions.append(session)
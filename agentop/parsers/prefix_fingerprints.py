@@ -0,0 +1,114 @@
+"""Chained block fingerprints for spotting history shared between JSONL logs."""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+# Blocks end at the first newline at least this many bytes after they start.
+BLOCK_BYTES = 64 * 1024
+_NEWLINE = b"\n"
+
+
+def _chain_hasher(chain: int) -> "hashlib._Hash":
+    return hashlib.blake2b(chain.to_bytes(8, "little", signed=True), digest_size=8)
+
+
+def _digest(hasher: "hashlib._Hash") -> int:
+    return int.from_bytes(hasher.digest(), "little", signed=True)
+
+
+class BlockFingerprinter:
+    """
+    Fingerprint a log's bytes in line-aligned blocks, each chained to the last.
+
+    A block's fingerprint covers every byte from the start of the file to the
+    end of the block, so two files share a fingerprint only if they share the
+    whole prefix up to that point: exactly what a resumed or forked Claude
+    session does when it copies the earlier conversation.
+
+    Bytes are fed in file order. Only whole blocks are kept: after a partial
+    read, ``offset`` is the last block boundary, and the next read resumes
+    hashing from there.
+    """
+
+    def __init__(self, chain: int = 0, offset: int = 0):
+        """
+        Initialize fingerprinter.
+
+        Args:
+            chain: Fingerprint of the bytes before ``offset`` (0 at file start)
+            offset: Block boundary to continue from
+        """
+        self.chain = chain
+        self.offset = offset
+        self.completed: List[int] = []
+        self._hasher = _chain_hasher(chain)
+        self._position = offset
+
+    def feed(self, buf: bytearray, start: int, stop: int, base: int) -> None:
+        """
+        Hash ``buf[start:stop]``, a run of complete lines at file offset ``base + start``.
+
+        Bytes before the current position (already hashed) are ignored.
+        """
+        pos = max(start, self._position - base)
+        if pos >= stop:
+            return
+        if base + pos != self._position:
+            raise ValueError("fingerprinted bytes must be contiguous")
+        while pos < stop:
+            threshold = self.offset + BLOCK_BYTES - base  # index where the block may end
+            if threshold > stop:
+                self._update(buf, pos, stop)
+                pos = stop
+                break
+            # ``buf[start:stop]`` ends with a newline, so a boundary is always found.
+            end = buf.find(_NEWLINE, max(pos, threshold - 1), stop) + 1
+            self._update(buf, pos, end)
+            self.chain = _digest(self._hasher)
+            self.completed.append(self.chain)
+            self.offset = base + end
+            self._hasher = _chain_hasher(self.chain)
+            pos = end
+        self._position = base + pos
+
+    def _update(self, buf: bytearray, start: int, stop: int) -> None:
+        with memoryview(buf) as view:
+            self._hasher.update(view[start:stop])
+
+
+def match_prefix(
+    file_path: Path, is_known: Callable[[int], bool]
+) -> Optional[Tuple[int, int]]:
+    """
+    Find the longest run of leading blocks whose fingerprints are already known.
+
+    Reading stops at the first unknown block, so a file that shares nothing
+    costs a single block read.
+
+    Returns:
+        (fingerprint, end offset) of the longest known prefix, or None if the
+        first block is not known
+    """
+    chain = 0
+    offset = 0
+    matched: Optional[Tuple[int, int]] = None
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(BLOCK_BYTES)
+            if len(block) < BLOCK_BYTES:
+                return matched
+            if not block.endswith(_NEWLINE):
+                rest = f.readline()
+                if not rest.endswith(_NEWLINE):
+                    return matched
+                block += rest
+            hasher = _chain_hasher(chain)
+            hasher.update(block)
+            chain = _digest(hasher)
+            if not is_known(chain):
+                return matched
+            offset += len(block)
+            matched = (chain, offset)
@@ -0,0 +1,239 @@
+"""Time-range-aware selection of log files worth opening."""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from .sidecar_journal import SidecarJournal
+
+
+def _day_start(day: date) -> float:
+    """Epoch seconds of local midnight at the start of ``day``."""
+    return datetime.combine(day, time.min).timestamp()
+
+
+@dataclass(frozen=True)
+class TimeRange:
+    """Half-open window [start, end) in epoch seconds; None leaves a side unbounded."""
+
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+    @classmethod
+    def all(cls) -> "TimeRange":
+        """Range covering every entry."""
+        return cls()
+
+    @classmethod
+    def days(cls, start: date, end: Optional[date] = None) -> "TimeRange":
+        """Range covering local days in [start, end)."""
+        return cls(_day_start(start), _day_start(end) if end else None)
+
+    @classmethod
+    def today(cls) -> "TimeRange":
+        """Range covering the current local day."""
+        today = date.today()
+        return cls.days(today, today + timedelta(days=1))
+
+    @classmethod
+    def this_month(cls) -> "TimeRange":
+        """Range covering the current local month."""
+        month_start = date.today().replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        return cls.days(month_start, next_month)
+
+    def covers(self, other: "TimeRange") -> bool:
+        """Whether every instant in ``other`` is also in this range."""
+        if self.start is not None and (other.start is None or other.start < self.start):
+            return False
+        if self.end is not None and (other.end is None or other.end > self.end):
+            return False
+        return True
+
+    def overlaps(self, first: float, last: float) -> bool:
+        """Whether entries timestamped within [first, last] can fall in this range."""
+        if self.start is not None and last < self.start:
+            return False
+        if self.end is not None and first >= self.end:
+            return False
+        return True
+
+
+class TimeSpan:
+    """Running min/max of the entry timestamps observed in one file."""
+
+    def __init__(self) -> None:
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+
+    def observe(self, timestamp: float) -> None:
+        """Widen the span to include ``timestamp``."""
+        if self.first is None or timestamp < self.first:
+            self.first = timestamp
+        if self.last is None or timestamp > self.last:
+            self.last = timestamp
+
+    def observe_day(self, day: date) -> None:
+        """Widen the span to include the whole of local ``day``."""
+        self.observe(_day_start(day))
+        self.observe(_day_start(day + timedelta(days=1)) - 1)
+
+
+@dataclass
+class PlanStats:
+    """Counters from the most recent scan plan."""
+
+    files_skipped: int = 0
+    bytes_skipped: int = 0
+
+
+class FileSpanIndex:
+    """
+    Sidecar cache of the first and last entry timestamp of each log file.
+
+    Spans are keyed by the file's size and mtime. Recording only ever widens a
+    stored span, so a stale entry can cost a wasted read but never a skipped one.
+    Only changed spans are written back (see ``SidecarJournal``).
+    """
+
+    def __init__(self, cache_path: Path):
+        """
+        Initialize sidecar.
+
+        Args:
+            cache_path: Path to the sidecar journal file
+        """
+        self.cache_path = cache_path
+        self._journal = SidecarJournal(cache_path)
+        self._data: Optional[Dict[str, Dict[str, Any]]] = None
+        self._changes: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    @property
+    def data(self) -> Dict[str, Dict[str, Any]]:
+        """Cached spans by path, loaded on first use."""
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load spans from disk."""
+        return self._journal.load()
+
+    def save(self) -> None:
+        """Write changed spans to disk."""
+        if self._data is None:
+            return
+        if self._journal.save(self._data, self._changes):
+            self._changes = {}
+
+    def lookup(
+        self, path: str, stat_result: os.stat_result
+    ) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """
+        Return the cached (first, last) entry timestamps for a file.
+
+        Returns:
+            (first, last) if the file is unchanged, (first, None) if it has only
+            grown since it was recorded, (None, None) if it holds no timestamped
+            entries, or None if nothing usable is cached.
+        """
+        entry = self.data.get(path)
+        if not isinstance(entry, dict):
+            return None
+        size = entry.get("size")
+        if not isinstance(size, int):
+            return None
+        first = entry.get("first")
+        last = entry.get("last")
+        if size == stat_result.st_size and entry.get("mtime_ns") == stat_result.st_mtime_ns:
+            return first, last
+        if stat_result.st_size > size and first is not None:
+            # Append-only logs keep their earliest entries when they grow.
+            return first, None
+        return None
+
+    def recorded_span(
+        self, path: Optional[str]
+    ) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """Return the last recorded (first, last) span of a file, however stale."""
+        entry = self.data.get(path) if path else None
+        if not isinstance(entry, dict):
+            return None
+        return entry.get("first"), entry.get("last")
+
+    def record(self, path: str, size: int, mtime_ns: int, span: TimeSpan) -> None:
+        """Merge an observed span into the cached span for a file."""
+        entry = self.data.get(path)
+        first, last = span.first, span.last
+        if isinstance(entry, dict):
+            if entry.get("first") is not None:
+                first = entry["first"] if first is None else min(first, entry["first"])
+            if entry.get("last") is not None:
+                last = entry["last"] if last is None else max(last, entry["last"])
+        entry = {"size": size, "mtime_ns": mtime_ns, "first": first, "last": last}
+        self.data[path] = entry
+        self._changes[path] = entry
+
+    def retain(self, paths: Set[str]) -> None:
+        """Forget files that no longer exist."""
+        stale = [path for path in self.data if path not in paths]
+        for path in stale:
+            del self.data[path]
+            self._changes[path] = None
+
+
+class ScanPlanner:
+    """Choose which files can contain entries in a requested time range."""
+
+    def __init__(self, spans: FileSpanIndex):
+        """
+        Initialize planner.
+
+        Args:
+            spans: Sidecar of cached per-file entry timestamp spans
+        """
+        self.spans = spans
+        self.last_plan_stats = PlanStats()
+
+    def should_scan(
+        self, path: str, stat_result: os.stat_result, time_range: TimeRange
+    ) -> bool:
+        """
+        Decide whether a file can hold entries in ``time_range``.
+
+        A file last modified before the range starts cannot contain later
+        entries. Otherwise the cached entry span, when valid, is compared with
+        the range.
+        """
+        if time_range.start is not None and stat_result.st_mtime < time_range.start:
+            return False
+
+        cached = self.spans.lookup(path, stat_result)
+        if cached is None:
+            return True
+        first, last = cached
+        if first is None:
+            # Unchanged and known to hold no timestamped entries.
+            return False
+        return time_range.overlaps(first, last if last is not None else float("inf"))
+
+    def plan(
+        self, files: Iterable[Tuple[Path, os.stat_result]], time_range: TimeRange
+    ) -> Iterator[Tuple[Path, os.stat_result]]:
+        """
+        Yield the files worth opening for ``time_range``.
+
+        ``last_plan_stats`` is updated as files are considered.
+        """
+        stats = PlanStats()
+        self.last_plan_stats = stats
+        for file_path, stat_result in files:
+            if self.should_scan(str(file_path), stat_result, time_range):
+                yield file_path, stat_result
+            else:
+                stats.files_skipped += 1
+                stats.bytes_skipped += stat_result.st_size
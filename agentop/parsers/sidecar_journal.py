@@ -0,0 +1,130 @@
+"""Append-only persistence for the path-keyed JSON sidecar caches."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .json_backend import get_decoder
+
+# Compact once the journal holds more change records than this, or than live keys.
+_MIN_COMPACT_RECORDS = 256
+
+
+class SidecarJournal:
+    """
+    Persist a path-keyed dict as a JSONL journal of changes.
+
+    The first line is a snapshot object; every later line is a ``[key, value]``
+    record, with a null value for a removed key. Saving appends only the keys
+    that changed, so a refresh that touched a few files writes a few lines
+    however many files the sidecar knows. Once the records outnumber the live
+    keys the journal is compacted: a fresh snapshot is written to a temporary
+    file in the same directory and moved over the journal with ``os.replace``,
+    so a crash leaves either the old or the new file. A record torn by a crash
+    mid-append is skipped on load and forces the next save to compact.
+
+    Sidecars written as a single JSON object load as a snapshot with no records.
+    """
+
+    def __init__(self, path: Path, min_compact_records: int = _MIN_COMPACT_RECORDS):
+        """
+        Initialize journal.
+
+        Args:
+            path: Path to the journal file
+            min_compact_records: Records tolerated before compacting a small journal
+        """
+        self.path = path
+        self.min_compact_records = min_compact_records
+        self._records = 0
+        self._clean_tail = True
+
+    def load(self) -> Dict[str, Any]:
+        """Replay the journal into a dict; empty if it is missing or unreadable."""
+        data: Dict[str, Any] = {}
+        self._records = 0
+        self._clean_tail = True
+        try:
+            with open(self.path, "rb") as f:
+                content = f.read()
+        except OSError:
+            return data
+
+        decoder = get_decoder()
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = decoder.loads(line)
+            except ValueError:
+                self._clean_tail = False
+                continue
+            if isinstance(item, dict):
+                data.update(item)
+            elif isinstance(item, list) and len(item) == 2 and isinstance(item[0], str):
+                key, value = item
+                if value is None:
+                    data.pop(key, None)
+                else:
+                    data[key] = value
+                self._records += 1
+        if content and not content.endswith(b"\n"):
+            self._clean_tail = False
+        return data
+
+    def save(self, data: Dict[str, Any], changes: Dict[str, Optional[Any]]) -> bool:
+        """
+        Persist ``changes`` (new values by key, None for removed keys).
+
+        Args:
+            data: Every live entry, written out when the journal is compacted
+            changes: Entries changed since the last successful save
+
+        Returns:
+            True if the changes are on disk
+        """
+        if not changes:
+            return True
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            records = self._records + len(changes)
+            if (
+                not self._clean_tail
+                or not self.path.exists()
+                or records > max(self.min_compact_records, len(data))
+            ):
+                self._compact(data)
+                return True
+            lines = "".join(json.dumps([key, value]) + "\n" for key, value in changes.items())
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self._records = records
+        except OSError:
+            # A partial append may have left a torn line behind.
+            self._clean_tail = False
+            return False
+        return True
+
+    def _compact(self, data: Dict[str, Any]) -> None:
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+                f.write("\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        self._records = 0
+        self._clean_tail = True
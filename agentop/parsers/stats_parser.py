@@ -2,26 +2,46 @@
 
 from __future__ import annotations
 
-import json
+import hashlib
+import itertools
+import logging
 import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional, Iterable, Set, Tuple
+from typing import Dict, Any, Optional, Iterable, List, Set, Tuple, Union
 
 from ..core.constants import (
     CLAUDE_CONFIG_DIR_ENV,
     CLAUDE_PROJECTS_DIRNAME,
     DEFAULT_CLAUDE_CONFIG_DIRS,
     CLAUDE_PRICING,
+    PARSE_WORKERS_ENV,
 )
 from ..parsers.litellm_pricing import LiteLLMCostCalculator
-from ..core.models import TokenUsage, CostEstimate
+from .billing_blocks import BillingBlockTracker, BlockEntry
+from .claude_index import ClaudeUsageIndex, UsageRow, is_busy_error
+from .compressed_logs import ARCHIVE_ERRORS, is_archive, is_jsonl_log, log_stem
+from .dedup_index import DedupIndex, dedup_key
+from .dir_listing import get_listing_cache
+from .json_backend import get_decoder
+from .json_fields import PartialDecodeError, extract_fields
+from .file_cursor import CURSOR_RESET, CURSOR_UNCHANGED, FileCursor
+from .jsonl_scanner import JsonlScanner, ReverseJsonlScanner
+from .prefix_fingerprints import BlockFingerprinter, match_prefix
+from .scan_planner import FileSpanIndex, PlanStats, ScanPlanner, TimeRange, TimeSpan
+from .timestamps import local_day, parse_iso_epoch
+from ..core.models import BillingBlock, TokenUsage, CostEstimate, UsageSnapshot
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class _UsageEntry:
-    timestamp: datetime
+    timestamp: float  # epoch seconds
+    day: date  # local day of ``timestamp``
     input_tokens: int
     output_tokens: int
     cache_write_tokens: int
@@ -29,25 +49,132 @@ class _UsageEntry:
     model: Optional[str]
     cost_usd: Optional[float]
     session_id: Optional[str]
+    dedup_key: Optional[int] = None
+
+
+@dataclass
+class ScanStats:
+    """Counters from the most recent usage scan."""
+
+    files_read: int = 0
+    bytes_read: int = 0
+    lines_read: int = 0
+    lines_skipped: int = 0
+    shared_bytes_skipped: int = 0
+
+    def merge(self, other: "ScanStats") -> None:
+        """Add another scan's counters to this one."""
+        self.files_read += other.files_read
+        self.bytes_read += other.bytes_read
+        self.lines_read += other.lines_read
+        self.lines_skipped += other.lines_skipped
+        self.shared_bytes_skipped += other.shared_bytes_skipped
+
+
+# (path, advanced cursor, rows, entry time span, new block fingerprints) per parsed file.
+_ParsedFile = Tuple[str, FileCursor, Iterable[UsageRow], TimeSpan, List[int]]
+
+# Usage-bearing lines always carry this key; anything else is skipped before decoding.
+_USAGE_MARKER = b'"usage"'
+
+# Lines this large (typically embedded tool output or images) are walked with a
+# targeted extractor that decodes only the fields below.
+_PARTIAL_DECODE_MIN_BYTES = 64 * 1024
+_USAGE_FIELDS = {
+    "message": {"id": True, "model": True, "usage": True},
+    "requestId": True,
+    "timestamp": True,
+    "costUSD": True,
+    "model": True,
+}
+
+# Dedup keys for entries this recent stay in memory between scans; duplicates of
+# older entries are still rejected by the index on insert.
+_DEDUP_WINDOW_DAYS = 35
+
+# Billing blocks are re-anchored from this much recent history after a restart.
+_BLOCK_SEED_HOURS = 24
+
+# Below this many unread bytes a scan is cheaper than starting worker processes.
+_PARALLEL_MIN_BYTES = 32 * 1024 * 1024
 
 
 class ClaudeStatsParser:
     """Parse Claude Code JSONL usage data under ~/.config/claude/projects."""
 
-    def __init__(self, stats_file: Optional[str] = None, cache_ttl_seconds: int = 10):
+    def __init__(
+        self,
+        stats_file: Optional[str] = None,
+        cache_ttl_seconds: int = 10,
+        index_path: Optional[str] = None,
+        parallel_workers: Optional[int] = None,
+    ):
         """
         Initialize parser.
 
         Args:
             stats_file: Optional custom Claude data directory or JSONL file
             cache_ttl_seconds: Cache usage aggregation for N seconds
+            index_path: Optional path to the persistent usage index database
+            parallel_workers: Parse large scans across N processes (0 or 1 disables;
+                default: AGENTOP_PARSE_WORKERS)
         """
         self._custom_path = Path(stats_file).expanduser() if stats_file else None
-        self._usage_cache: Optional[Dict[str, Any]] = None
         self._last_scan: Optional[datetime] = None
-        self._last_updated: Optional[datetime] = None
         self.cache_ttl_seconds = max(2, cache_ttl_seconds)
+        if parallel_workers is None:
+            parallel_workers = self._workers_from_env()
+        self.parallel_workers = max(0, parallel_workers)
         self._cost_calculator = LiteLLMCostCalculator()
+        self._decoder = get_decoder()
+        self._index_path = (
+            Path(index_path).expanduser() if index_path else self._default_index_path()
+        )
+        self._index_store: Optional[ClaudeUsageIndex] = None
+        self._index_rebuilt = False
+        self._planner = ScanPlanner(
+            FileSpanIndex(self._index_path.with_name(self._index_path.stem + ".spans.json"))
+        )
+        self._synced_range: Optional[TimeRange] = None
+        self._seen: Optional[DedupIndex] = None
+        self._blocks = BillingBlockTracker()
+        self._blocks_seeded = False
+        self._newest_mtime_ns: Optional[int] = None
+        self._snapshot: Optional[UsageSnapshot] = None
+        self._snapshot_scan: Optional[datetime] = None
+        self.last_scan_stats = ScanStats()
+        self._scan_buffer = bytearray()
+
+    @property
+    def _index(self) -> ClaudeUsageIndex:
+        # Opened lazily so shard workers, which only parse lines, never touch it.
+        if self._index_store is None:
+            self._index_store = ClaudeUsageIndex(self._index_path)
+        return self._index_store
+
+    def get_snapshot(self) -> UsageSnapshot:
+        """
+        Get today's and this month's usage from a single sync.
+
+        The snapshot is rebuilt only after a sync actually ran, so repeated calls
+        within the cache TTL return the same object.
+
+        On a first launch, before anything is indexed, the snapshot is partial:
+        today's figures come from the tail of today's files and the month,
+        breakdowns and billing block wait for the next call, which does the
+        full sync.
+
+        Returns:
+            Immutable snapshot of today, month, breakdown and billing block figures
+        """
+        if self._snapshot is None and self._last_scan is None and self._index.is_empty():
+            self._snapshot = self._build_cold_snapshot()
+            return self._snapshot
+        self._collect_usage(self._default_range())
+        if self._snapshot is None or self._snapshot_scan != self._last_scan:
+            self._snapshot = self._build_snapshot()
+            self._snapshot_scan = self._last_scan
+        return self._snapshot
 
     def get_today_usage(self) -> Dict[str, Any]:
         """
@@ -56,9 +183,14 @@ class ClaudeStatsParser:
         Returns:
             Dictionary with today's tokens, cost, and session info
         """
-        usage = self._collect_usage()
         today = date.today()
-        bucket = usage["buckets"].get(today)
+        if self._last_scan is None and self._index.is_empty():
+            # Nothing indexed yet: answer from the tail of today's files instead
+            # of waiting for a full build over the whole history.
+            return self._format_bucket(self._tail_usage(TimeRange.today()))
+
+        self._collect_usage(self._default_range())
+        bucket = self._index.usage_between(today, today + timedelta(days=1))
         return self._format_bucket(bucket)
 
     def get_month_usage(self) -> Dict[str, Any]:
@@ -68,28 +200,84 @@ class ClaudeStatsParser:
         Returns:
             Dictionary with month's tokens and cost
         """
-        usage = self._collect_usage()
-        today = date.today()
-        total_tokens = TokenUsage()
-        total_cost = 0.0
-        cost_seen = False
-
-        for usage_date, bucket in usage["buckets"].items():
-            if usage_date.year != today.year or usage_date.month != today.month:
-                continue
-            total_tokens.input_tokens += bucket["tokens"].input_tokens
-            total_tokens.output_tokens += bucket["tokens"].output_tokens
-            total_tokens.cache_write_tokens += bucket["tokens"].cache_write_tokens
-            total_tokens.cache_read_tokens += bucket["tokens"].cache_read_tokens
-            if bucket["cost_seen"]:
-                total_cost += bucket["cost"]
-                cost_seen = True
+        self._collect_usage(self._default_range())
+        month_start = date.today().replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        bucket = self._index.usage_between(month_start, next_month)
 
         return {
-            "tokens": total_tokens,
-            "cost": total_cost if cost_seen else 0.0,
+            "tokens": bucket["tokens"],
+            "cost": bucket["cost"] if bucket["cost_seen"] else 0.0,
         }
 
+    def get_active_block(self) -> Optional[BillingBlock]:
+        """
+        Get the current 5-hour billing block from local logs.
+
+        This needs no network access, so it stays available when the quota API
+        cannot be reached.
+
+        Returns:
+            The active block with tokens, cost and burn rate, or None if idle
+        """
+        self._collect_usage(self._default_range())
+        return self._blocks.active_block()
+
+    def get_usage_between(self, start: date, end: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Get usage for an arbitrary window of local days.
+
+        Args:
+            start: First day to include
+            end: Day after the last one to include (default: no upper bound)
+
+        Returns:
+            Dictionary with tokens, cost, and session info
+        """
+        self._collect_usage(TimeRange.days(start, end))
+        bucket = self._index.usage_between(start, end or date.max)
+        return self._format_bucket(bucket)
+
+    def aggregate_by_model(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate usage by model.
+
+        Args:
+            start: First day to include (default: first day of this month)
+            end: Day after the last one to include (default: no upper bound)
+
+        Returns:
+            Usage dictionaries like ``get_usage_between``, keyed by model
+        """
+        return self._aggregate_by("model", start, end)
+
+    def aggregate_by_project(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Aggregate usage by ``projects/<slug>`` directory; see ``aggregate_by_model``."""
+        return self._aggregate_by("project", start, end)
+
+    def aggregate_by_session(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Aggregate usage by session id; see ``aggregate_by_model``."""
+        return self._aggregate_by("session", start, end)
+
+    def _aggregate_by(
+        self, dimension: str, start: Optional[date], end: Optional[date]
+    ) -> Dict[str, Dict[str, Any]]:
+        # Every dimension is written by the same ingestion pass, so a breakdown
+        # only needs the index synced for its window, never a dedicated scan.
+        if start is None:
+            start = date.today().replace(day=1)
+            self._collect_usage(self._default_range())
+        else:
+            self._collect_usage(TimeRange.days(start, end))
+        buckets = self._index.usage_by(dimension, start, end or date.max)
+        return {key: self._format_bucket(bucket) for key, bucket in buckets.items()}
+
     def get_stats_last_updated(self) -> Optional[datetime]:
         """
         Get the last modified time of the newest Claude JSONL file.
@@ -97,80 +285,472 @@ class ClaudeStatsParser:
         Returns:
             Datetime of last update, or None if unavailable
         """
-        self._collect_usage()
-        return self._last_updated
+        self._collect_usage(self._default_range())
+        return self._last_updated()
+
+    @property
+    def last_plan_stats(self) -> PlanStats:
+        """Files and bytes the most recent scan skipped as outside its time range."""
+        return self._planner.last_plan_stats
+
+    def _build_snapshot(self) -> UsageSnapshot:
+        today = date.today()
+        month_start = today.replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        today_usage = self._format_bucket(
+            self._index.usage_between(today, today + timedelta(days=1))
+        )
+        month_usage = self._format_bucket(self._index.usage_between(month_start, next_month))
+        return UsageSnapshot(
+            taken_at=datetime.now(),
+            tokens_today=today_usage["tokens"],
+            tokens_this_month=month_usage["tokens"],
+            cost_today=CostEstimate(today_usage["cost"]),
+            cost_this_month=CostEstimate(month_usage["cost"]),
+            sessions_today=today_usage["total_sessions"],
+            sessions_this_month=month_usage["total_sessions"],
+            last_updated=self._last_updated(),
+            billing_block=self._blocks.active_block(),
+            by_model={
+                model: bucket["tokens"]
+                for model, bucket in self._index.usage_by("model", month_start, next_month).items()
+            },
+            by_project={
+                project: bucket["tokens"]
+                for project, bucket in self._index.usage_by(
+                    "project", month_start, next_month
+                ).items()
+            },
+        )
+
+    def _build_cold_snapshot(self) -> UsageSnapshot:
+        today_usage = self._format_bucket(self._tail_usage(TimeRange.today()))
+        return UsageSnapshot(
+            taken_at=datetime.now(),
+            tokens_today=today_usage["tokens"],
+            cost_today=CostEstimate(today_usage["cost"]),
+            sessions_today=today_usage["total_sessions"],
+            last_updated=self._last_updated(),
+            partial=True,
+        )
+
+    def _last_updated(self) -> Optional[datetime]:
+        if self._newest_mtime_ns is not None:
+            return datetime.fromtimestamp(self._newest_mtime_ns / 1_000_000_000)
+        return self._index.last_updated()
+
+    def _workers_from_env(self) -> int:
+        raw = os.environ.get(PARSE_WORKERS_ENV, "").strip()
+        if raw == "auto":
+            return os.cpu_count() or 1
+        try:
+            return int(raw) if raw else 0
+        except ValueError:
+            return 0
+
+    def _default_index_path(self) -> Path:
+        # Separate indexes per data source so a custom path never evicts the default one.
+        source = str(self._custom_path or os.environ.get(CLAUDE_CONFIG_DIR_ENV, "").strip())
+        digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+        return Path.home() / f".cache/agentop/claude-usage-{digest}.sqlite"
+
+    def _default_range(self) -> TimeRange:
+        # Today, this month and the billing block seed window share one sync.
+        month = TimeRange.this_month()
+        horizon = datetime.now().timestamp() - _BLOCK_SEED_HOURS * 3600
+        return TimeRange(min(month.start, horizon), month.end)
 
-    def _collect_usage(self) -> Dict[str, Any]:
-        if self._usage_cache is not None and self._last_scan:
+    def _collect_usage(self, time_range: TimeRange) -> None:
+        if self._last_scan and self._synced_range and self._synced_range.covers(time_range):
             age = (datetime.now() - self._last_scan).total_seconds()
             if age < self.cache_ttl_seconds:
-                return self._usage_cache
+                return
 
-        if self._usage_cache is not None and not self._last_scan:
-            return self._usage_cache
+        try:
+            recent = self._sync_index(time_range)
+        except sqlite3.Error as exc:
+            self._seen = None
+            if is_busy_error(exc):
+                # Another agentop instance holds the index lock; retry on the next tick.
+                return
+            self._recover_index(exc)
+            self._collect_usage(time_range)
+            return
+        except BaseException:
+            # Keys from a rolled-back sync were never stored; reload them next time.
+            self._seen = None
+            raise
+        self._planner.spans.save()
+        self._update_blocks(recent)
+        self._synced_range = time_range
+        self._last_scan = datetime.now()
 
-        buckets: Dict[date, Dict[str, Any]] = {}
-        self._last_updated = None
+    def _recover_index(self, exc: sqlite3.Error) -> None:
+        """
+        Replace an index that failed for a reason other than lock contention.
 
-        processed_hashes: Set[str] = set()
-        for file_path in self._iter_usage_files():
-            try:
-                mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                if self._last_updated is None or mtime > self._last_updated:
-                    self._last_updated = mtime
-            except Exception:
-                pass
+        Disk I/O errors, corruption and schema mismatches do not go away on
+        their own, so the index is rebuilt from the logs; if a rebuilt index
+        fails too, it is kept in memory from then on.
+
+        Raises:
+            sqlite3.Error: ``exc``, if even the in-memory index failed
+        """
+        index = self._index
+        if index.in_memory:
+            raise exc
+        in_memory = self._index_rebuilt
+        logger.warning(
+            "Claude usage index %s failed (%s); %s",
+            index.cache_path,
+            exc,
+            "keeping it in memory" if in_memory else "rebuilding it",
+        )
+        index.reset(in_memory=in_memory)
+        self._index_rebuilt = True
+        self._blocks_seeded = False
+        self._synced_range = None
+        self._last_scan = None
+
+    def _sync_index(self, time_range: TimeRange) -> List[BlockEntry]:
+        """
+        Bring the index up to date for ``time_range``.
+
+        Returns:
+            Newly indexed entries recent enough to affect the billing block
+        """
+        horizon = datetime.now().timestamp() - _BLOCK_SEED_HOURS * 3600
+        recent: List[BlockEntry] = []
+        with self._index.transaction():
+            cursors = self._index.load_cursors()
+            plan = self._plan_scan(cursors, time_range)
+            seen = self._load_seen()
 
-            for entry in self._iter_entries(file_path, processed_hashes):
-                if entry.timestamp.tzinfo:
-                    entry_date = entry.timestamp.astimezone().date()
-                else:
-                    entry_date = entry.timestamp.date()
-                bucket = buckets.setdefault(
-                    entry_date,
-                    {
-                        "tokens": TokenUsage(),
-                        "cost": 0.0,
-                        "cost_seen": False,
-                        "sessions": set(),
-                    },
+            pending: List[Tuple[Path, os.stat_result, FileCursor]] = []
+            archives: List[Tuple[Path, os.stat_result, FileCursor]] = []
+            for file_path, stat_result, cursor in plan:
+                if cursor.classify(stat_result) != CURSOR_UNCHANGED:
+                    if is_archive(file_path):
+                        archives.append((file_path, stat_result, cursor))
+                    else:
+                        pending.append((file_path, stat_result, cursor))
+                elif cursor.mtime_ns != stat_result.st_mtime_ns:
+                    cursor.advance(stat_result, cursor.offset)
+                    self._index.save_cursor(str(file_path), cursor)
+
+            stats = ScanStats()
+            if self._should_parse_in_parallel(pending):
+                parsed = self._parse_parallel(pending, stats, seen)
+            else:
+                parsed = self._parse_serial(pending, stats, seen)
+            # Archives hold the oldest history, so they claim shared entries first.
+            parsed = itertools.chain(self._parse_archives(archives, stats, seen), parsed)
+
+            # Rows are inserted in plan order, so the first file to contain a
+            # message/request hash owns it exactly as in a serial scan.
+            for path_key, cursor, rows, span, fingerprints in parsed:
+                self._index.add_rows(self._observe_recent(rows, horizon, recent))
+                self._index.add_fingerprints(path_key, fingerprints)
+                self._index.save_cursor(path_key, cursor)
+                self._planner.spans.record(path_key, cursor.size, cursor.mtime_ns, span)
+            self.last_scan_stats = stats
+        seen.expire_before(date.today() - timedelta(days=_DEDUP_WINDOW_DAYS))
+        return recent
+
+    def _observe_recent(
+        self, rows: Iterable[UsageRow], horizon: float, recent: List[BlockEntry]
+    ) -> Iterable[UsageRow]:
+        """Pass rows through, collecting those at or after ``horizon`` as block entries."""
+        for row in rows:
+            if row.timestamp >= horizon:
+                recent.append(_block_entry(row))
+            yield row
+
+    def _update_blocks(self, recent: List[BlockEntry]) -> None:
+        if self._blocks_seeded:
+            self._blocks.add(recent)
+            return
+        # First sync or rows forgotten: anchor blocks from the index rather than from
+        # whatever subset of rows this sync happened to insert.
+        horizon = datetime.now().timestamp() - _BLOCK_SEED_HOURS * 3600
+        self._blocks.reset()
+        self._blocks.add(_block_entry(row) for row in self._index.entries_since(horizon))
+        self._blocks_seeded = True
+
+    def _load_seen(self) -> DedupIndex:
+        """Return the in-memory dedup keys, reloading recent ones from the index."""
+        if self._seen is None:
+            seen = DedupIndex()
+            window_start = date.today() - timedelta(days=_DEDUP_WINDOW_DAYS)
+            for key, day in self._index.dedup_keys_since(window_start):
+                seen.add(key, day)
+            self._seen = seen
+        return self._seen
+
+    def _parse_serial(
+        self,
+        pending: List[Tuple[Path, os.stat_result, FileCursor]],
+        stats: ScanStats,
+        seen: DedupIndex,
+    ) -> Iterable[_ParsedFile]:
+        for file_path, stat_result, cursor in pending:
+            span = TimeSpan()
+            fingerprints: List[int] = []
+            # Consumed lazily: files parsed earlier in this sync are already
+            # fingerprinted by the time this one is matched against them.
+            self._skip_shared_prefix(file_path, cursor, stats, span)
+            path_key, project = str(file_path), _project_of(file_path)
+            rows = (
+                self._to_row(path_key, project, entry)
+                for entry in self._iter_entries(
+                    file_path, seen, cursor, stat_result, stats, span, fingerprints
                 )
-                bucket["tokens"].input_tokens += entry.input_tokens
-                bucket["tokens"].output_tokens += entry.output_tokens
-                bucket["tokens"].cache_write_tokens += entry.cache_write_tokens
-                bucket["tokens"].cache_read_tokens += entry.cache_read_tokens
-                if entry.session_id:
-                    bucket["sessions"].add(entry.session_id)
-                if entry.cost_usd is not None:
-                    bucket["cost"] += entry.cost_usd
-                    bucket["cost_seen"] = True
-
-        self._usage_cache = {"buckets": buckets}
-        self._last_scan = datetime.now()
-        return self._usage_cache
+            )
+            yield path_key, cursor, rows, span, fingerprints
+
+    def _should_parse_in_parallel(
+        self, pending: List[Tuple[Path, os.stat_result, FileCursor]]
+    ) -> bool:
+        if self.parallel_workers < 2 or len(pending) < 2:
+            return False
+        pending_bytes = sum(st.st_size - cursor.offset for _, st, cursor in pending)
+        return pending_bytes >= _PARALLEL_MIN_BYTES
 
-    def _format_bucket(self, bucket: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-        if not bucket:
-            return {
-                "tokens": TokenUsage(),
-                "cost": 0.0,
-                "total_sessions": 0,
-            }
+    def _parse_parallel(
+        self,
+        pending: List[Tuple[Path, os.stat_result, FileCursor]],
+        stats: ScanStats,
+        seen: DedupIndex,
+    ) -> Iterable[_ParsedFile]:
+        # Workers cannot see the index, so shared prefixes are matched up front
+        # against files fingerprinted by earlier syncs.
+        spans: Dict[str, TimeSpan] = {}
+        for file_path, _, cursor in pending:
+            spans[str(file_path)] = TimeSpan()
+            self._skip_shared_prefix(file_path, cursor, stats, spans[str(file_path)])
+        shards = _split_shards(pending, self.parallel_workers)
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            for shard_result, shard_stats in pool.map(_parse_shard, shards):
+                stats.merge(shard_stats)
+                for path_key, cursor, rows, span, fingerprints in shard_result:
+                    # Workers dedup within their shard only; later shards and ticks
+                    # check against every key kept here.
+                    kept = [
+                        row
+                        for row in rows
+                        if row.dedup_key is None or seen.add(row.dedup_key, row.day)
+                    ]
+                    prefix = spans[path_key]
+                    if prefix.first is not None:
+                        span.observe(prefix.first)
+                        span.observe(prefix.last)
+                    yield path_key, cursor, kept, span, fingerprints
+
+    def _skip_shared_prefix(
+        self, file_path: Path, cursor: FileCursor, stats: ScanStats, span: TimeSpan
+    ) -> None:
+        """
+        Move a new file's cursor past history already ingested from another file.
+
+        Resumed and forked sessions start with a verbatim copy of an earlier
+        conversation. When the file's leading block fingerprints were already
+        recorded, every line in that prefix was ingested (or deduplicated)
+        before, so it is skipped without being decoded.
+        """
+        if cursor.offset or cursor.fingerprint_offset:
+            return
+        try:
+            match = match_prefix(file_path, self._index.has_fingerprint)
+        except OSError:
+            return
+        if match is None:
+            return
+        chain, end = match
+        cursor.offset = cursor.fingerprint_offset = end
+        cursor.fingerprint = chain
+        stats.shared_bytes_skipped += end
+        owner = self._index.fingerprint_owner(chain)
+        if owner is not None:
+            self._index.set_prefix_source(str(file_path), owner)
+        # Widen the span by the source file's: over-wide spans cost at most a
+        # wasted read, while a narrow one could hide the copied history.
+        source = self._planner.spans.recorded_span(owner)
+        if source is not None:
+            for timestamp in source:
+                if timestamp is not None:
+                    span.observe(timestamp)
+
+    def _parse_archives(
+        self,
+        archives: List[Tuple[Path, os.stat_result, FileCursor]],
+        stats: ScanStats,
+        seen: DedupIndex,
+    ) -> Iterable[_ParsedFile]:
+        """
+        Yield rows of compressed archives, decompressing each one at most once.
+
+        Parsed rows are kept in the index's archive store, so after a rebuild an
+        unchanged archive is replayed from there. Cross-file dedup is applied
+        on the way out, as for parallel shards.
+        """
+        for file_path, stat_result, cursor in archives:
+            path_key = str(file_path)
+            size, mtime_ns = stat_result.st_size, stat_result.st_mtime_ns
+            rows = self._index.archive_rows(path_key, size, mtime_ns)
+            if rows is None:
+                rows = self._read_archive(file_path, stats)
+                if rows is None:
+                    # Unreadable for now (corrupt, or zstandard missing); retry later.
+                    continue
+                self._index.store_archive(path_key, size, mtime_ns, rows)
+            span = TimeSpan()
+            kept = []
+            for row in rows:
+                span.observe(row.timestamp)
+                if row.dedup_key is None or seen.add(row.dedup_key, row.day):
+                    kept.append(row)
+            cursor.advance(stat_result, size)
+            yield path_key, cursor, kept, span, []
+
+    def _read_archive(self, file_path: Path, stats: ScanStats) -> Optional[List[UsageRow]]:
+        """Parse a whole compressed archive, deduplicating only within it."""
+        path_key, project = str(file_path), _project_of(file_path)
+        session_id = self._extract_session_id(file_path)
+        seen = DedupIndex()
+        rows: List[UsageRow] = []
+        scanner = JsonlScanner(file_path, marker=_USAGE_MARKER, buffer=self._scan_buffer)
+        try:
+            for raw, _, _ in scanner:
+                line = raw.strip()
+                if not line:
+                    continue
+                entry = self._parse_line(line, seen, session_id)
+                if entry:
+                    rows.append(self._to_row(path_key, project, entry))
+        except ARCHIVE_ERRORS:
+            return None
+        stats.files_read += 1
+        stats.bytes_read += scanner.offset
+        stats.lines_read += scanner.lines_scanned
+        stats.lines_skipped += scanner.lines_skipped
+        return rows
+
+    def _plan_scan(
+        self, cursors: Dict[str, FileCursor], time_range: TimeRange
+    ) -> List[Tuple[Path, os.stat_result, FileCursor]]:
+        """
+        Stat every usage file and pair it with its cursor.
+
+        Indexed files are always tailed. Files not indexed yet are only added
+        when they can hold entries in ``time_range``; the rest stay unindexed
+        until a query needs them. Files that were removed, truncated or replaced
+        are forgotten (see ``_forget_files``) and, if still present, read again
+        from the start; ``cursors`` is updated to match.
+
+        Returns:
+            List of (path, stat, cursor)
+        """
+        files = self._stat_usage_files()
+        seen = {str(file_path) for file_path, _ in files}
+        self._planner.spans.retain(seen)
+        self._index.retain_archives({key for key in seen if is_archive(Path(key))})
+        self._newest_mtime_ns = max((st.st_mtime_ns for _, st in files), default=None)
 
+        invalid = [key for key in cursors if key not in seen]
+        for file_path, stat_result in files:
+            cursor = cursors.get(str(file_path))
+            if cursor is None:
+                continue
+            status = cursor.classify(stat_result)
+            # Archives are rewritten, never appended to.
+            if status == CURSOR_RESET or (is_archive(file_path) and status != CURSOR_UNCHANGED):
+                invalid.append(str(file_path))
+        for key in self._forget_files(invalid):
+            cursors.pop(key, None)
+
+        unindexed = [(file_path, st) for file_path, st in files if str(file_path) not in cursors]
+        wanted = {str(file_path) for file_path, _ in self._planner.plan(unindexed, time_range)}
+
+        plan: List[Tuple[Path, os.stat_result, FileCursor]] = []
+        for file_path, stat_result in files:
+            key = str(file_path)
+            cursor = cursors.get(key)
+            if cursor is None:
+                if key not in wanted:
+                    continue
+                cursor = FileCursor(
+                    device=stat_result.st_dev, inode=stat_result.st_ino, size=0, mtime_ns=0
+                )
+            plan.append((file_path, stat_result, cursor))
+        return plan
+
+    def _forget_files(self, paths: List[str]) -> Set[str]:
+        """
+        Drop the indexed rows of files whose earlier content is gone.
+
+        Files that skipped a prefix copied from a forgotten file never stored
+        their own copy of it, so they are forgotten as well and re-read. Other
+        files' rows and cursors are kept: a removed session costs a delete, not
+        a rebuild. Entries of a forgotten file that another file repeats outside
+        a shared prefix were deduplicated away there and are not recovered.
+
+        Returns:
+            Every path forgotten, including dependents
+        """
+        forgotten: Set[str] = set()
+        pending = list(paths)
+        while pending:
+            path = pending.pop()
+            if path in forgotten:
+                continue
+            forgotten.add(path)
+            pending.extend(self._index.forget_file(path))
+        if forgotten:
+            # Reload dedup keys without the dropped rows; reseed the billing block.
+            self._seen = None
+            self._blocks_seeded = False
+        return forgotten
+
+    def _stat_usage_files(self) -> List[Tuple[Path, os.stat_result]]:
+        files: List[Tuple[Path, os.stat_result]] = []
+        for file_path in self._iter_usage_files():
+            try:
+                files.append((file_path, file_path.stat()))
+            except OSError:
+                continue
+        return files
+
+    def _to_row(self, path_key: str, project: Optional[str], entry: _UsageEntry) -> UsageRow:
+        return UsageRow(
+            dedup_key=entry.dedup_key,
+            path=path_key,
+            day=entry.day,
+            timestamp=entry.timestamp,
+            session_id=entry.session_id,
+            model=entry.model,
+            input_tokens=entry.input_tokens,
+            output_tokens=entry.output_tokens,
+            cache_write_tokens=entry.cache_write_tokens,
+            cache_read_tokens=entry.cache_read_tokens,
+            cost_usd=entry.cost_usd,
+            project=project,
+        )
+
+    def _format_bucket(self, bucket: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "tokens": bucket["tokens"],
             "cost": bucket["cost"] if bucket["cost_seen"] else 0.0,
-            "total_sessions": len(bucket["sessions"]),
+            "total_sessions": bucket["sessions"],
         }
 
     def _iter_usage_files(self) -> Iterable[Path]:
         config_dirs = self._resolve_config_dirs()
+        listings = get_listing_cache()
         for config_dir in config_dirs:
             projects_dir = config_dir / CLAUDE_PROJECTS_DIRNAME
-            if not projects_dir.exists():
-                continue
-            for file_path in projects_dir.rglob("*.jsonl"):
-                if file_path.is_file():
+            # Only project directories whose mtime changed are listed again.
+            for file_path in listings.walk_files(projects_dir):
+                if is_jsonl_log(file_path):
                     yield file_path
 
     def _resolve_config_dirs(self) -> Iterable[Path]:
@@ -221,28 +801,157 @@ class ClaudeStatsParser:
         return tuple(resolved)
 
     def _iter_entries(
-        self, file_path: Path, processed_hashes: Set[str]
+        self,
+        file_path: Path,
+        seen: DedupIndex,
+        cursor: FileCursor,
+        stat_result: os.stat_result,
+        stats: Optional[ScanStats] = None,
+        span: Optional[TimeSpan] = None,
+        fingerprints: Optional[List[int]] = None,
     ) -> Iterable[_UsageEntry]:
+        """
+        Yield entries appended since ``cursor`` and advance it past them.
+
+        Reading resumes at the cursor's last fingerprint block boundary, which
+        may be a little before ``cursor.offset``; lines before the offset are
+        only fingerprinted. Completed block fingerprints are appended to
+        ``fingerprints``.
+        """
         session_id = self._extract_session_id(file_path)
+        offset = cursor.offset
+        if stats is None:
+            stats = ScanStats()
+        stats.files_read += 1
+        fingerprinter = BlockFingerprinter(cursor.fingerprint, cursor.fingerprint_offset)
+        scanner = JsonlScanner(
+            file_path,
+            min(cursor.offset, cursor.fingerprint_offset),
+            stat_result.st_size,
+            marker=_USAGE_MARKER,
+            buffer=self._scan_buffer,
+            fingerprinter=fingerprinter,
+        )
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
+            # Lines without a usage object are counted by the scanner, never decoded.
+            for raw, end_offset, terminated in scanner:
+                if terminated and end_offset - len(raw) - 1 < cursor.offset:
+                    continue
+                line = raw.strip()
+                if not terminated:
+                    if not self._is_complete_line(line):
+                        # Partially written final line; pick it up on the next scan.
+                        break
+                    offset = end_offset
+                if not line:
+                    continue
+                entry = self._parse_line(line, seen, session_id, span)
+                if entry:
+                    yield entry
+        except OSError:
+            pass
+        finally:
+            offset = max(offset, scanner.offset)
+            stats.bytes_read += offset - cursor.offset
+            stats.lines_read += scanner.lines_scanned + (1 if offset > scanner.offset else 0)
+            stats.lines_skipped += scanner.lines_skipped
+            cursor.advance(stat_result, offset)
+            cursor.fingerprint = fingerprinter.chain
+            cursor.fingerprint_offset = fingerprinter.offset
+            if fingerprints is not None:
+                fingerprints.extend(fingerprinter.completed)
+
+    def _tail_usage(self, time_range: TimeRange) -> Dict[str, Any]:
+        """
+        Aggregate usage in a recent ``time_range`` by reading files backwards from EOF.
+
+        Entries are appended in timestamp order, so each file is read only until
+        its first entry before the range, and files the planner rules out are
+        not opened at all. The persistent index is left untouched.
+
+        Returns:
+            Dictionary shaped like ClaudeUsageIndex.usage_between()
+        """
+        window_start = time_range.start if time_range.start is not None else float("-inf")
+        seen = DedupIndex()
+        stats = ScanStats()
+        tokens = TokenUsage()
+        cost = 0.0
+        cost_seen = False
+        sessions: Set[str] = set()
+
+        for file_path, _ in self._planner.plan(self._stat_usage_files(), time_range):
+            session_id = self._extract_session_id(file_path)
+            archived = is_archive(file_path)
+            # Archives can only be streamed forwards, so they are read whole.
+            scanner: Union[JsonlScanner, ReverseJsonlScanner] = (
+                JsonlScanner(file_path, marker=_USAGE_MARKER, buffer=self._scan_buffer)
+                if archived
+                else ReverseJsonlScanner(file_path, marker=_USAGE_MARKER)
+            )
+            try:
+                for raw, *_ in scanner:
+                    line = raw.strip()
                     if not line:
                         continue
-                    entry = self._parse_line(line, processed_hashes, session_id)
-                    if entry:
-                        yield entry
-        except Exception:
-            return
+                    entry = self._parse_line(line, seen, session_id)
+                    if not entry:
+                        continue
+                    timestamp = entry.timestamp
+                    if timestamp < window_start:
+                        if archived:
+                            continue
+                        break
+                    if time_range.end is not None and timestamp >= time_range.end:
+                        continue
+                    tokens.input_tokens += entry.input_tokens
+                    tokens.output_tokens += entry.output_tokens
+                    tokens.cache_write_tokens += entry.cache_write_tokens
+                    tokens.cache_read_tokens += entry.cache_read_tokens
+                    if entry.cost_usd is not None:
+                        cost += entry.cost_usd
+                        cost_seen = True
+                    if entry.session_id is not None:
+                        sessions.add(entry.session_id)
+            except ARCHIVE_ERRORS:
+                pass
+            stats.files_read += 1
+            stats.bytes_read += scanner.offset if archived else scanner.bytes_read
+            stats.lines_read += scanner.lines_scanned
+            stats.lines_skipped += scanner.lines_skipped
+
+        self.last_scan_stats = stats
+        return {"tokens": tokens, "cost": cost, "cost_seen": cost_seen, "sessions": len(sessions)}
+
+    def _is_complete_line(self, line: bytes) -> bool:
+        try:
+            self._decoder.loads(line)
+        except ValueError:
+            return False
+        return True
+
+    def _decode_line(self, line: Union[bytes, str]) -> Any:
+        if len(line) >= _PARTIAL_DECODE_MIN_BYTES and not self._decoder.has_typed_schemas:
+            raw = line.encode("utf-8") if isinstance(line, str) else line
+            try:
+                return extract_fields(raw, _USAGE_FIELDS)
+            except PartialDecodeError:
+                pass
+        return self._decoder.decode_claude_record(line)
 
     def _parse_line(
-        self, line: str, processed_hashes: Set[str], session_id: Optional[str]
+        self,
+        line: Union[bytes, str],
+        seen: DedupIndex,
+        session_id: Optional[str],
+        span: Optional[TimeSpan] = None,
     ) -> Optional[_UsageEntry]:
         try:
-            data = json.loads(line)
-        except json.JSONDecodeError:
+            data = self._decode_line(line)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
             return None
 
         message = data.get("message")
@@ -252,15 +961,20 @@ class ClaudeStatsParser:
         if not isinstance(usage, dict):
             return None
 
-        unique_hash = self._create_unique_hash(message, data)
-        if unique_hash:
-            if unique_hash in processed_hashes:
-                return None
-            processed_hashes.add(unique_hash)
-
         timestamp_raw = data.get("timestamp")
-        timestamp = self._parse_timestamp(timestamp_raw)
-        if not timestamp:
+        if not isinstance(timestamp_raw, str):
+            return None
+        timestamp = parse_iso_epoch(timestamp_raw)
+        if timestamp is None:
+            return None
+        if span is not None:
+            # Duplicates still count towards the file's span: after a rebuild the
+            # file may own them.
+            span.observe(timestamp)
+
+        day = local_day(timestamp)
+        key = self._create_dedup_key(message, data)
+        if key is not None and not seen.add(key, day):
             return None
 
         input_tokens = int(usage.get("input_tokens", 0) or 0)
@@ -282,6 +996,7 @@ class ClaudeStatsParser:
 
         return _UsageEntry(
             timestamp=timestamp,
+            day=day,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             cache_write_tokens=cache_write_tokens,
@@ -289,32 +1004,23 @@ class ClaudeStatsParser:
             model=model,
             cost_usd=cost_usd,
             session_id=session_id,
+            dedup_key=key,
         )
 
-    def _create_unique_hash(self, message: Dict[str, Any], data: Dict[str, Any]) -> Optional[str]:
+    def _create_dedup_key(self, message: Dict[str, Any], data: Dict[str, Any]) -> Optional[int]:
         message_id = message.get("id")
         request_id = data.get("requestId")
         if not message_id or not request_id:
             return None
-        return f"{message_id}:{request_id}"
-
-    def _parse_timestamp(self, raw: Any) -> Optional[datetime]:
-        if not isinstance(raw, str):
-            return None
-        ts = raw.strip()
-        if ts.endswith("Z"):
-            ts = ts[:-1] + "+00:00"
-        try:
-            return datetime.fromisoformat(ts)
-        except ValueError:
-            return None
+        return dedup_key(str(message_id), str(request_id))
 
     def _extract_session_id(self, file_path: Path) -> Optional[str]:
-        if file_path.name == "usage.jsonl" or file_path.name == "chat.jsonl":
+        if not is_jsonl_log(file_path):
+            return None
+        stem = log_stem(file_path)
+        if stem == "usage" or stem == "chat":
             return file_path.parent.name
-        if file_path.suffix == ".jsonl":
-            return file_path.stem
-        return None
+        return stem
 
     def _estimate_cost(
         self,
@@ -348,3 +1054,75 @@ class ClaudeStatsParser:
         input_cost = (input_tokens / 1_000_000) * pricing["input"]
         output_cost = (output_tokens / 1_000_000) * pricing["output"]
         return input_cost + output_cost
+
+
+_shard_parser: Optional[ClaudeStatsParser] = None
+
+
+def _project_of(file_path: Path) -> Optional[str]:
+    """Name of the ``projects/<slug>`` directory a log file lives under."""
+    for parent in file_path.parents:
+        if parent.parent.name == CLAUDE_PROJECTS_DIRNAME:
+            return parent.name
+    return None
+
+
+def _block_entry(row: UsageRow) -> BlockEntry:
+    return BlockEntry(
+        timestamp=row.timestamp,
+        input_tokens=row.input_tokens,
+        output_tokens=row.output_tokens,
+        cache_write_tokens=row.cache_write_tokens,
+        cache_read_tokens=row.cache_read_tokens,
+        cost=row.cost_usd or 0.0,
+    )
+
+
+def _split_shards(
+    pending: List[Tuple[Path, os.stat_result, FileCursor]], shard_count: int
+) -> List[List[Tuple[str, os.stat_result, FileCursor]]]:
+    """Split files into contiguous shards of roughly equal unread bytes."""
+    total = sum(st.st_size - cursor.offset for _, st, cursor in pending)
+    target = max(1, total // shard_count)
+    shards: List[List[Tuple[str, os.stat_result, FileCursor]]] = [[]]
+    shard_bytes = 0
+    for file_path, stat_result, cursor in pending:
+        if shard_bytes >= target and len(shards) < shard_count:
+            shards.append([])
+            shard_bytes = 0
+        shards[-1].append((str(file_path), stat_result, cursor))
+        shard_bytes += stat_result.st_size - cursor.offset
+    return shards
+
+
+def _parse_shard(
+    shard: List[Tuple[str, os.stat_result, FileCursor]],
+) -> Tuple[List[Tuple[str, FileCursor, List[UsageRow], TimeSpan, List[int]]], ScanStats]:
+    """
+    Parse a contiguous run of files in a worker process.
+
+    Duplicates are dropped within the shard only. Because shards are contiguous
+    slices of the scan order, the first copy kept here is also the first copy
+    globally, and the parent resolves the rest when inserting shards in order.
+    """
+    global _shard_parser
+    if _shard_parser is None:
+        _shard_parser = ClaudeStatsParser()
+    parser = _shard_parser
+
+    seen = DedupIndex()
+    stats = ScanStats()
+    results: List[Tuple[str, FileCursor, List[UsageRow], TimeSpan, List[int]]] = []
+    for path_key, stat_result, cursor in shard:
+        file_path = Path(path_key)
+        span = TimeSpan()
+        fingerprints: List[int] = []
+        project = _project_of(file_path)
+        rows = [
+            parser._to_row(path_key, project, entry)
+            for entry in parser._iter_entries(
+                file_path, seen, cursor, stat_result, stats, span, fingerprints
+            )
+        ]
+        results.append((path_key, cursor, rows, span, fingerprints))
+    return results, stats
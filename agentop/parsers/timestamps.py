@@ -0,0 +1,181 @@
+"""Allocation-light ISO-8601 parsing and local-day bucketing on epoch seconds."""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_right
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+_DAY_SECONDS = 86400
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Epoch seconds of "YYYY-MM-DDTHH:MM" (UTC) prefixes. Log lines arrive in time
+# order, so a small memo turns almost every parse into one dict lookup.
+_MINUTE_CACHE_SIZE = 4096
+_minute_starts: Dict[str, float] = {}
+
+
+def parse_iso_epoch(raw: str) -> Optional[float]:
+    """
+    Parse an ISO-8601 timestamp into epoch seconds.
+
+    ``YYYY-MM-DDTHH:MM:SS[.fff]Z`` (the layout Claude Code writes) is parsed by
+    slicing, with the minute prefix memoized; anything else falls back to
+    ``datetime.fromisoformat``. Timestamps without an offset are local time.
+
+    Returns:
+        Epoch seconds, or None if ``raw`` is not a valid timestamp
+    """
+    if (
+        len(raw) >= 20
+        and raw[-1] == "Z"
+        and raw[10] == "T"
+        and raw[13] == ":"
+        and raw[16] == ":"
+        and raw[17:19].isdigit()
+        and (len(raw) == 20 or (raw[19] == "." and raw[20:-1].isdigit()))
+    ):
+        prefix = raw[:16]
+        minute_start = _minute_starts.get(prefix)
+        if minute_start is None:
+            minute_start = _parse_minute(prefix)
+            if minute_start is None:
+                return None
+            if len(_minute_starts) >= _MINUTE_CACHE_SIZE:
+                _minute_starts.clear()
+            _minute_starts[prefix] = minute_start
+        seconds = float(raw[17:-1])
+        if seconds >= 61:
+            return None
+        return minute_start + seconds
+
+    text = raw.strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _parse_minute(prefix: str) -> Optional[float]:
+    try:
+        return datetime(
+            int(prefix[0:4]),
+            int(prefix[5:7]),
+            int(prefix[8:10]),
+            int(prefix[11:13]),
+            int(prefix[14:16]),
+            tzinfo=timezone.utc,
+        ).timestamp()
+    except ValueError:
+        return None
+
+
+class LocalOffsets:
+    """
+    The local UTC offset as a table of transitions, extended on demand.
+
+    The table is filled by probing ``time.localtime`` once per day across the
+    covered span and bisecting to the second wherever the offset changes, so a
+    lookup is a bisect over a handful of DST transitions per year.
+    """
+
+    def __init__(self) -> None:
+        self._starts: List[float] = []
+        self._offsets: List[int] = []
+        self._low: Optional[float] = None
+        self._high: Optional[float] = None
+
+    def offset(self, timestamp: float) -> int:
+        """Local UTC offset in seconds at ``timestamp``."""
+        low, high = self._low, self._high
+        if low is None or timestamp < low or timestamp >= high:
+            self._cover(timestamp)
+        return self._offsets[bisect_right(self._starts, timestamp) - 1]
+
+    def day_ordinal(self, timestamp: float) -> int:
+        """Proleptic Gregorian ordinal of the local day containing ``timestamp``."""
+        return int((timestamp + self.offset(timestamp)) // _DAY_SECONDS) + _EPOCH_ORDINAL
+
+    def _cover(self, timestamp: float) -> None:
+        # Cover whole 32-day chunks so neighbouring lookups stay inside the table.
+        chunk = 32 * _DAY_SECONDS
+        if self._low is None:
+            start = timestamp - timestamp % _DAY_SECONDS
+            self._starts = [start]
+            self._offsets = [_probe(start)]
+            self._low = self._high = start
+        while timestamp < self._low:
+            self._extend_left(self._low - chunk)
+        while timestamp >= self._high:
+            self._extend_right(self._high + chunk)
+
+    def _extend_right(self, end: float) -> None:
+        t = self._high
+        offset = _probe(t)
+        while t < end:
+            step = t + _DAY_SECONDS
+            next_offset = _probe(step)
+            if next_offset != offset:
+                change = _find_change(t, step, offset)
+                self._starts.append(change)
+                self._offsets.append(next_offset)
+                offset = next_offset
+            t = step
+        self._high = end
+
+    def _extend_left(self, start: float) -> None:
+        starts: List[float] = [start]
+        offsets: List[int] = [_probe(start)]
+        t = start
+        while t < self._low:
+            step = t + _DAY_SECONDS
+            next_offset = _probe(step)
+            if next_offset != offsets[-1]:
+                starts.append(_find_change(t, step, offsets[-1]))
+                offsets.append(next_offset)
+            t = step
+        # The probe at the old low edge repeats the old first segment's offset.
+        if offsets[-1] == self._offsets[0]:
+            del self._starts[0]
+            del self._offsets[0]
+        self._starts[:0] = starts
+        self._offsets[:0] = offsets
+        self._low = start
+
+
+def _probe(timestamp: float) -> int:
+    try:
+        return time.localtime(timestamp).tm_gmtoff
+    except (OverflowError, OSError, ValueError):
+        return 0
+
+
+def _find_change(low: float, high: float, offset: int) -> float:
+    """First second in (low, high] whose offset differs from ``offset``."""
+    while high - low > 1:
+        middle = (low + high) // 2
+        if _probe(middle) == offset:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+_DAY_CACHE_SIZE = 4096
+_local_offsets = LocalOffsets()
+_days: Dict[int, date] = {}
+
+
+def local_day(timestamp: float) -> date:
+    """Local calendar day of an epoch timestamp, without a datetime per call."""
+    ordinal = _local_offsets.day_ordinal(timestamp)
+    day = _days.get(ordinal)
+    if day is None:
+        if len(_days) >= _DAY_CACHE_SIZE:
+            _days.clear()
+        day = _days[ordinal] = date.fromordinal(ordinal)
+    return day
+
@@ -1,10 +1,12 @@
 """Agent monitoring panels."""
 
 from textual.widgets import Static
+from textual.worker import Worker
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 from rich.console import Group
+from dataclasses import replace
 from datetime import datetime
 from typing import Optional
 
@@ -82,6 +84,14 @@ def _format_timestamp(timestamp: Optional[datetime]) -> str:
     return timestamp.strftime("%Y-%m-%d %H:%M")
 
 
+def _format_latency(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return ""
+    if seconds < 60:
+        return f"+{seconds:.1f}s"
+    return f"+{seconds / 60:.0f}m"
+
+
 def _shorten_text(value: Optional[str], max_len: int = 48) -> str:
     if not value:
         return ""
@@ -93,25 +103,61 @@ def _shorten_text(value: Optional[str], max_len: int = 48) -> str:
 class ClaudeCodePanel(Static):
     """Panel for displaying Claude Code metrics."""
 
+    # Rows shown in the live recent-requests list
+    RECENT_REQUESTS = 8
+
     def __init__(self, **kwargs):
         """Initialize panel."""
         super().__init__(**kwargs)
         self.monitor = ClaudeCodeMonitor()
+        self._metrics = None
+        self._discovery: Optional[Worker] = None
 
     def on_mount(self) -> None:
         """Set up periodic refresh."""
         self.set_interval(1.0, self.refresh_data)
+        # New responses are shown between full refreshes. Listing the session
+        # logs runs on a worker thread; the poll itself only stats followed logs.
+        self.set_interval(0.25, self.refresh_feed)
+        self.set_interval(self.monitor.request_feed.discover_seconds, self.discover_requests)
+        self.discover_requests()
         self.refresh_data()
 
+    def discover_requests(self) -> None:
+        """Re-list the session logs in the background unless a listing is still running."""
+        if self._discovery is not None and not self._discovery.is_finished:
+            return
+        self._discovery = self.run_worker(
+            self.monitor.request_feed.discover,
+            thread=True,
+            group="request-discovery",
+            exit_on_error=False,
+        )
+
     def refresh_data(self) -> None:
         """Refresh the display with current metrics."""
         try:
             metrics = self.monitor.get_metrics()
+            self._metrics = metrics
             rendered = self._render_metrics(metrics)
             self.update(rendered)
         except Exception as e:
             self.update(f"[red]Error: {e}[/red]")
 
+    def refresh_feed(self) -> None:
+        """Re-render with the latest responses if running sessions produced any."""
+        if self._metrics is None:
+            return
+        try:
+            if not self.monitor.poll_requests(discover=False):
+                return
+            self._metrics = replace(
+                self._metrics, recent_requests=self.monitor.request_feed.recent()
+            )
+            self.update(self._render_metrics(self._metrics))
+        except Exception as e:
+            self.update(f"[red]Error: {e}[/red]")
+
     def _render_metrics(self, metrics) -> Panel:
         """
         Render metrics as a Rich Panel.
@@ -209,6 +255,17 @@ class ClaudeCodePanel(Static):
         else:
             token_table.add_row("Tokens:", "[dim]No usage this month[/dim]")
 
+        by_model = getattr(metrics, "by_model", {})
+        if by_model:
+            top_models = sorted(by_model.items(), key=lambda x: x[1].total_tokens, reverse=True)
+            token_table.add_row(
+                "Models:",
+                " • ".join(
+                    f"{_shorten_text(model, 24)} {usage.total_tokens:,}"
+                    for model, usage in top_models[:3]
+                ),
+            )
+
         token_table.add_row(
             "Stats updated:",
             f"[dim]{_format_timestamp(metrics.stats_last_updated)}[/dim]",
@@ -259,9 +316,41 @@ class ClaudeCodePanel(Static):
             else:
                 quota_table.add_row("Quota:", "[dim]Unavailable[/dim]")
 
+        # Reconstructed from local logs, so shown even when the quota API is not.
+        block = metrics.billing_block
+        if block:
+            value = (
+                f"{block.tokens.total_tokens:,} tok • ${block.cost:.2f} • "
+                f"{block.tokens_per_minute:,.0f} tok/min • ${block.cost_per_hour:.2f}/h"
+            )
+            reset = _format_reset(block.end)
+            if reset:
+                value += f" • {reset}"
+            quota_table.add_row("5h block:", value)
+
         content_parts.append(Text(""))  # Spacer
         content_parts.append(quota_table)
 
+        # === RECENT REQUESTS ===
+        recent = getattr(metrics, "recent_requests", [])
+        if recent:
+            recent_table = Table.grid(padding=(0, 2), expand=True)
+            recent_table.add_column(style="bold cyan", width=18)
+            recent_table.add_column()
+            for i, event in enumerate(recent[: self.RECENT_REQUESTS]):
+                value = (
+                    f"{event.timestamp.strftime('%H:%M:%S')} • "
+                    f"{_shorten_text(event.model, 24) or '?'} • "
+                    f"{event.tokens.total_tokens:,} tok • ${event.cost:.3f}"
+                )
+                latency = _format_latency(event.latency_seconds)
+                if latency:
+                    value += f" • [dim]{latency}[/dim]"
+                recent_table.add_row("Recent:" if i == 0 else "", value)
+
+            content_parts.append(Text(""))  # Spacer
+            content_parts.append(recent_table)
+
         # Combine all parts
         content = Group(*content_parts)
 
@@ -417,6 +506,10 @@ class CodexPanel(Static):
                 if reset:
                     value += f" • {reset}"
                 rate_table.add_row(f"{label} limit:", value)
+            if metrics.rate_limits_source == "local" and rate_limits.captured_at:
+                rate_table.add_row(
+                    "As of:", f"[dim]{_format_timestamp(rate_limits.captured_at)} (logs)[/dim]"
+                )
         else:
             if metrics.rate_limits_error:
                 rate_table.add_row("Quota:", "[dim]Unavailable[/dim]")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Compare JSON decoder backend throughput on a Claude-style JSONL corpus.
+
+Usage:
+    python benchmarks/json_backends.py                 # synthetic corpus
+    python benchmarks/json_backends.py ~/.claude/projects
+"""
+
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List
+
+from agentop.parsers.json_backend import JsonDecoder, available_backends
+
+
+def synthetic_corpus(lines: int = 50_000) -> List[bytes]:
+    """Build a corpus shaped like Claude transcripts (one assistant line in three)."""
+    corpus = []
+    timestamp = datetime.now(timezone.utc).isoformat()
+    for i in range(lines):
+        if i % 3 == 0:
+            entry = {
+                "type": "assistant",
+                "timestamp": timestamp,
+                "requestId": f"req_{i}",
+                "message": {
+                    "id": f"msg_{i}",
+                    "model": "claude-sonnet-4-5",
+                    "content": [{"type": "text", "text": "lorem ipsum " * 40}],
+                    "usage": {"input_tokens": 120, "output_tokens": 80},
+                },
+            }
+        else:
+            entry = {
+                "type": "user",
+                "timestamp": timestamp,
+                "message": {"role": "user", "content": "tool output " * 80},
+            }
+        corpus.append(json.dumps(entry).encode("utf-8"))
+    return corpus
+
+
+def load_corpus(path: Path) -> List[bytes]:
+    """Read every non-empty line from a JSONL file or directory tree."""
+    files = [path] if path.is_file() else sorted(path.rglob("*.jsonl"))
+    corpus = []
+    for file_path in files:
+        with open(file_path, "rb") as f:
+            corpus.extend(line.strip() for line in f if line.strip())
+    return corpus
+
+
+def measure(label: str, corpus_bytes: int, lines: int, run: Callable[[], None]) -> None:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {label:<22} {elapsed * 1000:8.1f} ms  "
+        f"{corpus_bytes / elapsed / 1_000_000:8.1f} MB/s  {lines / elapsed:12,.0f} lines/s"
+    )
+
+
+def main() -> None:
+    corpus = load_corpus(Path(sys.argv[1]).expanduser()) if len(sys.argv) > 1 else (
+        synthetic_corpus()
+    )
+    corpus_bytes = sum(len(line) for line in corpus)
+    print(f"Corpus: {len(corpus):,} lines, {corpus_bytes / 1_000_000:.1f} MB\n")
+
+    for backend in available_backends():
+        decoder = JsonDecoder(backend)
+        print(f"{backend} (typed schemas: {'yes' if decoder.has_typed_schemas else 'no'})")
+        measure(
+            "loads",
+            corpus_bytes,
+            len(corpus),
+            lambda decoder=decoder: [decoder.loads(x) for x in corpus],
+        )
+        measure(
+            "iter_loads (batched)",
+            corpus_bytes,
+            len(corpus),
+            lambda decoder=decoder: list(decoder.iter_loads(corpus)),
+        )
+        measure(
+            "decode_claude_record",
+            corpus_bytes,
+            len(corpus),
+            lambda decoder=decoder: [decoder.decode_claude_record(x) for x in corpus],
+        )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Tests for 5-hour billing block reconstruction."""
+
+from datetime import datetime
+
+from agentop.parsers.billing_blocks import BillingBlockTracker, BlockEntry
+
+HOUR = 3600
+T0 = datetime(2025, 6, 2, 9, 30).timestamp()
+
+
+def _entry(offset: float, tokens: int = 10, cost: float = 0.1) -> BlockEntry:
+    return BlockEntry(timestamp=T0 + offset, input_tokens=tokens, cost=cost)
+
+
+def _at(offset: float) -> datetime:
+    return datetime.fromtimestamp(T0 + offset)
+
+
+def test_block_is_anchored_at_first_entry():
+    """A block starts at its first entry and lasts five hours."""
+    tracker = BillingBlockTracker()
+    tracker.add([_entry(0), _entry(HOUR)])
+
+    block = tracker.active_block(now=_at(2 * HOUR))
+
+    assert block.start == _at(0)
+    assert block.end == _at(5 * HOUR)
+    assert block.tokens.total_tokens == 20
+    assert block.entry_count == 2
+
+
+def test_entry_after_block_end_starts_new_block():
+    """The first entry after a block ends anchors the next one."""
+    tracker = BillingBlockTracker()
+    tracker.add([_entry(0), _entry(6 * HOUR, tokens=7)])
+
+    block = tracker.active_block(now=_at(6 * HOUR + 60))
+
+    assert block.start == _at(6 * HOUR)
+    assert block.tokens.total_tokens == 7
+
+
+def test_out_of_order_entries_are_folded_in():
+    """Late entries inside the current block still count; older ones are ignored."""
+    tracker = BillingBlockTracker()
+    tracker.add([_entry(HOUR)])
+    tracker.add([_entry(3 * HOUR), _entry(2 * HOUR), _entry(0)])
+
+    block = tracker.active_block(now=_at(3 * HOUR))
+
+    assert block.start == _at(HOUR)
+    assert block.entry_count == 3
+    assert block.last_entry_at == _at(3 * HOUR)
+
+
+def test_no_block_once_window_has_passed():
+    """After the window ends with no new entries, nothing is active."""
+    tracker = BillingBlockTracker()
+    tracker.add([_entry(0)])
+
+    assert tracker.active_block(now=_at(5 * HOUR)) is None
+    assert tracker.active_block(now=_at(-60)) is None
+
+
+def test_burn_rate_uses_active_minutes():
+    """Burn rates are measured from the block start to its latest entry."""
+    tracker = BillingBlockTracker()
+    tracker.add([_entry(0, tokens=600, cost=1.0), _entry(HOUR, tokens=600, cost=1.0)])
+
+    block = tracker.active_block(now=_at(2 * HOUR))
+
+    assert block.tokens_per_minute == 20
+    assert block.cost_per_hour == 2.0
@@ -0,0 +1,119 @@
+"""Tests for the live Claude request feed."""
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from agentop.parsers.claude_live import LiveRequestFeed
+from agentop.parsers.stats_parser import ClaudeStatsParser
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("AGENTOP_PRICING_OFFLINE", "1")
+
+
+def _usage_line(message_id: str, timestamp: str, output_tokens: int = 5) -> str:
+    return json.dumps(
+        {
+            "type": "assistant",
+            "timestamp": timestamp,
+            "requestId": f"req_{message_id}",
+            "costUSD": 0.25,
+            "message": {
+                "id": message_id,
+                "model": "claude-sonnet-4-5",
+                "usage": {"input_tokens": 10, "output_tokens": output_tokens},
+            },
+        }
+    )
+
+
+def _feed(tmp_path: Path) -> LiveRequestFeed:
+    return LiveRequestFeed(ClaudeStatsParser(str(tmp_path)), discover_seconds=0)
+
+
+def _session(tmp_path: Path, name: str) -> Path:
+    project_dir = tmp_path / "projects" / "-home-user-project"
+    project_dir.mkdir(parents=True, exist_ok=True)
+    return project_dir / f"{name}.jsonl"
+
+
+def test_feed_emits_only_appended_responses(tmp_path: Path):
+    """History is skipped; appended responses become events with latency."""
+    session = _session(tmp_path, "session-a")
+    session.write_text(_usage_line("msg_0", "2025-06-02T10:00:00Z") + "\n")
+    feed = _feed(tmp_path)
+    assert feed.poll() == []
+
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_1", "2025-06-02T10:00:04Z") + "\n")
+        f.write(_usage_line("msg_2", "2025-06-02T10:00:06.5Z", output_tokens=20) + "\n")
+        f.write(_usage_line("msg_3", "2025-06-02T10:00:09Z")[:40])
+
+    events = feed.poll()
+    assert [e.tokens.total_tokens for e in events] == [15, 30]
+    assert events[0].latency_seconds is None
+    assert events[1].latency_seconds == pytest.approx(2.5)
+    assert events[1].session_id == "session-a"
+    assert events[1].project == "-home-user-project"
+    assert events[1].cost == 0.25
+
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_3", "2025-06-02T10:00:09Z")[40:] + "\n")
+    assert [e.latency_seconds for e in feed.poll()] == [pytest.approx(2.5)]
+    assert [e.tokens.output_tokens for e in feed.recent()] == [5, 20, 5]
+
+
+def test_sessions_started_later_are_read_from_the_beginning(tmp_path: Path):
+    """A log created after the feed started is followed from its first line."""
+    _session(tmp_path, "session-a").write_text("")
+    feed = _feed(tmp_path)
+    feed.poll()
+
+    _session(tmp_path, "session-b").write_text(
+        _usage_line("msg_1", "2025-06-02T10:00:00Z") + "\n"
+    )
+
+    assert [e.session_id for e in feed.poll()] == ["session-b"]
+
+
+def test_discovery_expires_old_dedup_keys(tmp_path: Path):
+    """Keys of responses from before yesterday are dropped when the logs are re-listed."""
+    session = _session(tmp_path, "session-a")
+    session.write_text("")
+    feed = _feed(tmp_path)
+    feed.poll()
+
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_1", "2020-01-01T10:00:00Z") + "\n")
+    assert len(feed.poll()) == 1
+    assert len(feed._seen) == 1
+
+    feed.poll()
+    assert len(feed._seen) == 0
+
+
+def test_background_discovery_is_applied_by_the_next_poll(tmp_path: Path):
+    """Polls that leave discovery to another thread never list the directories themselves."""
+    feed = _feed(tmp_path)
+    calls = []
+    stat_usage_files = feed.parser._stat_usage_files
+    feed.parser._stat_usage_files = lambda: calls.append(1) or stat_usage_files()
+    feed.poll(discover=False)
+    assert calls == []
+
+    session = _session(tmp_path, "session-a")
+    session.write_text("")
+    worker = threading.Thread(target=feed.discover)
+    worker.start()
+    worker.join()
+    assert feed.poll(discover=False) == []
+
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_1", "2025-06-02T10:00:00Z") + "\n")
+    assert [e.session_id for e in feed.poll(discover=False)] == ["session-a"]
+    assert calls == [1]
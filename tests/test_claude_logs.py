@@ -0,0 +1,61 @@
+"""Tests for the legacy Claude Code session log parser."""
+
+import json
+import os
+from pathlib import Path
+
+from agentop.parsers.claude_logs import ClaudeLogParser
+
+
+def _response_line(input_tokens: int, output_tokens: int) -> str:
+    return json.dumps(
+        {
+            "type": "response",
+            "model": "claude-sonnet-4-5",
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+    )
+
+
+def _counting_parser(logs_dir: Path, **kwargs) -> tuple:
+    parser = ClaudeLogParser(str(logs_dir), **kwargs)
+    parsed = []
+    original = parser._parse_session
+    parser._parse_session = lambda path, st: parsed.append(path.name) or original(path, st)
+    return parser, parsed
+
+
+def test_unchanged_sessions_are_not_reparsed(tmp_path: Path):
+    """Repeated queries reuse cached sessions until a file changes."""
+    session = tmp_path / "session-a.jsonl"
+    session.write_text(_response_line(100, 10) + "\n")
+    (tmp_path / "session-b.jsonl").write_text(_response_line(5, 5) + "\n")
+
+    parser, parsed = _counting_parser(tmp_path)
+    assert parser.get_today_usage()["tokens"].total_tokens == 120
+    assert parser.get_month_usage()["tokens"].total_tokens == 120
+    assert sorted(parsed) == ["session-a.jsonl", "session-b.jsonl"]
+
+    with open(session, "a") as f:
+        f.write(_response_line(1, 1) + "\n")
+    parsed.clear()
+
+    assert parser.get_today_usage()["tokens"].total_tokens == 122
+    assert parsed == ["session-a.jsonl"]
+
+
+def test_session_cache_is_bounded(tmp_path: Path):
+    """The least recently used session is evicted once the cache is full."""
+    for i in range(3):
+        (tmp_path / f"session-{i}.jsonl").write_text(_response_line(1, 1) + "\n")
+        os.utime(tmp_path / f"session-{i}.jsonl", (1_700_000_000 + i, 1_700_000_000 + i))
+
+    parser, parsed = _counting_parser(tmp_path, cache_size=2)
+    for path in parser.list_session_files():
+        parser.parse_session_file(path)
+    parsed.clear()
+
+    assert [p.name for p in parser.list_session_files()][0] == "session-2.jsonl"
+    parser.parse_session_file(tmp_path / "session-0.jsonl")
+    parser.parse_session_file(tmp_path / "session-2.jsonl")
+    assert parsed == ["session-2.jsonl"]
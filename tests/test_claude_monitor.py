@@ -0,0 +1,74 @@
+"""Tests for the Claude Code monitor."""
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from agentop.monitors.claude_code import ClaudeCodeMonitor
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("AGENTOP_PRICING_OFFLINE", "1")
+
+
+class FakeProcessMonitor:
+    """Fake process monitor for testing."""
+
+    def find_agent_processes(self, agent_type):
+        return []
+
+
+def _usage_line(message_id: str, timestamp: str) -> str:
+    return json.dumps(
+        {
+            "type": "assistant",
+            "timestamp": timestamp,
+            "requestId": f"req_{message_id}",
+            "message": {
+                "id": message_id,
+                "model": "claude-sonnet-4-5",
+                "usage": {"input_tokens": 10, "output_tokens": 5},
+            },
+        }
+    )
+
+
+def test_first_refresh_reads_today_from_file_tails(tmp_path: Path):
+    """The monitor's first refresh takes the tail-scan path rather than a full index build."""
+    project_dir = tmp_path / "projects" / "-home-user-project"
+    project_dir.mkdir(parents=True)
+    now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    history = [_usage_line(f"old_{i}", "2020-01-01T00:00:00Z") for i in range(2000)]
+    session = project_dir / "session-a.jsonl"
+    session.write_text("\n".join(history + [_usage_line("msg_1", now)]) + "\n")
+
+    monitor = ClaudeCodeMonitor(str(tmp_path))
+    monitor.process_monitor = FakeProcessMonitor()
+    parser = monitor.stats_parser
+
+    metrics = monitor.get_metrics()
+
+    assert metrics.tokens_today.total_tokens == 15
+    assert parser._index.is_empty()
+    assert parser.last_scan_stats.bytes_read < session.stat().st_size // 4
+
+    assert monitor.get_metrics().tokens_this_month.total_tokens == 15
+    assert not parser._index.is_empty()
+
+
+def test_refresh_leaves_the_request_feed_to_its_poller(tmp_path: Path):
+    """Full refreshes do not poll the live feed; only poll_requests reads it."""
+    monitor = ClaudeCodeMonitor(str(tmp_path))
+    monitor.process_monitor = FakeProcessMonitor()
+    polls = []
+    monitor.request_feed.poll = lambda discover=True: polls.append(discover) or []
+
+    monitor.get_metrics()
+    assert polls == []
+
+    monitor.poll_requests(discover=False)
+    assert polls == [False]
@@ -0,0 +1,497 @@
+"""Tests for Claude Code JSONL stats parser."""
+
+import gzip
+import json
+import os
+import sqlite3
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from agentop.parsers.stats_parser import ClaudeStatsParser
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("AGENTOP_PRICING_OFFLINE", "1")
+
+
+def _usage_line(
+    message_id: str,
+    input_tokens: int = 10,
+    output_tokens: int = 5,
+    model: str = "claude-sonnet-4-5",
+) -> str:
+    return json.dumps(
+        {
+            "type": "assistant",
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "requestId": f"req_{message_id}",
+            "costUSD": 0.5,
+            "message": {
+                "id": message_id,
+                "model": model,
+                "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+            },
+        }
+    )
+
+
+def _make_session(tmp_path: Path, name: str = "session-a") -> Path:
+    project_dir = tmp_path / "projects" / "-home-user-project"
+    project_dir.mkdir(parents=True, exist_ok=True)
+    return project_dir / f"{name}.jsonl"
+
+
+def _rescan(parser: ClaudeStatsParser) -> None:
+    parser._last_scan = None
+
+
+def test_today_usage_sums_entries(tmp_path: Path):
+    """Usage lines are aggregated into today's bucket."""
+    session = _make_session(tmp_path)
+    session.write_text(_usage_line("msg_1") + "\n" + _usage_line("msg_2") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    usage = parser.get_today_usage()
+
+    assert usage["tokens"].total_tokens == 30
+    assert usage["cost"] == pytest.approx(1.0)
+    assert usage["total_sessions"] == 1
+
+
+def test_appended_lines_are_read_incrementally(tmp_path: Path):
+    """Only bytes appended since the last scan are parsed on refresh."""
+    session = _make_session(tmp_path)
+    session.write_text(_usage_line("msg_1") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    assert parser.get_month_usage()["tokens"].total_tokens == 15
+    first_offset = parser._index.load_cursors()[str(session)].offset
+
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_2") + "\n")
+    _rescan(parser)
+
+    assert parser.get_today_usage()["tokens"].total_tokens == 30
+    offset = parser._index.load_cursors()[str(session)].offset
+    assert offset == session.stat().st_size
+    assert offset > first_offset
+
+
+def test_partial_final_line_is_deferred(tmp_path: Path):
+    """A partially written final line is not consumed until it is complete."""
+    session = _make_session(tmp_path)
+    line = _usage_line("msg_1")
+    session.write_text(line[:20])
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    assert parser.get_month_usage()["tokens"].total_tokens == 0
+    assert parser._index.load_cursors()[str(session)].offset == 0
+
+    with open(session, "a") as f:
+        f.write(line[20:] + "\n")
+    _rescan(parser)
+
+    assert parser.get_today_usage()["tokens"].total_tokens == 15
+
+
+def test_lines_without_usage_are_prefiltered(tmp_path: Path):
+    """Transcript lines without a usage object are skipped and counted."""
+    session = _make_session(tmp_path)
+    transcript = json.dumps({"type": "user", "message": {"content": "hi"}})
+    session.write_text(transcript + "\n" + _usage_line("msg_1") + "\n" + transcript + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+
+    assert parser.get_today_usage()["tokens"].total_tokens == 15
+    assert parser.last_scan_stats.lines_read == 3
+    assert parser.last_scan_stats.lines_skipped == 2
+    assert parser.last_scan_stats.bytes_read == session.stat().st_size
+
+
+def test_large_lines_use_targeted_extraction(tmp_path: Path):
+    """Multi-megabyte lines yield the same usage as a full decode."""
+    session = _make_session(tmp_path)
+    data = json.loads(_usage_line("msg_1"))
+    data["message"]["content"] = [{"type": "text", "text": "x" * (2 * 1024 * 1024)}]
+    tool_result = {
+        "type": "user",
+        "message": {"role": "user", "content": "y" * (256 * 1024)},
+        "toolUseResult": {"usage": {"input_tokens": 999}},
+    }
+    session.write_text(json.dumps(data) + "\n" + json.dumps(tool_result) + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+
+    assert parser.get_today_usage()["tokens"].total_tokens == 15
+
+
+def test_truncated_file_is_read_again(tmp_path: Path):
+    """Truncating a file drops its earlier contribution."""
+    session = _make_session(tmp_path)
+    session.write_text(_usage_line("msg_1") + "\n" + _usage_line("msg_2") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    assert parser.get_today_usage()["tokens"].total_tokens == 30
+
+    session.write_text(_usage_line("msg_3", input_tokens=1, output_tokens=1) + "\n")
+    _rescan(parser)
+
+    assert parser.get_today_usage()["tokens"].total_tokens == 2
+
+
+def test_duplicate_messages_across_files_counted_once(tmp_path: Path):
+    """Resumed sessions that copy history are deduplicated by message/request id."""
+    first = _make_session(tmp_path, "session-a")
+    second = _make_session(tmp_path, "session-b")
+    first.write_text(_usage_line("msg_1") + "\n")
+    second.write_text(_usage_line("msg_1") + "\n" + _usage_line("msg_2") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+
+    assert parser.get_today_usage()["tokens"].total_tokens == 30
+
+
+def test_index_survives_restart(tmp_path: Path):
+    """A new parser answers from the persisted index without re-reading files."""
+    session = _make_session(tmp_path)
+    session.write_text(_usage_line("msg_1") + "\n")
+    index_path = tmp_path / "index.sqlite"
+
+    ClaudeStatsParser(str(tmp_path), index_path=str(index_path)).get_month_usage()
+
+    restarted = ClaudeStatsParser(str(tmp_path), index_path=str(index_path))
+    calls = []
+    original = restarted._iter_entries
+    restarted._iter_entries = lambda *args: calls.append(args) or original(*args)
+
+    usage = restarted.get_today_usage()
+    assert usage["tokens"].total_tokens == 15
+    assert restarted.get_month_usage()["cost"] == pytest.approx(0.5)
+    assert restarted.get_stats_last_updated() is not None
+    assert calls == []
+
+
+def test_removed_file_drops_only_its_rows(tmp_path: Path):
+    """Deleting a session file removes its usage; other files keep their cursors."""
+    first = _make_session(tmp_path, "session-a")
+    second = _make_session(tmp_path, "session-b")
+    first.write_text(_usage_line("msg_1") + "\n")
+    second.write_text(_usage_line("msg_2") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    assert parser.get_month_usage()["tokens"].total_tokens == 30
+    kept_cursor = parser._index.load_cursors()[str(first)]
+
+    second.unlink()
+    _rescan(parser)
+    calls = []
+    original = parser._iter_entries
+    parser._iter_entries = lambda *args: calls.append(args) or original(*args)
+
+    usage = parser.get_today_usage()
+    assert usage["tokens"].total_tokens == 15
+    assert usage["total_sessions"] == 1
+    assert parser._index.load_cursors() == {str(first): kept_cursor}
+    assert calls == []
+
+
+def test_parallel_scan_matches_serial(tmp_path: Path, monkeypatch):
+    """Sharded parsing honours cross-file dedup exactly like a serial scan."""
+    monkeypatch.setattr("agentop.parsers.stats_parser._PARALLEL_MIN_BYTES", 0)
+    for i in range(6):
+        session = _make_session(tmp_path, f"session-{i}")
+        # Each session repeats the previous session's message, as resumed sessions do.
+        lines = [_usage_line(f"msg_{i}")]
+        if i:
+            lines.insert(0, _usage_line(f"msg_{i - 1}"))
+        session.write_text("\n".join(lines) + "\n")
+
+    serial = ClaudeStatsParser(str(tmp_path), index_path=str(tmp_path / "serial.sqlite"))
+    parallel = ClaudeStatsParser(
+        str(tmp_path), index_path=str(tmp_path / "parallel.sqlite"), parallel_workers=3
+    )
+    shard_runs = []
+    original = parallel._parse_parallel
+    parallel._parse_parallel = lambda *args: shard_runs.append(args) or original(*args)
+
+    parallel_usage = parallel.get_month_usage()
+
+    assert len(shard_runs) == 1
+    assert parallel_usage["tokens"].total_tokens == 6 * 15
+    assert parallel_usage == serial.get_month_usage()
+
+
+def test_cold_today_reads_only_the_tail(tmp_path: Path):
+    """Before the index is built, today's usage comes from a backwards tail scan."""
+    session = _make_session(tmp_path)
+    old = json.loads(_usage_line("msg_old", input_tokens=1000))
+    old["timestamp"] = "2020-01-01T00:00:00Z"
+    history = "\n".join(json.dumps(dict(old, requestId=f"req_old_{i}")) for i in range(2000))
+    session.write_text(history + "\n" + _usage_line("msg_1") + "\n" + _usage_line("msg_2") + "\n")
+    stale = _make_session(tmp_path, "session-stale")
+    stale.write_text(json.dumps(old) + "\n")
+    os.utime(stale, (0, 0))
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    usage = parser.get_today_usage()
+
+    assert usage["tokens"].total_tokens == 30
+    assert usage["total_sessions"] == 1
+    assert parser.last_scan_stats.files_read == 1
+    assert parser.last_scan_stats.bytes_read < session.stat().st_size // 4
+    assert parser._index.is_empty()
+
+    parser.get_month_usage()
+    assert parser.get_today_usage() == usage
+
+
+def test_cold_snapshot_answers_today_from_the_tail(tmp_path: Path):
+    """The first snapshot on an empty index reads file tails and defers the month sync."""
+    session = _make_session(tmp_path)
+    old = json.loads(_usage_line("msg_old", input_tokens=1000))
+    old["timestamp"] = "2020-01-01T00:00:00Z"
+    history = "\n".join(json.dumps(dict(old, requestId=f"req_old_{i}")) for i in range(2000))
+    session.write_text(history + "\n" + _usage_line("msg_1") + "\n" + _usage_line("msg_2") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    cold = parser.get_snapshot()
+
+    assert cold.partial
+    assert cold.tokens_today.total_tokens == 30
+    assert cold.cost_today.amount == pytest.approx(1.0)
+    assert cold.sessions_today == 1
+    assert parser.last_scan_stats.bytes_read < session.stat().st_size // 4
+    assert parser._index.is_empty()
+
+    full = parser.get_snapshot()
+    assert not full.partial
+    assert full.tokens_today.total_tokens == 30
+    assert not parser._index.is_empty()
+
+
+def test_month_scan_skips_files_outside_the_window(tmp_path: Path):
+    """Files last modified before the month are not read until a query needs them."""
+    old = json.loads(_usage_line("msg_old"))
+    old["timestamp"] = "2020-01-15T12:00:00Z"
+    stale = _make_session(tmp_path, "session-stale")
+    stale.write_text(json.dumps(old) + "\n")
+    os.utime(stale, (1579089600, 1579089600))
+    current = _make_session(tmp_path, "session-current")
+    current.write_text(_usage_line("msg_1") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+
+    assert parser.get_month_usage()["tokens"].total_tokens == 15
+    assert parser.last_plan_stats.files_skipped == 1
+    assert parser.last_plan_stats.bytes_skipped == stale.stat().st_size
+    assert str(stale) not in parser._index.load_cursors()
+
+    january = parser.get_usage_between(date(2020, 1, 1), date(2020, 2, 1))
+    assert january["tokens"].total_tokens == 15
+    assert parser.get_usage_between(date(2020, 1, 1))["tokens"].total_tokens == 30
+
+
+def test_duplicates_in_later_scans_are_rejected(tmp_path: Path):
+    """Dedup keys persist across ticks and restarts, not just within one scan."""
+    index_path = tmp_path / "index.sqlite"
+    first = _make_session(tmp_path, "session-a")
+    first.write_text(_usage_line("msg_1") + "\n")
+    parser = ClaudeStatsParser(str(tmp_path), index_path=str(index_path))
+    assert parser.get_month_usage()["tokens"].total_tokens == 15
+
+    restarted = ClaudeStatsParser(str(tmp_path), index_path=str(index_path))
+    restarted.get_month_usage()
+    resumed = _make_session(tmp_path, "session-b")
+    resumed.write_text(_usage_line("msg_1") + "\n" + _usage_line("msg_2") + "\n")
+    _rescan(restarted)
+
+    assert restarted.get_month_usage()["tokens"].total_tokens == 30
+    assert len(restarted._seen) == 2
+
+
+def test_active_block_tracks_new_entries(tmp_path: Path):
+    """The 5-hour block is seeded from the index and extended by later ticks."""
+    session = _make_session(tmp_path)
+    session.write_text(_usage_line("msg_1") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    block = parser.get_active_block()
+    assert block is not None
+    assert block.tokens.total_tokens == 15
+    assert block.entry_count == 1
+
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_2", input_tokens=100) + "\n")
+    _rescan(parser)
+
+    block = parser.get_active_block()
+    assert block.tokens.total_tokens == 120
+    assert block.cost == pytest.approx(1.0)
+    assert (block.end - block.start).total_seconds() == 5 * 3600
+
+
+def test_breakdowns_come_from_the_same_pass(tmp_path: Path):
+    """Model, project and session breakdowns are answered from one index sync."""
+    session = _make_session(tmp_path, "session-a")
+    session.write_text(
+        _usage_line("msg_1") + "\n" + _usage_line("msg_2", model="claude-opus-4-1") + "\n"
+    )
+    other_project = tmp_path / "projects" / "-home-user-other"
+    other_project.mkdir(parents=True)
+    (other_project / "session-b.jsonl").write_text(_usage_line("msg_3", input_tokens=100) + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    by_model = parser.aggregate_by_model()
+    scan_stats = parser.last_scan_stats
+    by_project = parser.aggregate_by_project()
+    by_session = parser.aggregate_by_session()
+
+    assert by_model["claude-sonnet-4-5"]["tokens"].total_tokens == 120
+    assert by_model["claude-opus-4-1"]["total_sessions"] == 1
+    assert by_project["-home-user-project"]["tokens"].total_tokens == 30
+    assert by_project["-home-user-other"]["cost"] == pytest.approx(0.5)
+    assert set(by_session) == {"session-a", "session-b"}
+    assert parser.last_scan_stats is scan_stats
+
+
+def test_snapshot_is_reused_until_the_next_sync(tmp_path: Path):
+    """A snapshot's figures come from one sync and are shared within the TTL."""
+    session = _make_session(tmp_path)
+    session.write_text(_usage_line("msg_1") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    assert parser.get_snapshot().partial
+    snapshot = parser.get_snapshot()
+    assert not snapshot.partial
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_2") + "\n")
+
+    assert parser.get_snapshot() is snapshot
+    assert snapshot.tokens_today.total_tokens == 15
+    assert snapshot.tokens_this_month.total_tokens == 15
+    assert snapshot.sessions_today == 1
+    assert snapshot.by_model == {"claude-sonnet-4-5": snapshot.tokens_this_month}
+    assert snapshot.billing_block.entry_count == 1
+    with pytest.raises(TypeError):
+        snapshot.by_model["other"] = snapshot.tokens_today
+
+    _rescan(parser)
+    refreshed = parser.get_snapshot()
+    assert refreshed is not snapshot
+    assert refreshed.tokens_today.total_tokens == 30
+
+
+def test_archives_are_read_and_survive_rebuilds(tmp_path: Path):
+    """Compressed logs count, and a rebuild replays them without decompressing."""
+    archive = _make_session(tmp_path, "session-old").with_suffix(".jsonl.gz")
+    archive.write_bytes(gzip.compress((_usage_line("msg_1") + "\n").encode()))
+    live = _make_session(tmp_path, "session-new")
+    live.write_text(_usage_line("msg_2") + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    assert parser.get_month_usage()["tokens"].total_tokens == 30
+    assert set(parser.aggregate_by_session()) == {"session-old", "session-new"}
+
+    # Corrupt the archive without changing its size or mtime, then force a rebuild.
+    stat_result = archive.stat()
+    archive.write_bytes(b"\0" * stat_result.st_size)
+    os.utime(archive, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+    live.unlink()
+    _rescan(parser)
+
+    assert parser.get_month_usage()["tokens"].total_tokens == 15
+
+
+def test_forked_session_skips_shared_history(tmp_path: Path):
+    """A new file that copies an ingested session's history is read from where it diverges."""
+    original = _make_session(tmp_path, "session-a")
+    padding = json.dumps({"type": "user", "message": {"content": "x" * 1000}})
+    history = [_usage_line("msg_1")] + [padding] * 200 + [_usage_line("msg_2")]
+    original.write_text("\n".join(history) + "\n")
+
+    parser = ClaudeStatsParser(str(tmp_path))
+    assert parser.get_month_usage()["tokens"].total_tokens == 30
+
+    forked = _make_session(tmp_path, "session-b")
+    forked.write_text(original.read_text() + _usage_line("msg_3") + "\n")
+    _rescan(parser)
+
+    assert parser.get_month_usage()["tokens"].total_tokens == 45
+    stats = parser.last_scan_stats
+    assert stats.shared_bytes_skipped >= 128 * 1024
+    assert stats.bytes_read < forked.stat().st_size - stats.shared_bytes_skipped + 64 * 1024
+
+
+def test_locked_index_is_retried_on_the_next_tick(tmp_path: Path, monkeypatch):
+    """While another process holds the index lock the last totals are kept, not rebuilt."""
+    monkeypatch.setattr("agentop.parsers.claude_index.BUSY_TIMEOUT_SECONDS", 0.05)
+    session = _make_session(tmp_path)
+    session.write_text(_usage_line("msg_1") + "\n")
+    index_path = tmp_path / "index.sqlite"
+    parser = ClaudeStatsParser(str(tmp_path), index_path=str(index_path))
+    assert parser.get_month_usage()["tokens"].total_tokens == 15
+
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_2") + "\n")
+    other = sqlite3.connect(str(index_path), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    _rescan(parser)
+    assert parser.get_month_usage()["tokens"].total_tokens == 15
+    other.execute("ROLLBACK")
+    other.close()
+
+    _rescan(parser)
+    assert parser.get_month_usage()["tokens"].total_tokens == 30
+    assert not parser._index.in_memory
+
+
+def test_failing_index_is_rebuilt_then_kept_in_memory(tmp_path: Path):
+    """Errors other than lock contention rebuild the index instead of serving stale totals."""
+    session = _make_session(tmp_path)
+    session.write_text(_usage_line("msg_1") + "\n")
+    parser = ClaudeStatsParser(str(tmp_path), index_path=str(tmp_path / "index.sqlite"))
+    assert parser.get_month_usage()["tokens"].total_tokens == 15
+
+    original = parser._sync_index
+    failures = []
+
+    def failing_sync(time_range):
+        if len(failures) < 2:
+            failures.append(time_range)
+            raise sqlite3.DatabaseError("database disk image is malformed")
+        return original(time_range)
+
+    parser._sync_index = failing_sync
+    with open(session, "a") as f:
+        f.write(_usage_line("msg_2") + "\n")
+
+    _rescan(parser)
+    assert parser.get_month_usage()["tokens"].total_tokens == 30
+    assert len(failures) == 2
+    assert parser._index.in_memory
+
+
+def test_fork_is_read_again_when_its_source_is_removed(tmp_path: Path):
+    """History a fork skipped as shared is recovered from the fork once the source is gone."""
+    original = _make_session(tmp_path, "session-a")
+    padding = json.dumps({"type": "user", "message": {"content": "x" * 1000}})
+    history = [_usage_line("msg_1")] + [padding] * 200 + [_usage_line("msg_2")]
+    original.write_text("\n".join(history) + "\n")
+    parser = ClaudeStatsParser(str(tmp_path))
+    assert parser.get_month_usage()["tokens"].total_tokens == 30
+
+    forked = _make_session(tmp_path, "session-b")
+    forked.write_text(original.read_text() + _usage_line("msg_3") + "\n")
+    _rescan(parser)
+    assert parser.get_month_usage()["tokens"].total_tokens == 45
+
+    original.unlink()
+    _rescan(parser)
+
+    assert parser.get_month_usage()["tokens"].total_tokens == 45
+    assert parser.last_scan_stats.shared_bytes_skipped == 0
+    assert list(parser._index.load_cursors()) == [str(forked)]
@@ -0,0 +1,419 @@
+"""Tests for Codex usage log parsing."""
+
+import json
+import lzma
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from agentop.parsers.codex_rate_limits import parse_log_rate_limits
+from agentop.parsers.codex_stats import CodexStatsParser
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.delenv("CODEX_STATS_FILE", raising=False)
+    monkeypatch.delenv("OPENAI_CODEX_STATS_FILE", raising=False)
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _token_count_line(input_tokens: int, output_tokens: int) -> str:
+    return json.dumps(
+        {
+            "timestamp": _timestamp(),
+            "type": "event_msg",
+            "payload": {
+                "type": "token_count",
+                "info": {
+                    "total_token_usage": {
+                        "input_tokens": input_tokens,
+                        "output_tokens": output_tokens,
+                    }
+                },
+            },
+        }
+    )
+
+
+def _message_line(text: str) -> str:
+    return json.dumps(
+        {
+            "timestamp": _timestamp(),
+            "type": "response_item",
+            "payload": {"type": "message", "content": [{"type": "output_text", "text": text}]},
+        }
+    )
+
+
+def _usage_line(input_tokens: int, output_tokens: int) -> str:
+    return json.dumps(
+        {
+            "timestamp": _timestamp(),
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+    )
+
+
+def _write_rollout(tmp_path: Path, lines: list) -> Path:
+    logs_dir = tmp_path / "sessions"
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    rollout = logs_dir / "rollout-a.jsonl"
+    rollout.write_text("\n".join(lines) + "\n")
+    return logs_dir
+
+
+def test_token_count_totals_are_differenced(tmp_path: Path):
+    """Cumulative token_count totals become per-turn deltas; other lines are ignored."""
+    logs_dir = _write_rollout(
+        tmp_path,
+        [
+            _message_line("hello"),
+            _token_count_line(100, 10),
+            _message_line("usage of tools"),
+            _usage_line(999, 999),
+            _token_count_line(250, 30),
+        ],
+    )
+
+    usage = CodexStatsParser(logs_dir=str(logs_dir)).get_today_usage()
+
+    assert usage["tokens"].input_tokens == 250
+    assert usage["tokens"].output_tokens == 30
+
+
+def test_generic_usage_used_without_token_count(tmp_path: Path):
+    """Logs without token_count events fall back to generic usage extraction."""
+    logs_dir = _write_rollout(
+        tmp_path, [_message_line("hello"), _usage_line(10, 5), _usage_line(20, 5)]
+    )
+
+    usage = CodexStatsParser(logs_dir=str(logs_dir)).get_today_usage()
+
+    assert usage["tokens"].total_tokens == 40
+
+
+def test_stale_rollouts_are_not_opened(tmp_path: Path):
+    """Rollouts last modified before the month are skipped and reported."""
+    logs_dir = _write_rollout(tmp_path, [_token_count_line(100, 10)])
+    stale = logs_dir / "rollout-old.jsonl"
+    stale.write_text(_token_count_line(5000, 500) + "\n")
+    os.utime(stale, (1579089600, 1579089600))
+
+    parser = CodexStatsParser(logs_dir=str(logs_dir))
+
+    assert parser.get_month_usage()["tokens"].total_tokens == 110
+    assert parser.last_plan_stats.files_skipped == 1
+    assert parser.last_plan_stats.bytes_skipped == stale.stat().st_size
+
+
+def test_month_counts_multi_day_sessions_once(tmp_path: Path):
+    """A session spanning several days is one session in the month total."""
+    first_of_month = date.today().replace(day=1).isoformat() + "T08:00:00Z"
+    early = json.loads(_token_count_line(100, 10))
+    early["timestamp"] = first_of_month
+    logs_dir = _write_rollout(tmp_path, [json.dumps(early), _token_count_line(250, 30)])
+
+    usage = CodexStatsParser(logs_dir=str(logs_dir)).get_month_usage()
+
+    assert usage["tokens"].total_tokens == 280
+    assert usage["total_sessions"] == 1
+
+
+def test_snapshot_answers_today_and_month_from_one_scan(tmp_path: Path):
+    """Today and month figures in a snapshot come from the same scan."""
+    logs_dir = _write_rollout(tmp_path, [_token_count_line(100, 10)])
+
+    parser = CodexStatsParser(logs_dir=str(logs_dir))
+    snapshot = parser.get_snapshot()
+
+    assert parser.get_snapshot() is snapshot
+    assert snapshot.tokens_today.total_tokens == 110
+    assert snapshot.tokens_this_month.total_tokens == 110
+    assert snapshot.sessions_today == 1
+    assert snapshot.source == str(logs_dir)
+    assert snapshot.last_updated is not None
+
+
+def test_archived_rollouts_are_parsed_once(tmp_path: Path):
+    """Compressed rollouts count and are served from the archive cache afterwards."""
+    logs_dir = _write_rollout(tmp_path, [_token_count_line(100, 10)])
+    archive = logs_dir / "rollout-old.jsonl.xz"
+    archive.write_bytes(lzma.compress((_token_count_line(40, 2) + "\n").encode()))
+
+    assert CodexStatsParser(logs_dir=str(logs_dir)).get_month_usage()["tokens"].total_tokens == 152
+
+    stat_result = archive.stat()
+    archive.write_bytes(b"\0" * stat_result.st_size)
+    os.utime(archive, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+
+    usage = CodexStatsParser(logs_dir=str(logs_dir)).get_month_usage()
+    assert usage["tokens"].total_tokens == 152
+    assert usage["total_sessions"] == 2
+
+
+def test_appended_token_counts_are_read_incrementally(tmp_path: Path):
+    """After a restart only appended bytes are read, differenced against the saved total."""
+    logs_dir = _write_rollout(tmp_path, [_message_line("hello"), _token_count_line(100, 10)])
+    rollout = logs_dir / "rollout-a.jsonl"
+    assert CodexStatsParser(logs_dir=str(logs_dir)).get_month_usage()["tokens"].total_tokens == 110
+
+    size = rollout.stat().st_size
+    with open(rollout, "a") as f:
+        f.write(_token_count_line(250, 30) + "\n")
+
+    parser = CodexStatsParser(logs_dir=str(logs_dir))
+    starts = []
+    original = parser._scan_entries
+    parser._scan_entries = lambda path, start, *rest: starts.append(start) or original(
+        path, start, *rest
+    )
+
+    assert parser.get_month_usage()["tokens"].total_tokens == 280
+    assert starts == [size]
+
+
+def test_token_count_replaces_earlier_generic_usage(tmp_path: Path):
+    """A rollout that starts reporting token_count is recounted in token_count mode."""
+    logs_dir = _write_rollout(tmp_path, [_usage_line(20, 10)])
+    assert CodexStatsParser(logs_dir=str(logs_dir)).get_month_usage()["tokens"].total_tokens == 30
+
+    with open(logs_dir / "rollout-a.jsonl", "a") as f:
+        f.write(_token_count_line(100, 10) + "\n")
+
+    assert CodexStatsParser(logs_dir=str(logs_dir)).get_month_usage()["tokens"].total_tokens == 110
+
+
+def test_walk_prunes_hidden_directories_and_reports_tree_size(tmp_path: Path):
+    """One walk finds rollouts in nested folders, skips dot-directories and is measured."""
+    logs_dir = _write_rollout(tmp_path, [_token_count_line(100, 10)])
+    nested = logs_dir / "2025" / "06" / "02"
+    nested.mkdir(parents=True)
+    (nested / "rollout-b.jsonl").write_text(_token_count_line(40, 2) + "\n")
+    (nested / "notes.txt").write_text("")
+    hidden = logs_dir / ".trash"
+    hidden.mkdir()
+    (hidden / "rollout-c.jsonl").write_text(_token_count_line(999, 999) + "\n")
+
+    parser = CodexStatsParser(logs_dir=str(logs_dir))
+
+    assert parser.get_usage_between(date(2000, 1, 1))["tokens"].total_tokens == 152
+    stats = parser.last_walk_stats
+    assert (stats.dirs, stats.files, stats.dirs_pruned) == (4, 3, 1)
+    assert stats.seconds >= 0
+
+
+def test_query_skips_partitions_started_after_the_range(tmp_path: Path):
+    """Later YYYY/MM/DD partitions and rollouts are skipped by name; earlier ones by mtime."""
+    sessions = tmp_path / "sessions"
+    old = sessions / "2020" / "01" / "02"
+    old.mkdir(parents=True)
+    stale = old / "rollout-2020-01-02T10-00-00-a.jsonl"
+    stale.write_text(_token_count_line(40, 2) + "\n")
+    os.utime(stale, (1546300800, 1546300800))
+    later = sessions / "2021" / "06" / "01"
+    later.mkdir(parents=True)
+    (later / "rollout-2021-06-01T10-00-00-b.jsonl").write_text(_token_count_line(100, 10) + "\n")
+    (sessions / "rollout-2021-06-02T10-00-00-c.jsonl").write_text(
+        _token_count_line(7, 0) + "\n"
+    )
+    (sessions / "undated.jsonl").write_text(_token_count_line(1, 1) + "\n")
+
+    parser = CodexStatsParser(logs_dir=str(sessions))
+
+    usage = parser.get_usage_between(date(2020, 1, 1), date(2020, 2, 1))
+    assert usage["tokens"].total_tokens == 0
+    assert parser.last_walk_stats.dirs_pruned == 1
+    assert parser.last_walk_stats.files == 3
+    assert parser.last_plan_stats.files_skipped == 1
+
+    # A wider query reaches the later partitions.
+    assert parser.get_month_usage()["tokens"].total_tokens == 119
+
+
+def test_resumed_session_in_old_partition_is_counted(tmp_path: Path):
+    """A rollout filed under an old day still counts usage appended to it today."""
+    old = tmp_path / "sessions" / "2020" / "01" / "02"
+    old.mkdir(parents=True)
+    rollout = old / "rollout-2020-01-02T10-00-00-a.jsonl"
+    earlier = json.loads(_token_count_line(500, 0))
+    earlier["timestamp"] = "2020-01-02T10:00:00Z"
+    rollout.write_text(json.dumps(earlier) + "\n")
+    os.utime(rollout, (1577959200, 1577959200))
+
+    parser = CodexStatsParser(logs_dir=str(tmp_path / "sessions"))
+    assert parser.get_month_usage() is None
+
+    with open(rollout, "a") as f:
+        f.write(_token_count_line(2500, 0) + "\n")
+
+    for fresh in (parser, CodexStatsParser(logs_dir=str(tmp_path / "sessions"))):
+        fresh._last_scan = None
+        fresh._usage_cache = None
+        assert fresh.get_today_usage()["tokens"].total_tokens == 2000
+        assert fresh.get_month_usage()["tokens"].total_tokens == 2000
+
+
+def test_cold_old_partition_is_not_stat_again(tmp_path: Path, monkeypatch):
+    """An unchanged old day costs one directory stat until its recheck is due."""
+    sessions = tmp_path / "sessions"
+    old = sessions / "2020" / "01" / "02"
+    old.mkdir(parents=True)
+    earlier = json.loads(_token_count_line(500, 0))
+    earlier["timestamp"] = "2020-01-02T10:00:00Z"
+    rollouts = [old / f"rollout-2020-01-02T10-00-0{i}-a.jsonl" for i in range(5)]
+    for rollout in rollouts:
+        rollout.write_text(json.dumps(earlier) + "\n")
+        os.utime(rollout, (1577959200, 1577959200))
+    os.utime(old, (1577959200, 1577959200))
+    (sessions / "rollout-today.jsonl").write_text(_token_count_line(100, 10) + "\n")
+
+    parser = CodexStatsParser(logs_dir=str(sessions))
+    assert parser.get_month_usage()["tokens"].total_tokens == 110
+
+    stat_calls = []
+    real_stat = os.stat
+
+    def counting_stat(path, *args, **kwargs):
+        stat_calls.append(str(path))
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", counting_stat)
+
+    def refresh() -> int:
+        stat_calls.clear()
+        parser._last_scan = None
+        parser._usage_cache = None
+        return parser.get_month_usage()["tokens"].total_tokens
+
+    assert refresh() == 110
+    assert [path for path in stat_calls if path.startswith(str(old))] == [str(old)]
+    assert parser.last_walk_stats.dirs_pruned == 1
+
+    with open(rollouts[0], "a") as f:
+        f.write(_token_count_line(2500, 0) + "\n")
+    parser._cold_partitions.recheck_seconds = 0
+    assert refresh() == 2110
+    assert {str(rollout) for rollout in rollouts} <= set(stat_calls)
+
+
+def test_single_day_rollouts_are_counted_from_their_last_total(tmp_path: Path):
+    """A one-day rollout is read at its head and tail; multi-day ones get the full walk."""
+    lines = [_token_count_line(100 * i, 10 * i) for i in range(1, 6)]
+    logs_dir = _write_rollout(tmp_path, [_message_line("hello")] + lines)
+    earlier = json.loads(_token_count_line(50, 5))
+    earlier["timestamp"] = "2020-01-02T08:00:00Z"
+    (logs_dir / "rollout-b.jsonl").write_text(
+        json.dumps(earlier) + "\n" + _token_count_line(80, 8) + "\n"
+    )
+
+    parser = CodexStatsParser(logs_dir=str(logs_dir))
+    walked = []
+    original = parser._scan_entries
+    parser._scan_entries = lambda path, *rest: walked.append(path.name) or original(path, *rest)
+
+    usage = parser.get_usage_between(date(2000, 1, 1))
+
+    assert usage["tokens"].total_tokens == 550 + 88
+    assert set(walked) == {"rollout-b.jsonl"}
+    state = parser._cursors.get(str(logs_dir / "rollout-a.jsonl"))
+    assert state.last_total.total_tokens == 550
+    assert state.cursor.offset == (logs_dir / "rollout-a.jsonl").stat().st_size
+
+
+def test_rate_limits_are_read_from_the_newest_rollout(tmp_path: Path):
+    """The last logged rate_limits of the newest rollout become the quota snapshot."""
+    older = json.loads(_token_count_line(100, 10))
+    older["payload"]["rate_limits"] = {"primary": {"used_percent": 5.0, "window_minutes": 300}}
+    newer = json.loads(_token_count_line(200, 20))
+    newer["payload"]["rate_limits"] = {
+        "primary": {"used_percent": 12.5, "window_minutes": 300, "resets_in_seconds": 3600},
+        "secondary": {"used_percent": 40.0, "window_minutes": 10080, "resets_at": 4102444800},
+        "plan_type": "plus",
+    }
+    logs_dir = _write_rollout(tmp_path, [json.dumps(older), json.dumps(newer), _message_line("x")])
+    stale = logs_dir / "rollout-old.jsonl"
+    legacy = json.loads(_token_count_line(1, 1))
+    legacy["payload"]["rate_limits"] = {"primary_used_percent": 99.0}
+    stale.write_text(json.dumps(legacy) + "\n")
+    os.utime(stale, (1579089600, 1579089600))
+
+    parser = CodexStatsParser(logs_dir=str(logs_dir))
+    snapshot = parser.get_rate_limits()
+
+    assert snapshot.primary.used_percent == 12.5
+    assert snapshot.primary.window_minutes == 300
+    assert snapshot.primary.resets_at > snapshot.captured_at
+    assert snapshot.secondary.resets_at == datetime.fromtimestamp(4102444800)
+    assert snapshot.plan_type == "plus"
+    assert parser.get_rate_limits() == snapshot
+
+
+def test_local_rate_limits_roll_over_while_the_log_is_idle(tmp_path: Path):
+    """A window whose reset passes without new events reads as unused; the file is not reread."""
+    event = json.loads(_token_count_line(100, 10))
+    event["payload"]["rate_limits"] = {
+        "primary": {"used_percent": 60.0, "window_minutes": 300, "resets_in_seconds": 600},
+        "secondary": {"used_percent": 20.0, "window_minutes": 10080},
+    }
+    logs_dir = _write_rollout(tmp_path, [json.dumps(event)])
+    parser = CodexStatsParser(logs_dir=str(logs_dir))
+    now = datetime.now()
+
+    assert parser.get_rate_limits(now=now).primary.used_percent == 60.0
+
+    reads = []
+    parser._read_rate_limits = lambda *args: reads.append(args)
+    later = parser.get_rate_limits(now=now + timedelta(minutes=11))
+    assert later.primary.used_percent == 0.0
+    assert later.primary.resets_at is None
+    assert later.secondary.used_percent == 20.0
+    assert reads == []
+
+    # Past the secondary window there is no telling whether it reset.
+    assert parser.get_rate_limits(now=now + timedelta(days=8)) is None
+
+
+def test_rate_limits_absent_from_logs(tmp_path: Path):
+    """Rollouts without rate_limits give no local snapshot."""
+    logs_dir = _write_rollout(tmp_path, [_token_count_line(100, 10)])
+
+    assert CodexStatsParser(logs_dir=str(logs_dir)).get_rate_limits() is None
+
+
+def test_legacy_rate_limits_and_elapsed_windows():
+    """Flat primary_/secondary_ fields parse; a window that already reset reads as unused."""
+    observed_at = datetime(2020, 1, 2, 8, 0)
+    snapshot = parse_log_rate_limits(
+        {
+            "primary_used_percent": 80.0,
+            "primary_window_minutes": 300,
+            "primary_resets_in_seconds": 60,
+            "secondary_used_percent": 30.0,
+        },
+        observed_at,
+    )
+
+    assert snapshot.primary.used_percent == 0.0
+    assert snapshot.primary.resets_at is None
+    assert snapshot.secondary.used_percent == 30.0
+    assert snapshot.captured_at == observed_at
+    assert parse_log_rate_limits({"limit_id": "codex"}, observed_at) is None
+
+
+def test_parsers_of_different_logs_dirs_keep_their_own_cursors(tmp_path: Path):
+    """Forgetting files missing from one tree never evicts another tree's cursors."""
+    first = _write_rollout(tmp_path / "a", [_token_count_line(100, 10)])
+    second = _write_rollout(tmp_path / "b", [_token_count_line(40, 2)])
+
+    CodexStatsParser(logs_dir=str(first)).get_month_usage()
+    CodexStatsParser(logs_dir=str(second)).get_month_usage()
+
+    assert CodexStatsParser(logs_dir=str(first))._cursors.get(
+        str(first / "rollout-a.jsonl")
+    ) is not None
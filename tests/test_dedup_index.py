@@ -0,0 +1,43 @@
+"""Tests for the compact dedup key index."""
+
+from datetime import date
+
+from agentop.parsers.dedup_index import DedupIndex, dedup_key
+
+
+def test_keys_are_deduplicated_per_day():
+    """A key is new the first time it is added for a day and a duplicate after."""
+    index = DedupIndex()
+    key = dedup_key("msg_1", "req_1")
+    day = date(2025, 1, 2)
+
+    assert index.add(key, day)
+    assert not index.add(key, day)
+    assert (key, day) in index
+    assert (dedup_key("msg_2", "req_1"), day) not in index
+
+
+def test_table_growth_keeps_every_key_compactly():
+    """Many keys survive table growth at a few bytes each."""
+    index = DedupIndex()
+    day = date(2025, 1, 2)
+    keys = [dedup_key(f"msg_{i}", f"req_{i}") for i in range(20000)]
+
+    assert all(index.add(key, day) for key in keys)
+    assert not any(index.add(key, day) for key in keys)
+    assert len(index) == 20000
+    assert index.nbytes / len(index) <= 24
+
+
+def test_expired_days_are_dropped():
+    """Partitions before the cutoff are forgotten; later ones are kept."""
+    index = DedupIndex()
+    old_key = dedup_key("msg_old", "req_old")
+    new_key = dedup_key("msg_new", "req_new")
+    index.add(old_key, date(2025, 1, 1))
+    index.add(new_key, date(2025, 2, 1))
+
+    index.expire_before(date(2025, 1, 15))
+
+    assert (old_key, date(2025, 1, 1)) not in index
+    assert (new_key, date(2025, 2, 1)) in index
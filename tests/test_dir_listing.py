@@ -0,0 +1,56 @@
+"""Tests for the mtime-gated directory listing cache."""
+
+import os
+from pathlib import Path
+
+from agentop.parsers.dir_listing import DirectoryListingCache
+
+OLD = 1_700_000_000
+
+
+def _settle(*directories: Path) -> None:
+    """Backdate directory mtimes so their listings can be trusted."""
+    for directory in directories:
+        os.utime(directory, (OLD, OLD))
+
+
+def test_unchanged_directories_are_not_listed_again(tmp_path: Path):
+    """Only directories whose mtime moved are re-listed."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "one.jsonl").write_text("")
+    (tmp_path / "b" / "two.jsonl").write_text("")
+    _settle(tmp_path, tmp_path / "a", tmp_path / "b")
+
+    cache = DirectoryListingCache()
+    assert sorted(p.name for p in cache.walk_files(tmp_path)) == ["one.jsonl", "two.jsonl"]
+    assert cache.dirs_listed == 3
+
+    (tmp_path / "b" / "three.jsonl").write_text("")
+    files = sorted(p.name for p in cache.walk_files(tmp_path))
+
+    assert files == ["one.jsonl", "three.jsonl", "two.jsonl"]
+    assert (cache.dirs_listed, cache.dirs_reused) == (4, 2)
+
+
+def test_recently_modified_directories_are_always_listed(tmp_path: Path):
+    """A listing taken within the mtime granularity window is not reused."""
+    cache = DirectoryListingCache()
+    assert cache.children(tmp_path) == []
+
+    (tmp_path / "new.jsonl").write_text("")
+    os.utime(tmp_path, ns=(tmp_path.stat().st_atime_ns, cache._listings[str(tmp_path)][0]))
+
+    assert [p.name for p, _ in cache.children(tmp_path)] == ["new.jsonl"]
+
+
+def test_missing_directories_and_symlinked_directories(tmp_path: Path):
+    """Missing roots list as empty and symlinked directories are not followed."""
+    (tmp_path / "real").mkdir()
+    (tmp_path / "real" / "log.jsonl").write_text("")
+    (tmp_path / "link").symlink_to(tmp_path / "real")
+
+    cache = DirectoryListingCache()
+
+    assert list(cache.walk_files(tmp_path / "missing")) == []
+    assert [p.name for p in cache.walk_files(tmp_path)] == ["log.jsonl"]
@@ -0,0 +1,52 @@
+"""Tests for the HyperLogLog session counter."""
+
+from agentop.parsers.hyperloglog import HyperLogLog
+
+
+def test_small_sets_are_counted_exactly():
+    """Below the exact limit, duplicates are ignored and counts are exact."""
+    sketch = HyperLogLog()
+    for session in ["a", "b", "a", "c", "b"]:
+        sketch.add(session)
+
+    assert sketch.is_exact
+    assert len(sketch) == 3
+
+
+def test_large_sets_are_estimated_closely():
+    """Past the exact limit the estimate stays within a few percent."""
+    sketch = HyperLogLog()
+    for i in range(50000):
+        sketch.add(f"session-{i}")
+
+    assert not sketch.is_exact
+    assert abs(len(sketch) - 50000) / 50000 < 0.05
+
+
+def test_union_counts_shared_values_once():
+    """Merging day sketches counts a session active on both days once."""
+    monday = HyperLogLog()
+    tuesday = HyperLogLog()
+    for i in range(100):
+        monday.add(f"session-{i}")
+    for i in range(50, 400):
+        tuesday.add(f"session-{i}")
+
+    union = HyperLogLog.union([monday, tuesday])
+
+    assert len(monday) == 100
+    assert abs(len(union) - 400) / 400 < 0.05
+
+
+def test_state_round_trip():
+    """Saved sketches count the same values after being restored."""
+    small = HyperLogLog()
+    small.add("session-a")
+    large = HyperLogLog()
+    for i in range(5000):
+        large.add(f"session-{i}")
+
+    for sketch in (small, large):
+        restored = HyperLogLog.from_state(sketch.to_state())
+        assert len(restored) == len(sketch)
+        assert restored.is_exact == sketch.is_exact
@@ -0,0 +1,72 @@
+"""Tests for the pluggable JSON decoder backend."""
+
+import json
+
+import pytest
+
+from agentop.parsers.json_backend import JsonDecoder, available_backends
+
+
+@pytest.fixture(params=available_backends())
+def decoder(request):
+    return JsonDecoder(request.param)
+
+
+def test_stdlib_backend_always_available():
+    """The stdlib backend is the last-resort fallback."""
+    assert available_backends()[-1] == "json"
+    assert JsonDecoder("missing-backend").name == available_backends()[0]
+
+
+def test_env_selects_backend(monkeypatch):
+    """AGENTOP_JSON_BACKEND overrides the default choice."""
+    monkeypatch.setenv("AGENTOP_JSON_BACKEND", "json")
+    assert JsonDecoder().name == "json"
+
+
+def test_loads_accepts_bytes_and_str(decoder):
+    assert decoder.loads(b'{"a": 1}') == {"a": 1}
+    assert decoder.loads('{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_loads_falls_back_for_non_standard_json(decoder):
+    """Inputs only stdlib json accepts still decode."""
+    assert decoder.loads(b'{"big": 123456789012345678901234567890}')["big"] > 2**64
+
+
+def test_loads_raises_value_error(decoder):
+    with pytest.raises(ValueError):
+        decoder.loads(b'{"a": ')
+
+
+def test_loads_many_isolates_bad_lines(decoder):
+    """A bad line yields None without losing its neighbours."""
+    lines = [b'{"a": 1}', b'{"a": ', b"[2]", b'"s"']
+    assert decoder.loads_many(lines) == [{"a": 1}, None, [2], "s"]
+    assert decoder.loads_many(lines[::2]) == [{"a": 1}, [2]]
+
+
+def test_iter_loads_batches(decoder):
+    lines = [json.dumps({"i": i}).encode("utf-8") for i in range(10)]
+    assert [entry["i"] for entry in decoder.iter_loads(lines, batch_size=3)] == list(range(10))
+
+
+def test_decode_claude_record_keeps_usage_fields(decoder):
+    """Typed and untyped decoding agree on the fields the Claude parser reads."""
+    line = json.dumps(
+        {
+            "type": "assistant",
+            "requestId": "req_1",
+            "timestamp": "2026-01-01T00:00:00Z",
+            "message": {"id": "msg_1", "content": [], "usage": {"input_tokens": 3}},
+        }
+    ).encode("utf-8")
+
+    record = decoder.decode_claude_record(line)
+
+    assert record["requestId"] == "req_1"
+    assert record["timestamp"] == "2026-01-01T00:00:00Z"
+    assert record["message"]["id"] == "msg_1"
+    assert record["message"]["usage"] == {"input_tokens": 3}
+    assert record.get("costUSD") is None
+    assert decoder.decode_claude_record(b'{"message": "text"}')["message"] == "text"
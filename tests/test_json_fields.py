@@ -0,0 +1,47 @@
+"""Tests for targeted JSON field extraction."""
+
+import json
+
+import pytest
+
+from agentop.parsers.json_fields import PartialDecodeError, extract_fields
+
+SPEC = {"message": {"id": True, "usage": True}, "requestId": True}
+
+
+def test_extracts_only_requested_fields():
+    """Requested fields are decoded; large unrelated values are skipped."""
+    data = {
+        "parentUuid": None,
+        "message": {
+            "id": "msg_1",
+            "content": [{"type": "text", "text": 'quoted \\" "usage": {} ' * 1000}],
+            "usage": {"input_tokens": 3, "output_tokens": 4},
+        },
+        "requestId": "req_1",
+        "toolUseResult": {"usage": {"input_tokens": 999}},
+    }
+
+    fields = extract_fields(json.dumps(data).encode("utf-8"), SPEC)
+
+    assert fields == {
+        "message": {"id": "msg_1", "usage": {"input_tokens": 3, "output_tokens": 4}},
+        "requestId": "req_1",
+    }
+
+
+def test_non_object_nested_value_is_skipped():
+    """A nested spec on a non-object value leaves the key out."""
+    raw = json.dumps({"message": "plain text", "requestId": "req_1"}).encode("utf-8")
+
+    assert extract_fields(raw, SPEC) == {"requestId": "req_1"}
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [b'{"message": {"id": "msg_1"', b'{"requestId": "req_1"} trailing', b"[1, 2]", b""],
+)
+def test_malformed_lines_raise(raw):
+    """Malformed input raises so callers can fall back to a full decode."""
+    with pytest.raises(PartialDecodeError):
+        extract_fields(raw, SPEC)
@@ -0,0 +1,80 @@
+"""Tests for the chunked JSONL scanners."""
+
+from pathlib import Path
+
+from agentop.parsers.jsonl_scanner import JsonlScanner, ReverseJsonlScanner
+
+
+def _write(tmp_path: Path, content: bytes) -> Path:
+    path = tmp_path / "log.jsonl"
+    path.write_bytes(content)
+    return path
+
+
+def test_marker_selects_lines_and_counts_skips(tmp_path: Path):
+    """Only lines containing the marker are yielded; the rest are counted."""
+    path = _write(tmp_path, b'{"a":1}\n{"usage":2}\n{"b":3}\n{"c":4}\n{"usage":5}\n')
+
+    scanner = JsonlScanner(path, marker=b'"usage"')
+    lines = [line for line, _, _ in scanner]
+
+    assert lines == [b'{"usage":2}', b'{"usage":5}']
+    assert scanner.lines_scanned == 5
+    assert scanner.lines_skipped == 3
+    assert scanner.offset == path.stat().st_size
+
+
+def test_lines_spanning_chunks_are_reassembled(tmp_path: Path):
+    """Lines longer than the buffer grow it instead of being split."""
+    lines = [b'{"usage":%d,"pad":"%s"}' % (i, b"x" * (i * 7)) for i in range(20)]
+    path = _write(tmp_path, b"\n".join(lines) + b"\n")
+
+    scanned = list(JsonlScanner(path, buffer=bytearray(16)))
+
+    assert [line for line, _, _ in scanned] == lines
+    assert all(terminated for _, _, terminated in scanned)
+    assert scanned[-1][1] == path.stat().st_size
+
+
+def test_unterminated_tail_is_yielded_but_not_consumed(tmp_path: Path):
+    """The final partial line is reported as unterminated and offset stays before it."""
+    path = _write(tmp_path, b'{"usage":1}\n{"usage":')
+
+    scanner = JsonlScanner(path, marker=b'"usage"')
+    scanned = list(scanner)
+
+    assert scanned[-1] == (b'{"usage":', path.stat().st_size, False)
+    assert scanner.offset == len(b'{"usage":1}\n')
+
+
+def test_byte_range_is_respected(tmp_path: Path):
+    """Scanning starts at ``start`` and ignores bytes past ``end``."""
+    path = _write(tmp_path, b'{"a":1}\n{"b":2}\n{"c":3}\n')
+
+    scanned = list(JsonlScanner(path, start=8, end=16))
+
+    assert scanned == [(b'{"b":2}', 16, True)]
+
+
+def test_reverse_scan_yields_newest_first(tmp_path: Path):
+    """Lines come back last-first with their start offsets, across block boundaries."""
+    lines = [b'{"usage":%d,"pad":"%s"}' % (i, b"x" * (i * 3)) for i in range(30)]
+    content = b"\n".join(lines) + b"\n"
+    path = _write(tmp_path, content)
+
+    scanned = list(ReverseJsonlScanner(path, block_size=7))
+
+    assert [line for line, _ in scanned] == lines[::-1]
+    assert all(content[offset:].startswith(line) for line, offset in scanned)
+
+
+def test_reverse_scan_stops_reading_when_caller_stops(tmp_path: Path):
+    """Breaking out early leaves the head of the file unread."""
+    path = _write(tmp_path, b'{"a":1}\n' * 1000 + b'{"usage":1}\n{"b":2}')
+
+    scanner = ReverseJsonlScanner(path, marker=b'"usage"', block_size=64)
+    line, _ = next(iter(scanner))
+
+    assert line == b'{"usage":1}'
+    assert scanner.lines_skipped == 1
+    assert scanner.bytes_read <= 128
@@ -0,0 +1,46 @@
+"""Tests for chained block fingerprints."""
+
+from pathlib import Path
+
+from agentop.parsers.prefix_fingerprints import BLOCK_BYTES, BlockFingerprinter, match_prefix
+
+
+def _log(lines: int, tag: str = "a") -> bytes:
+    return b"".join(f'{{"n": {i}, "pad": "{tag * 900}"}}\n'.encode() for i in range(lines))
+
+
+def _feed(fingerprinter: BlockFingerprinter, data: bytes, base: int = 0) -> None:
+    buf = bytearray(data)
+    fingerprinter.feed(buf, 0, len(buf), base)
+
+
+def test_resumed_feed_matches_single_pass():
+    """Fingerprinting in two reads gives the same blocks as one read."""
+    data = _log(300)
+    whole = BlockFingerprinter()
+    _feed(whole, data)
+
+    split = data.rindex(b"\n", 0, len(data) // 2) + 1
+    first = BlockFingerprinter()
+    _feed(first, data[:split])
+    resumed = BlockFingerprinter(first.chain, first.offset)
+    _feed(resumed, data[resumed.offset :], base=resumed.offset)
+
+    assert len(whole.completed) == len(data) // BLOCK_BYTES
+    assert first.completed + resumed.completed == whole.completed
+    assert (resumed.chain, resumed.offset) == (whole.chain, whole.offset)
+
+
+def test_match_prefix_stops_at_divergence(tmp_path: Path):
+    """Only the leading blocks shared with known fingerprints are matched."""
+    original = _log(300)
+    known = BlockFingerprinter()
+    _feed(known, original)
+
+    fork = tmp_path / "fork.jsonl"
+    fork.write_bytes(original[: known.offset] + _log(200, tag="b"))
+    assert match_prefix(fork, set(known.completed).__contains__) == (known.chain, known.offset)
+
+    other = tmp_path / "other.jsonl"
+    other.write_bytes(_log(300, tag="c"))
+    assert match_prefix(other, set(known.completed).__contains__) is None
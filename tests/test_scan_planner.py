@@ -0,0 +1,67 @@
+"""Tests for time-range-aware scan planning."""
+
+import os
+from datetime import date
+from pathlib import Path
+
+from agentop.parsers.scan_planner import FileSpanIndex, ScanPlanner, TimeRange, TimeSpan
+
+_JAN_2020 = TimeRange.days(date(2020, 1, 1), date(2020, 2, 1))
+
+
+def _span(first: date, last: date) -> TimeSpan:
+    span = TimeSpan()
+    span.observe_day(first)
+    span.observe_day(last)
+    return span
+
+
+def _log(tmp_path: Path, name: str, content: str = "{}\n") -> Path:
+    path = tmp_path / name
+    path.write_text(content)
+    return path
+
+
+def test_files_modified_before_the_range_are_skipped(tmp_path: Path):
+    """mtime alone rules out files that stopped changing before the range."""
+    old = _log(tmp_path, "old.jsonl")
+    os.utime(old, (0, 0))
+    new = _log(tmp_path, "new.jsonl")
+    planner = ScanPlanner(FileSpanIndex(tmp_path / "spans.json"))
+
+    files = [(old, old.stat()), (new, new.stat())]
+    planned = [path for path, _ in planner.plan(files, TimeRange.today())]
+
+    assert planned == [new]
+    assert planner.last_plan_stats.files_skipped == 1
+    assert planner.last_plan_stats.bytes_skipped == old.stat().st_size
+
+
+def test_cached_spans_rule_out_files_and_survive_reload(tmp_path: Path):
+    """A recorded span skips files whose entries fall outside the range."""
+    log = _log(tmp_path, "log.jsonl")
+    spans = FileSpanIndex(tmp_path / "spans.json")
+    st = log.stat()
+    spans.record(str(log), st.st_size, st.st_mtime_ns, _span(date(2020, 3, 1), date(2020, 3, 5)))
+    spans.save()
+
+    planner = ScanPlanner(FileSpanIndex(tmp_path / "spans.json"))
+
+    assert not planner.should_scan(str(log), st, _JAN_2020)
+    assert planner.should_scan(str(log), st, TimeRange.days(date(2020, 3, 4)))
+
+
+def test_appended_file_keeps_only_its_first_timestamp(tmp_path: Path):
+    """Growth invalidates the cached last timestamp but not the first."""
+    log = _log(tmp_path, "log.jsonl")
+    spans = FileSpanIndex(tmp_path / "spans.json")
+    st = log.stat()
+    spans.record(str(log), st.st_size, st.st_mtime_ns, _span(date(2020, 3, 1), date(2020, 3, 5)))
+    planner = ScanPlanner(spans)
+
+    with open(log, "a") as f:
+        f.write("{}\n")
+    grown = log.stat()
+
+    assert not planner.should_scan(str(log), grown, _JAN_2020)
+    assert planner.should_scan(str(log), grown, TimeRange.days(date(2020, 4, 1)))
@@ -0,0 +1,64 @@
+"""Tests for the append-only sidecar journal."""
+
+import json
+from pathlib import Path
+
+from agentop.parsers.sidecar_journal import SidecarJournal
+
+
+def test_saves_append_only_the_changes(tmp_path: Path):
+    """Each save appends the changed keys; replaying gives the live dict."""
+    path = tmp_path / "sidecar.jsonl"
+    journal = SidecarJournal(path)
+    data = {f"/logs/{i}": {"offset": i} for i in range(10)}
+    assert journal.save(data, dict(data))
+    snapshot = path.read_bytes()
+
+    data["/logs/3"] = {"offset": 33}
+    del data["/logs/4"]
+    assert journal.save(data, {"/logs/3": {"offset": 33}, "/logs/4": None})
+
+    content = path.read_bytes()
+    assert content.startswith(snapshot)
+    assert content[len(snapshot) :].count(b"\n") == 2
+    assert SidecarJournal(path).load() == data
+
+
+def test_compacts_atomically_once_records_outnumber_keys(tmp_path: Path):
+    """A journal full of records is replaced by one snapshot line, leaving no temp files."""
+    path = tmp_path / "sidecar.jsonl"
+    journal = SidecarJournal(path, min_compact_records=4)
+    data = {"/logs/a": 0}
+    journal.save(data, dict(data))
+    for offset in range(1, 6):
+        data["/logs/a"] = offset
+        journal.save(data, {"/logs/a": offset})
+
+    assert path.read_text().count("\n") < 5
+    assert [p.name for p in tmp_path.iterdir()] == ["sidecar.jsonl"]
+    assert SidecarJournal(path).load() == {"/logs/a": 5}
+
+
+def test_torn_record_is_skipped_and_the_next_save_compacts(tmp_path: Path):
+    """A record cut short by a crash is ignored; the journal is rewritten whole afterwards."""
+    path = tmp_path / "sidecar.jsonl"
+    journal = SidecarJournal(path)
+    journal.save({"/logs/a": 1}, {"/logs/a": 1})
+    with open(path, "a") as f:
+        f.write('["/logs/b", {"off')
+
+    journal = SidecarJournal(path)
+    data = journal.load()
+    assert data == {"/logs/a": 1}
+
+    data["/logs/c"] = 3
+    journal.save(data, {"/logs/c": 3})
+    assert path.read_text() == json.dumps({"/logs/a": 1, "/logs/c": 3}) + "\n"
+
+
+def test_single_object_sidecar_loads(tmp_path: Path):
+    """Sidecars written as one JSON object by earlier versions still load."""
+    path = tmp_path / "sidecar.json"
+    path.write_text(json.dumps({"/logs/a": {"size": 1}}))
+
+    assert SidecarJournal(path).load() == {"/logs/a": {"size": 1}}
@@ -0,0 +1,64 @@
+"""Tests for fast timestamp parsing and local-day bucketing."""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from agentop.parsers.timestamps import LocalOffsets, parse_iso_epoch
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "2025-06-01T12:34:56Z",
+        "2025-06-01T12:34:56.789Z",
+        "2024-02-29T23:59:59.5Z",
+        "2025-06-01T12:00:00+02:00",
+    ],
+)
+def test_parse_matches_fromisoformat(raw: str):
+    """The fast path and the fallback agree with datetime.fromisoformat."""
+    expected = datetime.fromisoformat(raw.replace("Z", "+00:00")).timestamp()
+    assert parse_iso_epoch(raw) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "raw", ["2025-13-01T00:00:00Z", "2025-02-30T10:00:00Z", "2025-01-01T00:00:1e1Z", "soon"]
+)
+def test_invalid_timestamps_are_rejected(raw: str):
+    """Malformed timestamps parse to None rather than a wrong instant."""
+    assert parse_iso_epoch(raw) is None
+
+
+def test_offsets_follow_dst_transitions(new_york):
+    """Offsets switch at the exact second of each DST change."""
+    offsets = LocalOffsets()
+    spring = datetime.fromisoformat("2025-03-09T07:00:00+00:00").timestamp()
+    fall = datetime.fromisoformat("2025-11-02T06:00:00+00:00").timestamp()
+
+    assert offsets.offset(spring - 1) == -5 * 3600
+    assert offsets.offset(spring) == -4 * 3600
+    assert offsets.offset(fall - 1) == -4 * 3600
+    assert offsets.offset(fall) == -5 * 3600
+    # Earlier years extend the table backwards.
+    assert offsets.offset(spring - 365 * 86400) == -5 * 3600
+
+
+def test_day_ordinal_matches_local_date(new_york):
+    """Local days computed from offsets match datetime's local conversion."""
+    offsets = LocalOffsets()
+    start = datetime.fromisoformat("2025-03-01T00:00:00+00:00").timestamp()
+    for hour in range(0, 24 * 300, 5):
+        timestamp = start + hour * 3600
+        expected = datetime.fromtimestamp(timestamp).date().toordinal()
+        assert offsets.day_ordinal(timestamp) == expected